@@ -0,0 +1,39 @@
+import argparse
+import signal
+from utils.alerts import ALERTS_FILE
+from utils.settings import SETTINGS_FILE
+from utils.alert_state import ALERT_STATE_FILE
+from utils.alert_watermarks import WATERMARKS_FILE
+from utils.alert_daemon import AlertDaemon, DEFAULT_WORKERS, DEFAULT_HEALTH_INTERVAL, HEALTH_FILE
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor PyFFUniverse price alerts without the GUI.")
+    parser.add_argument("--alerts-file", default=ALERTS_FILE, help="Path to the alerts file")
+    parser.add_argument("--settings-file", default=SETTINGS_FILE, help="Path to the settings file")
+    parser.add_argument("--state-file", default=ALERT_STATE_FILE, help="Path to the alert trigger state file")
+    parser.add_argument("--watermarks-file", default=WATERMARKS_FILE, help="Path to the upload watermarks file")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of worker threads checking alerts")
+    parser.add_argument("--health-file", default=HEALTH_FILE, help="Path to the health/metrics file")
+    parser.add_argument("--health-interval", type=int, default=DEFAULT_HEALTH_INTERVAL, help="Seconds between health file updates")
+    args = parser.parse_args()
+
+    daemon = AlertDaemon(
+        alerts_file=args.alerts_file,
+        settings_file=args.settings_file,
+        workers=args.workers,
+        health_file=args.health_file,
+        health_interval=args.health_interval,
+        state_file=args.state_file,
+        watermarks_file=args.watermarks_file
+    )
+
+    # Stop gracefully on Ctrl+C or service stop, reload on SIGHUP where available
+    signal.signal(signal.SIGINT, lambda signum, frame: daemon.stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda signum, frame: daemon.request_reload())
+
+    daemon.run()
+
+if __name__ == "__main__":
+    main()
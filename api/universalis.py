@@ -1,6 +1,8 @@
 import requests
 import json
 import datetime
+import threading
+import time
 
 # Universalis API Base URL
 UNIVERSALIS_BASE_URL = "https://universalis.app/api/v2/"
@@ -8,6 +10,41 @@ UNIVERSALIS_BASE_URL = "https://universalis.app/api/v2/"
 # Data Center URL
 DC_URL = "https://raw.githubusercontent.com/xivapi/ffxiv-datamining/master/csv/World.csv"
 
+# Universalis allows 25 requests per second, stay a little below it
+UNIVERSALIS_REQUESTS_PER_SECOND = 20
+
+# Maximum number of item IDs in one multi-item request
+MAX_ITEMS_PER_REQUEST = 100
+
+class RateLimiter:
+    """
+    Token bucket shared by the threads making bulk requests to Universalis.
+    """
+    def __init__(self, requests_per_second=UNIVERSALIS_REQUESTS_PER_SECOND):
+        self.requests_per_second = requests_per_second
+        self._tokens = float(requests_per_second)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Wait until a request may be made.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(float(self.requests_per_second),
+                                   self._tokens + (now - self._last_refill) * self.requests_per_second)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.requests_per_second
+            time.sleep(wait)
+
+# Rate limiter for bulk requests
+rate_limiter = RateLimiter()
+
 def get_data_centers():
     """
     Get a dictionary of data centers and their worlds.
@@ -39,6 +76,43 @@ def get_data_centers():
         print(f"Error fetching data centers: {e}")
         return {}
 
+# Cached data center topology, it only changes when new worlds are added
+_topology_cache = {}
+
+def get_data_center_topology():
+    """
+    Get the regions, data centers and worlds known to Universalis.
+    
+    The result is cached for the lifetime of the application.
+    
+    Returns:
+        dict: A dictionary with "regions" (region -> data centers), "data_centers"
+            (data center -> worlds), "world_to_dc", "dc_to_region" and "world_names"
+            (world ID -> world name) mappings
+    """
+    if _topology_cache:
+        return _topology_cache
+    try:
+        dc_response = requests.get(f"{UNIVERSALIS_BASE_URL}data-centers", timeout=30)
+        worlds_response = requests.get(f"{UNIVERSALIS_BASE_URL}worlds", timeout=30)
+        if dc_response.status_code != 200 or worlds_response.status_code != 200:
+            raise Exception(f"Failed to fetch data centers: HTTP Status {dc_response.status_code}/{worlds_response.status_code}")
+        
+        world_names = {world["id"]: world["name"] for world in worlds_response.json()}
+        topology = {"regions": {}, "data_centers": {}, "world_to_dc": {}, "dc_to_region": {}, "world_names": world_names}
+        for dc in dc_response.json():
+            worlds = [world_names[world_id] for world_id in dc.get("worlds", []) if world_id in world_names]
+            topology["regions"].setdefault(dc["region"], []).append(dc["name"])
+            topology["data_centers"][dc["name"]] = worlds
+            topology["dc_to_region"][dc["name"]] = dc["region"]
+            for world in worlds:
+                topology["world_to_dc"][world] = dc["name"]
+        _topology_cache.update(topology)
+        return _topology_cache
+    except Exception as e:
+        print(f"Error fetching data center topology: {e}")
+        return {"regions": {}, "data_centers": {}, "world_to_dc": {}, "dc_to_region": {}, "world_names": {}}
+
 def get_marketable_items():
     """
     Get a list of all marketable item IDs from Universalis.
@@ -81,6 +155,91 @@ def get_market_data(item_id, location):
         print(f"Error fetching market data: {e}")
         return {}
 
+def get_market_data_bulk(item_ids, location, listings=None, fields=None):
+    """
+    Get market data for up to 100 items from a world, data center or region in one request.
+    
+    The request waits for the shared rate limiter first.
+    
+    Args:
+        item_ids (list): List of up to 100 item IDs
+        location (str): The world, data center or region name
+        listings (int, optional): The number of listings to return per item, all if None
+        fields (str, optional): Comma separated list of fields to return, e.g. "items.listings.pricePerUnit"
+        
+    Returns:
+        dict: Market data by item ID (as string)
+    """
+    try:
+        ids = ",".join(str(item_id) for item_id in item_ids)
+        query_params = []
+        if listings is not None:
+            query_params.append(f"listings={listings}")
+        if fields:
+            if len(item_ids) == 1:
+                # Single item responses are not wrapped in "items", so neither are their fields
+                fields = ",".join(field.removeprefix("items.") for field in fields.split(","))
+            query_params.append(f"fields={fields}")
+        url = f"{UNIVERSALIS_BASE_URL}{location}/{ids}"
+        if query_params:
+            url = f"{url}?{'&'.join(query_params)}"
+        
+        rate_limiter.acquire()
+        response = requests.get(url, timeout=30)
+        
+        if response.status_code == 200:
+            data = response.json()
+            # A single item is returned as-is instead of in an "items" dictionary
+            if len(item_ids) == 1 and "items" not in data:
+                return {str(item_ids[0]): data}
+            return {str(item_id): item_data for item_id, item_data in data.get("items", {}).items()}
+        else:
+            raise Exception(f"Failed to fetch market data: HTTP Status {response.status_code}")
+    except Exception as e:
+        print(f"Error fetching bulk market data: {e}")
+        return {}
+
+def get_aggregated_data(item_ids, location):
+    """
+    Get aggregated market statistics for up to 100 items from a world, data center or region.
+    
+    The aggregated endpoint is much cheaper than full listings and includes the
+    minimum listing prices, sale velocity and the last upload time per world.
+    
+    Args:
+        item_ids (list): List of up to 100 item IDs
+        location (str): The world, data center or region name
+        
+    Returns:
+        dict: Aggregated data by item ID (as string)
+    """
+    try:
+        ids = ",".join(str(item_id) for item_id in item_ids)
+        url = f"{UNIVERSALIS_BASE_URL}aggregated/{location}/{ids}"
+        rate_limiter.acquire()
+        response = requests.get(url, timeout=30)
+        
+        if response.status_code == 200:
+            return {str(result["itemId"]): result for result in response.json().get("results", [])}
+        else:
+            raise Exception(f"Failed to fetch aggregated data: HTTP Status {response.status_code}")
+    except Exception as e:
+        print(f"Error fetching aggregated data: {e}")
+        return {}
+
+def get_last_upload_time(aggregated_result):
+    """
+    Get the most recent upload time from an aggregated result.
+    
+    Args:
+        aggregated_result (dict): An item's entry from get_aggregated_data
+        
+    Returns:
+        int: The latest upload time in milliseconds, or 0 if unknown
+    """
+    upload_times = aggregated_result.get("worldUploadTimes") or []
+    return max((upload.get("timestamp", 0) for upload in upload_times), default=0)
+
 def get_price_history(item_id, location, days=7):
     """
     Get price history data for an item from a specific world or data center.
@@ -148,6 +307,45 @@ def get_price_history(item_id, location, days=7):
         print(f"Error fetching price history: {e}")
         return {"error": str(e), "entries": []}
 
+def get_price_history_bulk(item_ids, location, days=7):
+    """
+    Get price history data for up to 100 items from a world, data center or region in one request.
+
+    The request waits for the shared rate limiter first.
+
+    Args:
+        item_ids (list): List of up to 100 item IDs
+        location (str): The world, data center or region name
+        days (int): Number of days of history to retrieve, all available history if 0
+
+    Returns:
+        dict: Price history data by item ID (as string)
+    """
+    try:
+        ids = ",".join(str(item_id) for item_id in item_ids)
+        query_params = ["entriesToReturn=3600"]
+        if days > 0:
+            # The history window is given in milliseconds
+            within = days * 24 * 60 * 60 * 1000
+            query_params.append(f"statsWithin={within}")
+            query_params.append(f"entriesWithin={within}")
+        url = f"{UNIVERSALIS_BASE_URL}history/{location}/{ids}?{'&'.join(query_params)}"
+
+        rate_limiter.acquire()
+        response = requests.get(url, timeout=30)
+
+        if response.status_code == 200:
+            data = response.json()
+            # A single item is returned as-is instead of in an "items" dictionary
+            if len(item_ids) == 1 and "items" not in data:
+                return {str(item_ids[0]): data}
+            return {str(item_id): item_data for item_id, item_data in data.get("items", {}).items()}
+        else:
+            raise Exception(f"Failed to fetch price history: HTTP Status {response.status_code}")
+    except Exception as e:
+        print(f"Error fetching bulk price history: {e}")
+        return {}
+
 def format_listing(listing, market_location):
     """
     Format a market listing for display.
@@ -159,7 +357,7 @@ def format_listing(listing, market_location):
     Returns:
         str: Formatted listing string
     """
-    from utils.translations import get_text
+    from utils.translations import get_text, get_formatter
     
     price = listing.get("pricePerUnit", 0)
     quantity = listing.get("quantity", 0)
@@ -176,7 +374,7 @@ def format_listing(listing, market_location):
         formatted_time = get_text("market.unknown_time", "Unknown")
     
     # Format and return the listing using the translation template
-    return get_text("market.listing_format", "{price} | {qty} | {total} | {world} | {time}").format(
+    return get_formatter("market.listing_format", "{price} | {qty} | {total} | {world} | {time}")(
         price=f"{price:,}".center(10),
         qty=str(quantity).center(6),
         total=f"{total:,}".center(10),
@@ -4,6 +4,9 @@ import json
 # XIVAPI Base URL
 XIVAPI_BASE_URL = "https://xivapi.com/Item/"
 
+# Maximum number of items XIVAPI returns per page of a list request
+XIVAPI_PAGE_SIZE = 100
+
 def get_item_details(item_id):
     """
     Get detailed information about an item from XIVAPI.
@@ -26,6 +29,29 @@ def get_item_details(item_id):
         print(f"Error fetching item details: {e}")
         return None
 
+def get_items_can_be_hq(item_ids):
+    """
+    Get whether items can be HQ, for up to 100 items in one request.
+    
+    Args:
+        item_ids (list): List of up to 100 item IDs
+        
+    Returns:
+        dict: True or False by item ID (as string), empty if the request failed
+    """
+    try:
+        ids = ",".join(str(item_id) for item_id in item_ids)
+        url = f"{XIVAPI_BASE_URL.rstrip('/')}?ids={ids}&columns=ID,CanBeHq&limit={XIVAPI_PAGE_SIZE}"
+        response = requests.get(url, timeout=30)
+        
+        if response.status_code == 200:
+            return {str(item["ID"]): item.get("CanBeHq") == 1 for item in response.json().get("Results", [])}
+        else:
+            raise Exception(f"Failed to fetch item details: HTTP Status {response.status_code}")
+    except Exception as e:
+        print(f"Error fetching item details: {e}")
+        return {}
+
 def get_item_name(item_id, language="en"):
     """
     Get the name of an item in the specified language.
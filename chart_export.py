@@ -0,0 +1,48 @@
+import argparse
+from utils.alerts import ALERTS_FILE, load_alerts, group_alerts_by_target
+from utils.settings import SETTINGS_FILE, load_settings
+from utils.translations import get_language_code
+from utils.chart_export import export_charts, EXPORT_DIR, EXPORT_FORMATS, DEFAULT_EXPORT_WORKERS
+
+def main():
+    parser = argparse.ArgumentParser(description="Export PyFFUniverse price history charts without the GUI.")
+    parser.add_argument("--items", nargs="*", default=[], help="Item IDs to export")
+    parser.add_argument("--locations", nargs="*", default=[], help="Worlds, data centers or regions to export")
+    parser.add_argument("--from-alerts", action="store_true", help="Also export every item and location watched by an active alert")
+    parser.add_argument("--alerts-file", default=ALERTS_FILE, help="Path to the alerts file")
+    parser.add_argument("--settings-file", default=SETTINGS_FILE, help="Path to the settings file")
+    parser.add_argument("--days", type=int, choices=(1, 7, 30, 90, 0), default=7, help="Days of history, 0 for all time")
+    parser.add_argument("--format", nargs="+", choices=EXPORT_FORMATS, default=["png"], help="Image formats to write")
+    parser.add_argument("--output", default=EXPORT_DIR, help="Folder to write the charts and summary.json to")
+    parser.add_argument("--workers", type=int, default=DEFAULT_EXPORT_WORKERS, help="Number of processes rendering charts")
+    args = parser.parse_args()
+
+    settings = load_settings(args.settings_file)
+    language = get_language_code(settings.get("language", "English"))
+    if args.locations:
+        locations = args.locations
+    elif settings.get("world", "All") != "All":
+        locations = [settings["world"]]
+    else:
+        locations = [settings.get("data_center", "North-America")]
+
+    targets = {location: list(args.items) for location in locations} if args.items else {}
+    item_names = {}
+    if args.from_alerts:
+        # Every alert watches one location, alerts on all data centers have no single chart to draw
+        for (item_id, location), alerts in group_alerts_by_target(load_alerts(args.alerts_file)).items():
+            if location == "all data centers and servers":
+                continue
+            targets.setdefault(location, []).append(item_id)
+            item_names[item_id] = alerts[0].get("item_name")
+
+    if not targets:
+        parser.error("nothing to export, pass --items or --from-alerts")
+
+    summary = export_charts(targets, args.output, args.days, args.format, args.workers, language, item_names)
+    for missing in summary["missing"]:
+        print(f"No price history for item {missing['item_id']} on {missing['location']}")
+    print(f"Exported {len(summary['charts'])} charts to {args.output}")
+
+if __name__ == "__main__":
+    main()
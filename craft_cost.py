@@ -0,0 +1,53 @@
+import argparse
+from utils.settings import SETTINGS_FILE, load_settings
+from utils.crafting import RECIPES_FILE, CraftingTree, load_recipes, fetch_ingredient_prices
+
+def format_gil(value):
+    return "-" if value is None else f"{value:,.0f} gil"
+
+def print_breakdown(node, depth=0):
+    action = node["action"] or "unavailable"
+    print(f"{'  ' * depth}{node['amount']:g} x {node['item_id']}: {action}, {format_gil(node['total_cost'])}")
+    for ingredient in node.get("ingredients", []):
+        print_breakdown(ingredient, depth + 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the cost of buying and crafting items on the market board.")
+    parser.add_argument("--items", nargs="*", default=[], help="Item IDs to break down into buy-or-craft plans")
+    parser.add_argument("--amount", type=float, default=1, help="Number of units needed of each item")
+    parser.add_argument("--profits", type=int, default=0, help="List the N items that are the most profitable to craft, pricing the whole recipe catalog")
+    parser.add_argument("--location", help="World or data center to price against, defaults to the one in the settings")
+    parser.add_argument("--settings-file", default=SETTINGS_FILE, help="Path to the settings file")
+    parser.add_argument("--recipes-file", default=RECIPES_FILE, help="Path to the local recipes snapshot")
+    parser.add_argument("--refresh-recipes", action="store_true", help="Download the recipes again even if a snapshot exists")
+    args = parser.parse_args()
+
+    if not args.items and args.profits <= 0:
+        parser.error("nothing to analyze, pass --items or --profits")
+
+    settings = load_settings(args.settings_file)
+    if args.location:
+        location = args.location
+    elif settings.get("world", "All") != "All":
+        location = settings["world"]
+    else:
+        location = settings.get("data_center", "North-America")
+
+    recipes = load_recipes(args.recipes_file, args.refresh_recipes)
+    if not recipes:
+        parser.error(f"no recipes found in {args.recipes_file}")
+    tree = CraftingTree(recipes)
+
+    # Breakdowns only need the items' own recipe trees, profits need the whole catalog
+    fetch_ingredient_prices(tree, location, None if args.profits > 0 else tree.get_component_ids(args.items))
+
+    for item_id in args.items:
+        print_breakdown(tree.get_breakdown(item_id, args.amount))
+    if args.profits > 0:
+        for entry in tree.find_craft_profits(args.profits):
+            print(f"{entry['item_id']}: buy {format_gil(entry['buy_price'])}, craft {format_gil(entry['craft_cost'])}, "
+                  f"profit {format_gil(entry['profit'])}")
+    print(f"Prices from {location}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import argparse
+import sys
+from utils.startup import (profile_imports, format_profile, check_startup_budget, STARTUP_MODULE,
+                           DEFAULT_STARTUP_BUDGET_MS)
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the imports PyFFUniverse makes before its window appears.")
+    parser.add_argument("--module", default=STARTUP_MODULE, help="Module to profile the import of")
+    parser.add_argument("--top", type=int, default=20, help="Number of packages and modules to list")
+    parser.add_argument("--budget", type=float, nargs="?", const=DEFAULT_STARTUP_BUDGET_MS,
+                        help="Fail if the import takes longer than this many milliseconds "
+                             f"(default {DEFAULT_STARTUP_BUDGET_MS}) or imports a deferred module")
+    args = parser.parse_args()
+
+    profile = profile_imports(args.module)
+    print(format_profile(profile, args.top))
+
+    if args.budget is not None:
+        problems = check_startup_budget(profile, args.budget)
+        print("")
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        if problems:
+            sys.exit(1)
+        print(f"OK: within the {args.budget:.0f} ms startup budget")
+
+if __name__ == "__main__":
+    main()
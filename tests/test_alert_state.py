@@ -0,0 +1,53 @@
+import pytest
+from utils.alert_state import AlertTriggerState
+
+UNDER = {"direction": "under"}
+
+@pytest.fixture
+def trigger_state(tmp_path):
+    return AlertTriggerState(str(tmp_path / "alert_state.json"), hysteresis_pct=2.0,
+                             cooldown_seconds=3600, refire_move_pct=5.0)
+
+def test_alert_fires_once_while_the_price_stays_past_its_threshold(trigger_state):
+    alert = {"uuid": "a", "min_price": 100}
+    assert trigger_state.update(alert, 90, UNDER, now=0)
+    assert not trigger_state.update(alert, 89, UNDER, now=10)
+    assert trigger_state.disarmed_uuids() == {"a"}
+
+def test_alert_rearms_past_the_hysteresis_band(trigger_state):
+    alert = {"uuid": "a", "min_price": 100}
+    trigger_state.update(alert, 90, UNDER, now=0)
+    # Back inside the threshold, but within 2% of it
+    trigger_state.update(alert, 101, None, now=10)
+    assert trigger_state.disarmed_uuids() == {"a"}
+    trigger_state.update(alert, 103, None, now=20)
+    assert trigger_state.disarmed_uuids() == set()
+    assert trigger_state.update(alert, 95, UNDER, now=30)
+
+def test_disarmed_alert_refires_after_cooldown_and_a_further_move(trigger_state):
+    alert = {"uuid": "a", "min_price": 100}
+    trigger_state.update(alert, 90, UNDER, now=0)
+    assert not trigger_state.update(alert, 80, UNDER, now=100)
+    assert trigger_state.update(alert, 85, UNDER, now=4000)
+    # 84 is not 5% below the 85 it last fired at
+    assert not trigger_state.update(alert, 84, UNDER, now=9000)
+
+def test_alert_without_uuid_fires_on_every_trigger(trigger_state):
+    alert = {"min_price": 100}
+    assert trigger_state.update(alert, 90, UNDER, now=0)
+    assert trigger_state.update(alert, 90, UNDER, now=1)
+    assert not trigger_state.update(alert, 110, None, now=2)
+
+def test_prune_forgets_deleted_alerts(trigger_state):
+    trigger_state.update({"uuid": "a", "min_price": 100}, 90, UNDER, now=0)
+    trigger_state.update({"uuid": "b", "min_price": 100}, 90, UNDER, now=0)
+    trigger_state.prune({"1": [{"uuid": "b"}]})
+    assert trigger_state.disarmed_uuids() == {"b"}
+
+def test_save_replaces_the_state_file(tmp_path):
+    path = tmp_path / "alert_state.json"
+    trigger_state = AlertTriggerState(str(path))
+    trigger_state.update({"uuid": "a", "min_price": 100}, 90, UNDER, now=0)
+    trigger_state.save()
+    assert AlertTriggerState(str(path)).disarmed_uuids() == {"a"}
+    assert [file.name for file in tmp_path.iterdir()] == ["alert_state.json"]
@@ -0,0 +1,29 @@
+from utils.crafting import CraftingTree
+
+def make_tree():
+    # 3 is crafted from 1 and 2, 4 is crafted from two of 3 and yields two
+    return CraftingTree([
+        {"result": 3, "yields": 1, "ingredients": [{"id": 1, "amount": 2}, {"id": 2, "amount": 1}]},
+        {"result": 4, "yields": 2, "ingredients": [{"id": 3, "amount": 2}]},
+        {"result": 6, "yields": 1, "ingredients": [{"id": 5, "amount": 1}]}
+    ])
+
+def test_get_cost_picks_the_cheaper_of_buying_and_crafting():
+    tree = make_tree()
+    tree.set_prices({1: 10, 2: 5, 3: 40, 4: 100})
+    assert tree.get_cost(3) == {"buy_price": 40, "craft_cost": 25, "cost": 25, "action": "craft"}
+    assert tree.get_cost(4)["cost"] == 25
+    tree.set_price(3, 20)
+    assert tree.get_cost(4) == {"buy_price": 100, "craft_cost": 20, "cost": 20, "action": "craft"}
+
+def test_get_breakdown_follows_the_crafted_ingredients():
+    tree = make_tree()
+    tree.set_prices({1: 10, 2: 5, 3: 40, 4: 100})
+    breakdown = tree.get_breakdown(4, amount=4)
+    assert breakdown["total_cost"] == 100
+    (component,) = breakdown["ingredients"]
+    assert (component["item_id"], component["amount"], component["action"]) == (3, 4, "craft")
+    assert [(node["item_id"], node["amount"], node["action"]) for node in component["ingredients"]] == [(1, 8, "buy"), (2, 4, "buy")]
+
+def test_get_component_ids_only_walks_the_requested_recipes():
+    assert make_tree().get_component_ids([4]) == {"1", "2", "3", "4"}
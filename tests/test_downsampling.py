@@ -0,0 +1,36 @@
+import numpy as np
+from utils.downsampling import lttb_indices, min_max_indices, downsample
+
+def test_lttb_keeps_threshold_points_including_the_ends():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 50)
+    indices = lttb_indices(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0
+    assert indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+def test_lttb_keeps_every_point_under_the_threshold():
+    x = np.arange(10, dtype=np.float64)
+    assert np.array_equal(lttb_indices(x, x, 20), np.arange(10))
+    assert np.array_equal(lttb_indices(x, x, 2), np.arange(10))
+
+def test_lttb_keeps_a_spike():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[501] = 100
+    assert 501 in lttb_indices(x, y, 50)
+
+def test_min_max_keeps_the_extremes_of_every_bucket():
+    y = np.array([3, 1, 2, 9, 5, 4, 0, 8], dtype=np.float64)
+    indices = min_max_indices(y, 2)
+    assert set(indices) == {1, 3, 6, 7}
+
+def test_downsample_keeps_the_global_extremes():
+    x = np.arange(5000, dtype=np.float64)
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=5000)
+    for method in ("lttb", "min_max"):
+        indices = downsample(x, y, 100, method)
+        assert int(np.argmin(y)) in indices
+        assert int(np.argmax(y)) in indices
@@ -0,0 +1,34 @@
+from utils.price_matrix import PriceMatrix
+
+def make_matrix():
+    matrix = PriceMatrix(item_capacity=2, location_capacity=2)
+    for item_id, location, nq_price, hq_price in (
+        (1, "Alpha", 100, None), (1, "Beta", 80, None), (1, "Gamma", 95, None),
+        (2, "Alpha", 100, None), (2, "Beta", 95, None),
+        (3, "Beta", 10, None),
+        (4, "Alpha", 100, 200), (4, "Beta", 50, 190)
+    ):
+        matrix.update_prices(item_id, location, nq_price, hq_price, is_world=True)
+    return matrix
+
+def test_find_spreads_returns_items_cheaper_elsewhere():
+    spreads = {spread["item_id"]: spread for spread in make_matrix().find_spreads("Alpha", 0.1)}
+    # Item 2 is only 5% cheaper and item 3 is not sold on the home world
+    assert sorted(spreads) == ["1", "4"]
+    assert spreads["1"] == {"item_id": "1", "current_price": 100.0, "lowest_price_world": "Beta", "lowest_price": 80.0}
+    assert spreads["4"]["lowest_price"] == 50.0
+
+def test_find_spreads_compares_hq_prices_when_required():
+    assert make_matrix().find_spreads("Alpha", 0.1, item_ids=[4], require_hq=True) == []
+
+def test_find_spreads_only_buys_on_the_given_worlds():
+    assert make_matrix().find_spreads("Alpha", 0.1, worlds=["Gamma"]) == []
+
+def test_find_spreads_of_unknown_home_world():
+    assert make_matrix().find_spreads("Delta") == []
+
+def test_find_spreads_skips_unknown_items_without_adding_them():
+    matrix = make_matrix()
+    spreads = matrix.find_spreads("Alpha", 0.1, item_ids=[99, 1, 4], require_hq=[True, False, True])
+    assert [spread["item_id"] for spread in spreads] == ["1"]
+    assert len(matrix) == 4
@@ -0,0 +1,44 @@
+import numpy as np
+from utils.rollups import compute_rollups, merge_rollups, slice_rollups, empty_rollups, HOURLY
+
+def history(timestamps, prices, quantities, hq):
+    return {
+        "timestamp": np.array(timestamps, dtype=np.int64),
+        "price": np.array(prices, dtype=np.float64),
+        "quantity": np.array(quantities, dtype=np.float64),
+        "hq": np.array(hq, dtype=bool)
+    }
+
+def test_compute_rollups_builds_one_interval_per_hour_with_sales():
+    rollups = compute_rollups(history([0, 600, 1200, 7200], [10, 30, 20, 50], [1, 1, 2, 4], [False, True, False, False]), HOURLY)
+    assert rollups["start"].tolist() == [0, 7200]
+    assert rollups["open"].tolist() == [10, 50]
+    assert rollups["high"].tolist() == [30, 50]
+    assert rollups["low"].tolist() == [10, 50]
+    assert rollups["close"].tolist() == [20, 50]
+    assert rollups["vwap"].tolist() == [20, 50]
+    assert rollups["volume"].tolist() == [4, 4]
+    assert rollups["sales"].tolist() == [3, 1]
+    assert rollups["hq_share"].tolist() == [0.25, 0]
+
+def test_compute_rollups_of_empty_history():
+    rollups = compute_rollups(history([], [], [], []), HOURLY)
+    assert all(len(values) == 0 for values in rollups.values())
+
+def test_merge_rollups_keeps_the_interval_with_more_sales():
+    old = compute_rollups(history([0, 100, 3600], [10, 10, 20], [1, 1, 1], [False] * 3), HOURLY)
+    new = compute_rollups(history([200, 3700, 7200], [15, 25, 30], [1, 1, 1], [False] * 3), HOURLY)
+    merged = merge_rollups(old, new)
+    assert merged["start"].tolist() == [0, 3600, 7200]
+    # Hour 0 has two sales in the stored rollup and one in the new one
+    assert merged["sales"].tolist() == [2, 1, 1]
+    assert merged["close"].tolist() == [10, 25, 30]
+
+def test_merge_rollups_with_an_empty_side():
+    rollups = compute_rollups(history([0], [10], [1], [False]), HOURLY)
+    assert merge_rollups(empty_rollups(), rollups) is rollups
+    assert merge_rollups(rollups, empty_rollups()) is rollups
+
+def test_slice_rollups_keeps_the_interval_containing_since():
+    rollups = compute_rollups(history([0, 3600, 7200], [1, 2, 3], [1, 1, 1], [False] * 3), HOURLY)
+    assert slice_rollups(rollups, 4000, HOURLY)["start"].tolist() == [3600, 7200]
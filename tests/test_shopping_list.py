@@ -0,0 +1,37 @@
+from utils.shopping_list import plan_item
+
+def listing(listing_id, price, quantity):
+    return {"listingID": listing_id, "pricePerUnit": price, "quantity": quantity}
+
+def test_plan_item_buys_cheapest_first_across_worlds():
+    world_listings = {
+        "Alpha": [listing("a1", 10, 5), listing("a2", 30, 5)],
+        "Beta": [listing("b1", 20, 5)]
+    }
+    plan = plan_item(world_listings, 10)
+    assert [item["listingID"] for _, item in plan["purchases"]] == ["a1", "b1"]
+    assert plan["cost"] == 150
+    assert plan["purchased"] == 10
+    assert plan["shortfall"] == 0
+
+def test_plan_item_covers_the_rest_with_the_cheapest_stack():
+    # A 10 stack at 5 gil costs 50, the 3 stack at 6 gil only 18
+    world_listings = {"Alpha": [listing("a1", 5, 10), listing("a2", 6, 3)]}
+    plan = plan_item(world_listings, 3)
+    assert [item["listingID"] for _, item in plan["purchases"]] == ["a2"]
+    assert plan["cost"] == 18
+
+def test_plan_item_reports_shortfall():
+    plan = plan_item({"Alpha": [listing("a1", 10, 4)]}, 10)
+    assert plan["purchased"] == 4
+    assert plan["shortfall"] == 6
+    assert plan["cost"] == 40
+
+def test_plan_item_only_buys_on_allowed_worlds():
+    world_listings = {
+        "Alpha": [listing("a1", 10, 5)],
+        "Beta": [listing("b1", 1, 5)]
+    }
+    plan = plan_item(world_listings, 5, allowed_worlds={"Alpha"})
+    assert [world for world, _ in plan["purchases"]] == ["Alpha"]
+    assert plan["cost"] == 50
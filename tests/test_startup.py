@@ -0,0 +1,13 @@
+import importlib.util
+import pytest
+from utils.startup import profile_imports, check_startup_budget
+
+# The startup module builds a Tk application, it can only be imported where Tk and its widgets are installed
+pytestmark = pytest.mark.skipif(
+    any(importlib.util.find_spec(module) is None for module in ("tkinter", "tkhtmlview")),
+    reason="tkinter or tkhtmlview is not installed"
+)
+
+def test_startup_stays_within_budget():
+    profile = profile_imports()
+    assert check_startup_budget(profile) == []
@@ -7,22 +7,30 @@ import threading
 import time
 import sys
 from api.xivapi import get_item_details
-from api.universalis import get_market_data, get_data_centers, get_marketable_items, format_listing, get_price_history
+from api.universalis import (get_market_data, get_marketable_items, format_listing, get_price_history, get_data_center_topology,
+                             get_aggregated_data, get_last_upload_time, MAX_ITEMS_PER_REQUEST)
 from ui.item_frame import create_item_frame
 from ui.item_list import create_item_list
 from ui.market_frame import create_market_frame
-from utils.alerts import load_alerts, set_alert, delete_alert, get_alerts_for_item, check_all_alerts
-from utils.market_analysis import is_hot_item, find_arbitrage_opportunities, custom_print
-from utils.translations import get_text, set_language, get_language_code
-from utils.translation_widgets import create_label, create_button, create_labelframe, set_translation_key
+from utils.alerts import (load_alerts, set_alert, delete_alert, get_alerts_for_item, check_target, group_alerts_by_target,
+                          check_all_alerts, DEFAULT_SWEEP_INTERVAL)
+from utils.alert_state import AlertTriggerState
+from utils.alert_watermarks import UploadWatermarks
+from utils.alert_scheduler import AlertScheduler, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL
+from utils.market_analysis import is_hot_item, find_arbitrage_opportunities
+from utils.arbitrage_scanner import ArbitrageScanner, load_checkpoint
+from utils.price_matrix import record_market_data
+from utils.hot_items import HotItemsLeaderboard
+from utils.shopping_list import fetch_shopping_listings, optimize_shopping_list
+from utils.translations import get_text, set_language, get_language, get_language_code
+from utils.translation_widgets import create_label, create_button, update_translated_widgets
 from utils.settings import load_settings, save_settings
 from utils.data_processing import create_item_dictionary, filter_items_by_search
-from utils.graph_utils import create_price_history_graph, get_time_range_days, create_chart_tooltip
-from utils.discord_webhook import send_discord_alert, save_discord_settings, load_discord_settings
-from plyer import notification
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from utils.rollups import update_rollups
+from utils.chart_cache import get_chart_cache
+from utils.discord_webhook import send_discord_alert, stop_delivery_queue, save_discord_settings, load_discord_settings
+from utils.notifiers import create_dispatcher_from_settings
+from utils.startup import warm_up
 
 # Only import Windows-specific modules on Windows
 if sys.platform == "win32":
@@ -33,6 +41,10 @@ if sys.platform == "win32":
         # Handle case where Windows-specific modules aren't available
         pass
 
+# Marketable items as (item ID, name) pairs and their display names, filled by load_data
+itemDictionary = []
+printableItems = []
+
 def check_os():
     if sys.platform == "win32":
         return "Windows"
@@ -131,6 +143,20 @@ class PyFFUniverseApp:
         self.delete_alert_button = self.market_frame["delete_alert_button"]
         self.all_active_alerts_listbox = self.market_frame["all_active_alerts_listbox"]
         self.all_delete_alert_button = self.market_frame["all_delete_alert_button"]
+        self.start_scan_button = self.market_frame["start_scan_button"]
+        self.stop_scan_button = self.market_frame["stop_scan_button"]
+        self.scan_progress_var = self.market_frame["scan_progress_var"]
+        self.scan_status_label = self.market_frame["scan_status_label"]
+        self.scan_results_listbox = self.market_frame["scan_results_listbox"]
+        self.hot_items_rank_var = self.market_frame["hot_items_rank_var"]
+        self.hot_items_status_label = self.market_frame["hot_items_status_label"]
+        self.hot_items_listbox = self.market_frame["hot_items_listbox"]
+        self.shopping_input_text = self.market_frame["shopping_input_text"]
+        self.travel_penalty_var = self.market_frame["travel_penalty_var"]
+        self.max_worlds_var = self.market_frame["max_worlds_var"]
+        self.optimize_shopping_button = self.market_frame["optimize_shopping_button"]
+        self.shopping_status_label = self.market_frame["shopping_status_label"]
+        self.shopping_results_listbox = self.market_frame["shopping_results_listbox"]
         
         # Initialize variables for hot item and arbitrage
         self.check_arbitrage_button = self.item_frame["check_arbitrage_button"]
@@ -146,6 +172,18 @@ class PyFFUniverseApp:
 
         # Configure the all delete alert button
         self.all_delete_alert_button.config(command=self.on_delete_all_alerts)
+
+        # Configure the arbitrage scanner buttons
+        self.start_scan_button.config(command=self.on_start_arbitrage_scan)
+        self.stop_scan_button.config(command=self.on_stop_arbitrage_scan)
+        self.scan_stop_event = None
+
+        # Redraw the hot items leaderboard when the ranking changes
+        self.hot_items_leaderboard = None
+        self.hot_items_rank_var.trace_add("write", lambda *args: self.display_hot_items())
+
+        # Configure the optimize shopping list button
+        self.optimize_shopping_button.config(command=self.on_optimize_shopping_list)
         
         # Variable to track the currently selected item
         self.current_item_id = None
@@ -157,87 +195,141 @@ class PyFFUniverseApp:
         # Load data
         self.display_all_alerts()
         self.load_data()
+        self.display_arbitrage_checkpoint()
         self.start_alerts_monitor()
         
         # Set up close handler
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Load the charting and notification modules in the background once the window is shown,
+        # pyplot and the Tk backend are then imported on this thread
+        self.root.after_idle(warm_up, self.root)
 
     def start_alerts_monitor(self):
         """
         Start the alerts monitor thread.
         """
         self.alerts_running = True
+        self.alert_scheduler = AlertScheduler(
+            requests_per_minute=self.settings.get("alert_requests_per_minute", DEFAULT_REQUESTS_PER_MINUTE),
+            min_interval=self.settings.get("alert_min_interval", DEFAULT_MIN_INTERVAL),
+            max_interval=self.settings.get("alert_max_interval", DEFAULT_MAX_INTERVAL)
+        )
+        self.alert_trigger_state = AlertTriggerState.from_settings(self.settings)
+        self.alert_watermarks = UploadWatermarks()
+        self.update_notifier()
         self.alerts_thread = threading.Thread(target=self.alerts_monitor, daemon=True)
         self.alerts_thread.start()
 
     def alerts_monitor(self):
         """
         Monitor active alerts and check for price changes.
+        
+        The scheduler decides which target to check next; alerts are reloaded
+        between checks so that new and deleted alerts are picked up. Every
+        alert_sweep_interval seconds all alerts are checked at once instead.
         """
+        targets = {}
+        last_sweep = time.time()
         while self.alerts_running:
-            all_alerts = check_all_alerts()
-            for alert in all_alerts:
-                print(f"Triggering alert for {alert['item_name']} at {alert['pricePerUnit']} gil.")
-                # Create alert message
-                alert_message = f"{alert['item_name']} is now {alert['pricePerUnit']} gil in {alert['source']} which is {alert['direction']} your set threshold of {alert['targetPrice']} gil."
-                
-                # Send desktop notification
-                if check_os() == "Linux" or check_os() == "macOS":
-                    notification.notify(
-                        title="Price Alert",
-                        message=alert_message,
-                        timeout=10,
-                        app_name="PyFFUniverse",
-                        toast=True
-                    )
-                else:
-                    toast = MyToastNotifier()
-                    try:
-                        toast.show_toast(
-                            "PyFFUniverse - Price Alert",
-                            alert_message,
-                            duration=10
-                        )
-                    except TypeError as e:
-                        pass
-                
-                # Send Discord alert if configured
-                send_discord_alert(
-                    "PyFFUniverse - Price Alert",
-                    alert_message,
-                    color=0xFF5733  # Orange color
-                )
-                print("Alerts sent.")
-            
-            self.alerts_sleep(600)
+            # A failed read is not "no alerts", keep the last targets and their state until the file can be read
+            try:
+                all_alerts = load_alerts(raise_errors=True)
+            except Exception:
+                all_alerts = None
+            if all_alerts is not None:
+                targets = group_alerts_by_target(all_alerts)
+                self.alert_scheduler.sync_targets(targets)
+                self.alert_trigger_state.prune(all_alerts)
+                self.alert_watermarks.set_targets(targets)
+                # Targets evaluated by the sweep have their watermarks recorded, so their next scheduled
+                # check is skipped unless new listings were uploaded in between
+                sweep_interval = self.settings.get("alert_sweep_interval", DEFAULT_SWEEP_INTERVAL)
+                if sweep_interval and time.time() - last_sweep >= sweep_interval:
+                    last_sweep = time.time()
+                    self.send_alert_notifications(check_all_alerts(self.alert_trigger_state, self.alert_watermarks, all_alerts))
+            target = self.alert_scheduler.next_due(timeout=30)
+            if target is None:
+                continue
+            
+            item_id, source = target
+            market_data = None
+            try:
+                alerts = targets.get(target, [])
+                triggered_alerts, market_data = check_target(item_id, source, alerts, self.alert_trigger_state, self.alert_watermarks)
+                self.alert_trigger_state.save()
+                self.alert_watermarks.save()
+                self.send_alert_notifications(triggered_alerts)
+            except Exception as e:
+                print(f"Error checking alerts for item {item_id} in {source}: {e}")
+            finally:
+                self.alert_scheduler.reschedule(target, market_data)
+
+    def send_alert_notifications(self, triggered_alerts):
+        """
+        Queue notifications for triggered alerts on every notification sink.
+        
+        Args:
+            triggered_alerts (list): List of triggered alerts
+        """
+        for alert in triggered_alerts:
+            print(f"Triggering alert for {alert['item_name']} at {alert['pricePerUnit']} gil.")
+        self.notifier.notify_alerts(triggered_alerts)
 
-    def alerts_sleep(self, seconds):
+    def show_desktop_notification(self, title, message):
         """
-        Sleep for a specified number of seconds.
+        Show a desktop notification. Runs on the desktop notification sink's worker thread.
         
         Args:
-            seconds (int): The number of seconds to sleep
-        """
-        # Get the time now
-        start_time = time.time()
-        sleep_time = 1
-        loop_start_time = start_time
-        loop_end_time = loop_start_time
-        for i in range(seconds):
-            loop_start_time = time.time()
-            if not self.alerts_running:
-                break
-            sleep_time = min(1, sleep_time - (loop_end_time - loop_start_time))
-            # If remaining time is less than 1 second, sleep for remaining time
-            if(seconds - (loop_end_time - start_time) < 1):
-                sleep_time = seconds - (loop_end_time - start_time)
-            if sleep_time < 0:
-                sleep_time = 1
-            time.sleep(sleep_time)
-            loop_end_time = time.time()
-            # if we have exceeded the sleep time, break
-            if loop_end_time - start_time > seconds:
-                break
+            title (str): The notification title
+            message (str): The notification message
+        """
+        if check_os() == "Linux" or check_os() == "macOS":
+            # plyer is only needed once an alert triggers, it is loaded by the startup warm-up
+            from plyer import notification
+            notification.notify(
+                title=title,
+                message=message,
+                timeout=10,
+                app_name="PyFFUniverse",
+                toast=True
+            )
+        else:
+            toast = MyToastNotifier()
+            try:
+                toast.show_toast(
+                    title,
+                    message,
+                    duration=10
+                )
+            except TypeError as e:
+                pass
+
+    def update_notifier(self):
+        """
+        (Re)create the notification dispatcher from the current settings.
+        """
+        if hasattr(self, 'notifier'):
+            self.notifier.stop()
+        self.notifier = create_dispatcher_from_settings(load_settings(), desktop_notify=self.show_desktop_notification)
+
+    def get_notification_metrics(self):
+        """
+        Get delivery counters and latency per notification sink.
+        
+        Returns:
+            dict: Sink metrics by sink name
+        """
+        return self.notifier.get_metrics()
+
+    def get_alert_queue_state(self):
+        """
+        Get the state of the alert scheduler queue.
+        
+        Returns:
+            dict: The scheduler queue state
+        """
+        return self.alert_scheduler.get_queue_state()
         
     def create_search_frame(self, parent):
         """
@@ -294,6 +386,9 @@ class PyFFUniverseApp:
             
             self.update_loading_progress(100, get_text("app.loading", "Item data loaded successfully"), f"Loaded {len(itemDictionary)} items")
             
+            # The leaderboard ranks the loaded items, so it only starts once they are loaded
+            self.start_hot_items_leaderboard()
+            
             # Hide loading screen
             self.hide_loading_screen()
         except Exception as e:
@@ -460,28 +555,8 @@ class PyFFUniverseApp:
         # Update window title
         self.root.title(get_text("app.title", "PyFFUniverse"))
         
-        # Update labels
-        for widget in self.root.winfo_children():
-            self.update_widget_text(widget)
-    
-    def update_widget_text(self, widget):
-        """
-        Recursively update text in widgets
-        
-        Args:
-            widget: The widget to update
-        """
-        # Update text in labels, buttons, etc.
-        if hasattr(widget, 'cget') and hasattr(widget, 'config'):
-            if 'text' in widget.config():
-                # First check if widget has a translation key
-                if hasattr(widget, '_translation_key'):
-                    widget.config(text=get_text(widget._translation_key, widget._translation_default))
-        
-        # Recursively process child widgets
-        if hasattr(widget, 'winfo_children'):
-            for child in widget.winfo_children():
-                self.update_widget_text(child)
+        # Update the widgets created with translation support
+        update_translated_widgets()
     
     def on_dc_change(self, event):
         """
@@ -504,6 +579,7 @@ class PyFFUniverseApp:
             self.settings["data_center"] = dc
             self.settings["world"] = "All"  # Reset world to All when DC changes
             save_settings(self.settings)
+            self.start_hot_items_leaderboard()
         except Exception as e:
             messagebox.showerror(get_text("app.error", "Error"), f"Failed to load data center information: {e}")
     
@@ -518,6 +594,7 @@ class PyFFUniverseApp:
             # Save the world setting
             self.settings["world"] = self.world_var.get()
             save_settings(self.settings)
+            self.start_hot_items_leaderboard()
             
             # Refresh the item details if an item is selected
             selected_indices = self.item_listbox.curselection()
@@ -629,16 +706,20 @@ class PyFFUniverseApp:
             # Show loading message
             self.listings_listbox.insert(tk.END, "Loading market data...")
             self.root.update_idletasks()  # Update the UI to show loading message
-            check_all_alerts()
             
-            # Update the price history chart
-            self.update_price_history_chart(item_id, market_location)
+            # Update the price history chart, the market data fetched below refreshes its upload time
+            self.update_price_history_chart(item_id, market_location, refresh_upload=False)
             
             # Define a function to fetch market data in a separate thread
             def fetch_data():
                 try:
                     # Fetch market data
                     market_response = get_market_data(item_id, market_location)
+                    record_market_data(item_id, market_location, market_response)
+                    
+                    # Redraw the chart if someone uploaded since its history was fetched
+                    if get_chart_cache().record_upload(item_id, market_location, market_response.get("lastUploadTime")):
+                        self.root.after(0, lambda: self.refresh_price_history_chart(item_id, market_location))
                     
                     # Update the UI in the main thread
                     self.root.after(0, lambda: self.update_market_data(market_response, market_location))
@@ -652,16 +733,25 @@ class PyFFUniverseApp:
             self.listings_listbox.delete(0, tk.END)
             self.listings_listbox.insert(tk.END, f"Error fetching market data: {str(e)}")
 
-    def update_price_history_chart(self, item_id=None, market_location=None):
+    def update_price_history_chart(self, item_id=None, market_location=None, refresh_upload=True):
         """
         Update the price history chart for the given item and market location.
         If no item_id or market_location is provided, use the currently selected ones.
         
+        A chart drawn before from the same uploads is shown again from the chart
+        cache without fetching or rendering anything.
+        
         Args:
             item_id (int, optional): The ID of the item. If None, use current_item_id.
             market_location (str, optional): The world or data center name. If None, use current market location.
+            refresh_upload (bool, optional): Whether to look up the latest upload time in the background
+                after a cache hit, and redraw the chart if someone uploaded since
         """
         try:
+            # Matplotlib is not imported until the first chart, usually the startup warm-up has loaded it by now
+            from utils.graph_utils import create_price_history_graph, create_candlestick_graph, parse_price_history, get_time_range_days, create_chart_tooltip
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            
             # Use current item and market location if not provided
             if item_id is None:
                 item_id = self.current_item_id
@@ -692,32 +782,59 @@ class PyFFUniverseApp:
             # Convert time range to days
             days = get_time_range_days(time_range)
             
-            # Clear previous chart if it exists and destroy the widget
+            # Hide the previous chart, its widget is kept if the chart cache owns it
             if hasattr(self, 'chart_canvas_widget') and self.chart_canvas_widget.winfo_exists():
                 self.chart_canvas_widget.pack_forget()
-                self.chart_canvas_widget.destroy()
+                if not self.chart_canvas_cached:
+                    self.chart_canvas_widget.destroy()
                 
-            # Show loading message in chart placeholder
-            chart_placeholder.config(text=get_text("market.loading_chart", "Loading price history..."))
-            chart_placeholder.pack(fill=tk.BOTH, expand=True)
-            
-            # Update the UI to show the loading message
-            self.root.update_idletasks()
-            
-            # Fetch price history data
-            price_history_response = get_price_history(item_id, market_location, days)
-            
-            # Store the price history data for tooltip functionality
-            self.price_history_data = price_history_response
-            
-            # Create the price history graph
-            fig, chart_data = create_price_history_graph(
-                price_history_response, 
-                time_range, 
-                show_peaks=show_peaks, 
-                show_trend=show_trend, 
-                show_avg=show_avg
-            )
+            # Reuse the chart if it was drawn before from the same uploads. The upload time in the key
+            # is the latest one recorded by the market data and history fetches
+            chart_cache = get_chart_cache()
+            chart_type = self.market_frame["chart_type_var"].get()
+            chart_options = (get_language(), time_range, chart_type, show_peaks, show_trend, show_avg)
+            chart_key = chart_cache.make_key(item_id, market_location, *chart_options)
+            cached_chart = chart_cache.get(chart_key)
+            canvas = None
+            if cached_chart is not None:
+                # Restore the price history the cached chart was drawn from for tooltip functionality
+                fig, chart_data, self.price_history_data, canvas = cached_chart
+                if canvas is not None and not canvas.get_tk_widget().winfo_exists():
+                    canvas = None
+                if refresh_upload:
+                    self.refresh_chart_upload(item_id, market_location)
+            else:
+                # Show loading message in chart placeholder
+                chart_placeholder.config(text=get_text("market.loading_chart", "Loading price history..."))
+                chart_placeholder.pack(fill=tk.BOTH, expand=True)
+                
+                # Update the UI to show the loading message
+                self.root.update_idletasks()
+                
+                # Fetch price history data
+                price_history_response = get_price_history(item_id, market_location, days)
+                chart_cache.record_upload(item_id, market_location, price_history_response.get("lastUploadTime"))
+                
+                # Store the price history data for tooltip functionality
+                self.price_history_data = price_history_response
+                
+                # Parse the history once and keep the rollups up to date with it
+                history = parse_price_history(price_history_response)
+                rollups = update_rollups(item_id, market_location, history)
+                
+                # Create the price history graph
+                if chart_type == "candlestick":
+                    fig, chart_data = create_candlestick_graph(rollups, time_range)
+                else:
+                    fig, chart_data = create_price_history_graph(
+                        history, 
+                        time_range, 
+                        show_peaks=show_peaks, 
+                        show_trend=show_trend, 
+                        show_avg=show_avg
+                    )
+                # The history may have been uploaded after the upload time the key was built with
+                chart_key = chart_cache.make_key(item_id, market_location, *chart_options)
             
             # Store the chart data for interactive features
             self.chart_data = chart_data
@@ -726,9 +843,16 @@ class PyFFUniverseApp:
             chart_placeholder.config(text="")
             chart_placeholder.pack_forget()
             
-            # Create a new FigureCanvasTkAgg widget
-            self.figure_canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-            self.figure_canvas.draw()
+            # Draw the chart on a new FigureCanvasTkAgg widget unless its cached canvas is still there
+            if canvas is None:
+                canvas = FigureCanvasTkAgg(fig, master=chart_frame)
+                canvas.draw()
+                self.chart_canvas_cached = cached_chart is not None or "error" not in self.price_history_data
+                if self.chart_canvas_cached:
+                    chart_cache.put(chart_key, fig, chart_data, self.price_history_data, canvas)
+            else:
+                self.chart_canvas_cached = True
+            self.figure_canvas = canvas
             self.chart_canvas_widget = self.figure_canvas.get_tk_widget()
             self.chart_canvas_widget.pack(fill=tk.BOTH, expand=True)
             
@@ -740,8 +864,9 @@ class PyFFUniverseApp:
             
             # Set up event handlers for the chart options if not already done
             if not hasattr(self, "_chart_options_initialized"):
-                # Time range radio buttons
+                # Time range and chart type radio buttons
                 self.market_frame["time_range_var"].trace_add("write", lambda *args: self.update_price_history_chart())
+                self.market_frame["chart_type_var"].trace_add("write", lambda *args: self.update_price_history_chart())
                 
                 # Chart option checkboxes
                 self.market_frame["show_peaks_var"].trace_add("write", lambda *args: self.update_price_history_chart())
@@ -760,6 +885,32 @@ class PyFFUniverseApp:
             chart_placeholder.config(text=f"Error: {str(e)}")
             print(f"Error updating price history chart: {e}")
     
+    def refresh_chart_upload(self, item_id, market_location):
+        """
+        Look up the latest upload time of an item in the background and redraw its chart if it is newer.
+        
+        Args:
+            item_id (int): The ID of the item
+            market_location (str): The world or data center name
+        """
+        def fetch_upload_time():
+            result = get_aggregated_data([item_id], market_location).get(str(item_id)) or {}
+            if get_chart_cache().record_upload(item_id, market_location, get_last_upload_time(result)):
+                self.root.after(0, lambda: self.refresh_price_history_chart(item_id, market_location))
+        
+        threading.Thread(target=fetch_upload_time, daemon=True).start()
+    
+    def refresh_price_history_chart(self, item_id, market_location):
+        """
+        Redraw the price history chart if it still shows the given item.
+        
+        Args:
+            item_id (int): The ID of the item
+            market_location (str): The world or data center name
+        """
+        if self.current_item_id == item_id:
+            self.update_price_history_chart(item_id, market_location)
+    
     def on_chart_motion(self, event):
         """
         Handle mouse motion over the chart to show tooltips with price data.
@@ -943,7 +1094,271 @@ class PyFFUniverseApp:
             messagebox.showerror(get_text("app.error", "Error"), f"{get_text('app.error_arbitrage', 'An error occurred while checking for arbitrage opportunities:')} {str(e)}")
             self.arbitrage_info_var.config( text = get_text("app.error_arbitrage", "Error checking arbitrage opportunities."))
 
-    
+
+    def on_start_arbitrage_scan(self):
+        """
+        Handle start scan button click, scanning every item in the region on a background thread.
+        """
+        world = self.world_var.get()
+        if world == "All":
+            messagebox.showinfo(get_text("app.select_world", "Select World"), get_text("app.select_world_info", "Please select a specific world to check for arbitrage opportunities."))
+            return
+
+        region = get_data_center_topology()["dc_to_region"].get(self.dc_var.get())
+        if region is None:
+            messagebox.showerror(get_text("app.error", "Error"), get_text("errors.error_arbitrage", "Error checking arbitrage opportunities."))
+            return
+
+        self.scan_stop_event = threading.Event()
+        self.start_scan_button.config(state=tk.DISABLED)
+        self.stop_scan_button.config(state=tk.NORMAL)
+        self.scan_status_label.config(text=get_text("arbitrage.loading", "Checking for arbitrage opportunities..."))
+
+        scanner = ArbitrageScanner(region, world)
+        item_ids = [item[0] for item in itemDictionary]
+        threading.Thread(target=self.run_arbitrage_scan, args=(scanner, item_ids, self.scan_stop_event), daemon=True).start()
+
+    def run_arbitrage_scan(self, scanner, item_ids, stop_event):
+        """
+        Run an arbitrage scan, streaming progress back to the UI thread.
+
+        Args:
+            scanner (ArbitrageScanner): The scanner to run
+            item_ids (list): The item IDs to scan
+            stop_event (threading.Event): Event set when the scan should stop
+        """
+        def on_progress(scanned, total, results):
+            self.root.after(0, self.update_arbitrage_scan, scanned, total, results)
+
+        try:
+            scanner.run(item_ids, progress_callback=on_progress, stop_event=stop_event)
+        except Exception as e:
+            print(f"Error scanning for arbitrage opportunities: {e}")
+        finally:
+            self.root.after(0, self.finish_arbitrage_scan, stop_event.is_set())
+
+    def on_stop_arbitrage_scan(self):
+        """
+        Handle stop scan button click. The scan stops after its current round of requests.
+        """
+        if self.scan_stop_event is not None:
+            self.scan_stop_event.set()
+        self.stop_scan_button.config(state=tk.DISABLED)
+
+    def update_arbitrage_scan(self, scanned, total, results):
+        """
+        Show the progress and the ranked opportunities of a running scan.
+
+        Args:
+            scanned (int): The number of items scanned
+            total (int): The number of items to scan
+            results (list): The opportunities found so far, best first
+        """
+        self.scan_progress_var.set(scanned / total * 100 if total else 0)
+        self.scan_status_label.config(text=get_text("arbitrage.scan_progress", "Scanned {scanned} of {total} items, {found} opportunities found.").format(
+            scanned=f"{scanned:,}", total=f"{total:,}", found=len(results)))
+        self.display_arbitrage_results(results)
+
+    def finish_arbitrage_scan(self, stopped):
+        """
+        Reset the scanner controls once a scan ends.
+
+        Args:
+            stopped (bool): True if the scan was stopped before it finished
+        """
+        self.start_scan_button.config(state=tk.NORMAL)
+        self.stop_scan_button.config(state=tk.DISABLED)
+        if stopped:
+            self.scan_status_label.config(text=get_text("arbitrage.scan_stopped", "Scan stopped. Starting it again resumes where it left off."))
+        else:
+            self.scan_status_label.config(text=get_text("arbitrage.scan_complete", "Scan complete."))
+
+    def display_arbitrage_results(self, results):
+        """
+        Show ranked arbitrage opportunities in the scanner listbox.
+
+        Args:
+            results (list): The opportunities, best first
+        """
+        item_names = dict(itemDictionary)
+        self.scan_results_listbox.delete(0, tk.END)
+        for result in results:
+            name = item_names.get(result["item_id"], str(result["item_id"]))
+            if result["hq"]:
+                name = f"{name} ({get_text('market.hq', 'HQ')})"
+            self.scan_results_listbox.insert(tk.END, get_text("arbitrage.scan_result_format", "{name}: buy on {buy_world} for {buy_price} gil, sell on {sell_world} for {sell_price} gil. Profit {profit} gil ({percentage}), {velocity} sales/day").format(
+                name=name,
+                buy_world=result["lowest_price_world"],
+                buy_price=f"{result['lowest_price']:,}",
+                sell_world=result["current_world"],
+                sell_price=f"{result['current_price']:,}",
+                profit=f"{result['potential_profit']:,}",
+                percentage=f"{result['profit_percentage']:.1f}%",
+                velocity=f"{result['sale_velocity']:.1f}"))
+
+    def display_arbitrage_checkpoint(self):
+        """
+        Show the results of the last arbitrage scan, finished or not.
+        """
+        checkpoint = load_checkpoint()
+        if not checkpoint:
+            return
+        total = checkpoint.get("item_count", 0)
+        scanned = total if checkpoint.get("complete") else min(checkpoint.get("next_batch", 0) * MAX_ITEMS_PER_REQUEST, total)
+        self.update_arbitrage_scan(scanned, total, checkpoint.get("results", []))
+
+    def start_hot_items_leaderboard(self):
+        """
+        Show the cached hot items leaderboard for the current world or data center and refresh it in the background.
+        """
+        if not itemDictionary:
+            return
+        world = self.world_var.get()
+        location = self.dc_var.get() if world in ("", "All") else world
+        if self.hot_items_leaderboard is not None:
+            if self.hot_items_leaderboard.location == location:
+                return
+            self.hot_items_leaderboard.stop()
+
+        self.hot_items_leaderboard = HotItemsLeaderboard(location)
+        self.display_hot_items()
+        item_ids = [item[0] for item in itemDictionary]
+        self.hot_items_leaderboard.start(item_ids, on_update=lambda leaderboard: self.root.after(0, self.display_hot_items, leaderboard))
+
+    def display_hot_items(self, leaderboard=None):
+        """
+        Show the hot items leaderboard.
+
+        Args:
+            leaderboard (HotItemsLeaderboard, optional): The leaderboard that was refreshed
+        """
+        if self.hot_items_leaderboard is None or (leaderboard is not None and leaderboard is not self.hot_items_leaderboard):
+            return
+        leaderboard = self.hot_items_leaderboard
+
+        item_names = dict(itemDictionary)
+        self.hot_items_listbox.delete(0, tk.END)
+        for rank, entry in enumerate(leaderboard.get_leaderboard(self.hot_items_rank_var.get()), start=1):
+            self.hot_items_listbox.insert(tk.END, get_text("hot_items.leaderboard_format", "{rank}. {name} | {velocity} sales/day | avg. {price} gil | {volume} gil/day").format(
+                rank=rank,
+                name=item_names.get(entry["item_id"], str(entry["item_id"])),
+                velocity=f"{entry['velocity']:.1f}",
+                price=f"{entry['average_price']:,.0f}",
+                volume=f"{entry['gil_volume']:,.0f}"))
+
+        if leaderboard.updated_at:
+            updated = datetime.datetime.fromtimestamp(leaderboard.updated_at).strftime("%Y-%m-%d %H:%M")
+            self.hot_items_status_label.config(text=get_text("hot_items.leaderboard_status", "{location}: {count} items tracked, last updated {time}").format(
+                location=leaderboard.location, count=f"{len(leaderboard.stats):,}", time=updated))
+        else:
+            self.hot_items_status_label.config(text=get_text("hot_items.leaderboard_loading", "Collecting market statistics for {location}...").format(location=leaderboard.location))
+
+    def on_optimize_shopping_list(self):
+        """
+        Handle optimize button click, planning the shopping list across the region on a background thread.
+        """
+        item_ids = {str(item[0]): item[0] for item in itemDictionary}
+        item_names = {str(item[1]).lower(): item[0] for item in itemDictionary}
+
+        # Each line is "<item name or ID>, <quantity>", the quantity defaults to 1
+        shopping_list = {}
+        unknown = []
+        for line in self.shopping_input_text.get("1.0", tk.END).splitlines():
+            if not line.strip():
+                continue
+            name, _, quantity = line.rpartition(",")
+            if not name:
+                name, quantity = quantity, "1"
+            name = name.strip()
+            item_id = item_ids.get(name, item_names.get(name.lower()))
+            try:
+                quantity = int(quantity.strip())
+            except ValueError:
+                item_id = None
+            if item_id is None:
+                unknown.append(line.strip())
+                continue
+            shopping_list[item_id] = shopping_list.get(item_id, 0) + quantity
+
+        if unknown:
+            messagebox.showwarning(get_text("app.error", "Error"), get_text("shopping.unknown_items", "These lines could not be read:") + "\n" + "\n".join(unknown))
+            return
+        if not shopping_list:
+            return
+
+        try:
+            travel_penalty = float(self.travel_penalty_var.get().strip() or 0)
+            max_worlds = int(self.max_worlds_var.get().strip()) if self.max_worlds_var.get().strip() else None
+        except ValueError:
+            messagebox.showwarning(get_text("app.error", "Error"), get_text("shopping.invalid_settings", "The travel penalty and max worlds must be numbers."))
+            return
+
+        region = get_data_center_topology()["dc_to_region"].get(self.dc_var.get())
+        if region is None:
+            messagebox.showerror(get_text("app.error", "Error"), get_text("errors.load_error", "Failed to load data"))
+            return
+        world = self.world_var.get()
+        home_world = world if world not in ("", "All") else None
+
+        self.optimize_shopping_button.config(state=tk.DISABLED)
+        self.shopping_status_label.config(text=get_text("shopping.optimizing", "Fetching listings and optimizing..."))
+        threading.Thread(target=self.run_shopping_list_optimizer, args=(shopping_list, region, travel_penalty, max_worlds, home_world), daemon=True).start()
+
+    def run_shopping_list_optimizer(self, shopping_list, region, travel_penalty, max_worlds, home_world):
+        """
+        Fetch the listings of a shopping list and optimize it, posting the plan back to the UI thread.
+
+        Args:
+            shopping_list (dict): Quantities by item ID
+            region (str): The region to buy in
+            travel_penalty (float): The cost in gil of visiting a world
+            max_worlds (int): The maximum number of worlds to visit, or None
+            home_world (str): The world the player is on, or None
+        """
+        plan = None
+        try:
+            fetch_shopping_listings(list(shopping_list), region)
+            plan = optimize_shopping_list(shopping_list, region, travel_penalty, max_worlds, home_world)
+        except Exception as e:
+            print(f"Error optimizing shopping list: {e}")
+        finally:
+            self.root.after(0, self.display_shopping_plan, plan)
+
+    def display_shopping_plan(self, plan):
+        """
+        Show a shopping plan grouped by world.
+
+        Args:
+            plan (dict): The result of optimize_shopping_list, or None if it failed
+        """
+        self.optimize_shopping_button.config(state=tk.NORMAL)
+        self.shopping_results_listbox.delete(0, tk.END)
+        if plan is None:
+            self.shopping_status_label.config(text=get_text("errors.market_error", "Failed to load market data"))
+            return
+
+        item_names = dict(itemDictionary)
+        for world, entry in plan["worlds"].items():
+            self.shopping_results_listbox.insert(tk.END, get_text("shopping.world_header", "{world}: {cost} gil").format(world=world, cost=f"{entry['cost']:,}"))
+            for purchase in entry["purchases"]:
+                name = item_names.get(purchase["item_id"], str(purchase["item_id"]))
+                if purchase["hq"]:
+                    name = f"{name} ({get_text('market.hq', 'HQ')})"
+                self.shopping_results_listbox.insert(tk.END, get_text("shopping.purchase_format", "    {quantity}x {name} at {price} gil from {retainer} ({total} gil)").format(
+                    quantity=purchase["quantity"],
+                    name=name,
+                    price=f"{purchase['pricePerUnit']:,}",
+                    retainer=purchase["retainerName"] or "?",
+                    total=f"{purchase['total']:,}"))
+
+        for item_id, item in plan["items"].items():
+            if item["shortfall"]:
+                self.shopping_results_listbox.insert(tk.END, get_text("shopping.shortfall", "Not enough listings for {name}: {shortfall} of {quantity} missing").format(
+                    name=item_names.get(item_id, str(item_id)), shortfall=item["shortfall"], quantity=item["quantity"]))
+
+        self.shopping_status_label.config(text=get_text("shopping.total", "Total: {total} gil on {worlds} worlds, travel penalty {travel} gil").format(
+            total=f"{plan['total_cost']:,}", worlds=len(plan["worlds"]), travel=f"{plan['travel_cost']:,.0f}"))
+
     def on_set_alert(self):
         """
         Handle set alert button click.
@@ -1172,9 +1587,18 @@ class PyFFUniverseApp:
         """
         # Stop the alerts monitor
         self.alerts_running = False
+        self.alert_scheduler.stop()
+        if self.scan_stop_event is not None:
+            self.scan_stop_event.set()
+        # Let the leaderboard finish saving its stats before the window goes away
+        if self.hot_items_leaderboard is not None:
+            self.hot_items_leaderboard.stop(timeout=2)
+        self.notifier.stop()
+        stop_delivery_queue()
 
-        # Close all matplotlib figures
-        plt.close('all')
+        # Close all matplotlib figures, if a chart was ever drawn
+        if "matplotlib.pyplot" in sys.modules:
+            sys.modules["matplotlib.pyplot"].close('all')
         
         # Destroy the root window
         self.root.destroy()
@@ -1251,6 +1675,7 @@ class PyFFUniverseApp:
         """
         # Save the webhook URL
         save_discord_settings(webhook_url)
+        self.update_notifier()
         
         # Show success message
         messagebox.showinfo(get_text("app.settings_saved", "Settings Saved"), get_text("app.discord_settings_saved", "Discord webhook settings have been saved."))
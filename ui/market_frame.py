@@ -108,6 +108,16 @@ def create_market_frame(notebook):
         create_radiobutton(time_frame, f"market.{['24_hours', '7_days', '30_days', '90_days', 'all_time'][i]}", range_text, 
                          variable=time_range_var, value=range_text).pack(anchor="w", padx=10, pady=2)
     
+    # Chart type selection
+    chart_type_frame = create_labelframe(controls_frame, "market.chart_type", "Chart Type")
+    chart_type_frame.pack(fill=tk.X, pady=5)
+    
+    chart_type_var = tk.StringVar(value="line")
+    create_radiobutton(chart_type_frame, "market.line_chart", "Sales", 
+                     variable=chart_type_var, value="line").pack(anchor="w", padx=10, pady=2)
+    create_radiobutton(chart_type_frame, "market.candlestick_chart", "Candlestick", 
+                     variable=chart_type_var, value="candlestick").pack(anchor="w", padx=10, pady=2)
+    
     # Chart options
     options_frame = create_labelframe(controls_frame, "market.chart_options", "Chart Options")
     options_frame.pack(fill=tk.X, pady=10)
@@ -179,6 +189,124 @@ def create_market_frame(notebook):
     # Delete alert button
     all_delete_alert_button = create_button(all_alerts_frame, "alerts.delete_alert", "Delete Selected Alert")
     all_delete_alert_button.pack(anchor="e", pady=(5, 0))    
+
+    # Hot Items TAB
+    hot_items_frame = ttk.Frame(notebook)
+    notebook.add(hot_items_frame, text=get_text("hot_items.leaderboard", "Hot Items"))
+
+    # Title and description
+    title_label = create_label(hot_items_frame, "hot_items.leaderboard", "Hot Items", font=("Arial", 12, "bold"))
+    title_label.pack(anchor="w", pady=(0, 10))
+    
+    description_label = create_label(hot_items_frame, "hot_items.leaderboard_description", "The items selling the most on your world or data center, refreshed in the background.")
+    description_label.pack(anchor="w", pady=(0, 15))
+
+    # Ranking selection
+    hot_items_controls_frame = ttk.Frame(hot_items_frame)
+    hot_items_controls_frame.pack(fill=tk.X, pady=(0, 5))
+
+    create_label(hot_items_controls_frame, "hot_items.rank_by", "Rank by:").pack(side=tk.LEFT, padx=(0, 5))
+    hot_items_rank_var = tk.StringVar(value="velocity")
+    create_radiobutton(hot_items_controls_frame, "hot_items.by_velocity", "Sales per Day", variable=hot_items_rank_var, value="velocity").pack(side=tk.LEFT, padx=(0, 10))
+    create_radiobutton(hot_items_controls_frame, "hot_items.by_gil_volume", "Gil Volume", variable=hot_items_rank_var, value="gil_volume").pack(side=tk.LEFT, padx=(0, 10))
+
+    hot_items_status_label = ttk.Label(hot_items_frame, text="")
+    hot_items_status_label.pack(anchor="w", pady=(0, 5))
+
+    # Leaderboard listbox with scrollbar
+    hot_items_list_frame = ttk.Frame(hot_items_frame)
+    hot_items_list_frame.pack(fill=tk.BOTH, expand=True)
+
+    hot_items_listbox = tk.Listbox(hot_items_list_frame, font=("Courier New", 10))
+    hot_items_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    hot_items_scrollbar = ttk.Scrollbar(hot_items_list_frame, orient=tk.VERTICAL, command=hot_items_listbox.yview)
+    hot_items_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    hot_items_listbox.config(yscrollcommand=hot_items_scrollbar.set)
+
+    # Arbitrage Scanner TAB
+    arbitrage_scanner_frame = ttk.Frame(notebook)
+    notebook.add(arbitrage_scanner_frame, text=get_text("arbitrage.scanner", "Arbitrage Scanner"))
+
+    # Title and description
+    title_label = create_label(arbitrage_scanner_frame, "arbitrage.scanner", "Arbitrage Scanner", font=("Arial", 12, "bold"))
+    title_label.pack(anchor="w", pady=(0, 10))
+    
+    description_label = create_label(arbitrage_scanner_frame, "arbitrage.scanner_description", "Scan every marketable item in your region for worlds selling cheaper than your home world.")
+    description_label.pack(anchor="w", pady=(0, 15))
+
+    # Scan controls
+    scan_controls_frame = ttk.Frame(arbitrage_scanner_frame)
+    scan_controls_frame.pack(fill=tk.X, pady=(0, 5))
+
+    start_scan_button = create_button(scan_controls_frame, "arbitrage.start_scan", "Start Scan")
+    start_scan_button.pack(side=tk.LEFT, padx=(0, 5))
+
+    stop_scan_button = create_button(scan_controls_frame, "arbitrage.stop_scan", "Stop Scan", state=tk.DISABLED)
+    stop_scan_button.pack(side=tk.LEFT, padx=(0, 10))
+
+    scan_progress_var = tk.DoubleVar(value=0)
+    scan_progress_bar = ttk.Progressbar(scan_controls_frame, variable=scan_progress_var, maximum=100)
+    scan_progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+    scan_status_label = ttk.Label(arbitrage_scanner_frame, text="")
+    scan_status_label.pack(anchor="w", pady=(0, 5))
+
+    # Scan results listbox with scrollbar
+    scan_results_frame = ttk.Frame(arbitrage_scanner_frame)
+    scan_results_frame.pack(fill=tk.BOTH, expand=True)
+
+    scan_results_listbox = tk.Listbox(scan_results_frame, font=("Courier New", 10))
+    scan_results_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    scan_results_scrollbar = ttk.Scrollbar(scan_results_frame, orient=tk.VERTICAL, command=scan_results_listbox.yview)
+    scan_results_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    scan_results_listbox.config(yscrollcommand=scan_results_scrollbar.set)
+
+    # Shopping List TAB
+    shopping_list_frame = ttk.Frame(notebook)
+    notebook.add(shopping_list_frame, text=get_text("shopping.title", "Shopping List"))
+
+    # Title and description
+    title_label = create_label(shopping_list_frame, "shopping.title", "Shopping List", font=("Arial", 12, "bold"))
+    title_label.pack(anchor="w", pady=(0, 10))
+
+    description_label = create_label(shopping_list_frame, "shopping.description", "Find the cheapest listings across the worlds of your region for a list of items.")
+    description_label.pack(anchor="w", pady=(0, 5))
+
+    create_label(shopping_list_frame, "shopping.input_hint", "One item per line: item name or ID, quantity").pack(anchor="w", pady=(0, 5))
+
+    shopping_input_text = tk.Text(shopping_list_frame, height=6, font=("Courier New", 10))
+    shopping_input_text.pack(fill=tk.X, pady=(0, 5))
+
+    # Optimizer settings
+    shopping_controls_frame = ttk.Frame(shopping_list_frame)
+    shopping_controls_frame.pack(fill=tk.X, pady=(0, 5))
+
+    create_label(shopping_controls_frame, "shopping.travel_penalty", "Travel Penalty (gil per world):").pack(side=tk.LEFT, padx=(0, 5))
+    travel_penalty_var = tk.StringVar(value="0")
+    ttk.Entry(shopping_controls_frame, textvariable=travel_penalty_var, width=10).pack(side=tk.LEFT, padx=(0, 10))
+
+    create_label(shopping_controls_frame, "shopping.max_worlds", "Max Worlds:").pack(side=tk.LEFT, padx=(0, 5))
+    max_worlds_var = tk.StringVar()
+    ttk.Entry(shopping_controls_frame, textvariable=max_worlds_var, width=5).pack(side=tk.LEFT, padx=(0, 10))
+
+    optimize_shopping_button = create_button(shopping_controls_frame, "shopping.optimize", "Optimize")
+    optimize_shopping_button.pack(side=tk.LEFT)
+
+    shopping_status_label = ttk.Label(shopping_list_frame, text="")
+    shopping_status_label.pack(anchor="w", pady=(0, 5))
+
+    # Shopping plan listbox with scrollbar
+    shopping_results_frame = ttk.Frame(shopping_list_frame)
+    shopping_results_frame.pack(fill=tk.BOTH, expand=True)
+
+    shopping_results_listbox = tk.Listbox(shopping_results_frame, font=("Courier New", 10))
+    shopping_results_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    shopping_results_scrollbar = ttk.Scrollbar(shopping_results_frame, orient=tk.VERTICAL, command=shopping_results_listbox.yview)
+    shopping_results_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    shopping_results_listbox.config(yscrollcommand=shopping_results_scrollbar.set)
     
     # Return a dictionary with all the components
     return {
@@ -192,6 +320,7 @@ def create_market_frame(notebook):
         "active_alerts_listbox": active_alerts_listbox,
         "delete_alert_button": delete_alert_button,
         "time_range_var": time_range_var,
+        "chart_type_var": chart_type_var,
         "show_peaks_var": show_peaks_var,
         "show_trend_var": show_trend_var,
         "show_avg_var": show_avg_var,
@@ -200,5 +329,22 @@ def create_market_frame(notebook):
         "sale_history_listbox": sale_history_listbox,
         "all_alerts_frame": all_alerts_frame,
         "all_active_alerts_listbox": all_active_alerts_listbox,
-        "all_delete_alert_button": all_delete_alert_button
+        "all_delete_alert_button": all_delete_alert_button,
+        "hot_items_frame": hot_items_frame,
+        "hot_items_rank_var": hot_items_rank_var,
+        "hot_items_status_label": hot_items_status_label,
+        "hot_items_listbox": hot_items_listbox,
+        "arbitrage_scanner_frame": arbitrage_scanner_frame,
+        "start_scan_button": start_scan_button,
+        "stop_scan_button": stop_scan_button,
+        "scan_progress_var": scan_progress_var,
+        "scan_status_label": scan_status_label,
+        "scan_results_listbox": scan_results_listbox,
+        "shopping_list_frame": shopping_list_frame,
+        "shopping_input_text": shopping_input_text,
+        "travel_penalty_var": travel_penalty_var,
+        "max_worlds_var": max_worlds_var,
+        "optimize_shopping_button": optimize_shopping_button,
+        "shopping_status_label": shopping_status_label,
+        "shopping_results_listbox": shopping_results_listbox
     }
@@ -0,0 +1,164 @@
+import numpy as np
+from utils.alerts import get_alert_source, item_requires_hq
+
+class AlertBook:
+    """
+    Columnar view of all active alerts for vectorized threshold evaluation.
+
+    Each alert is one row in a set of NumPy arrays (item index, location index,
+    min price, max price, HQ flag). A whole cycle is evaluated against price
+    matrices of the lowest NQ and HQ prices per (item, location) with a handful
+    of array operations instead of a Python loop per alert.
+    """
+    def __init__(self, alerts, require_hq_lookup=item_requires_hq):
+        """
+        Build the alert book.
+
+        Args:
+            alerts (dict): Dictionary of alerts by item ID
+            require_hq_lookup (callable, optional): Function returning whether an item only considers HQ listings
+        """
+        self.item_ids = []
+        self.locations = []
+        self.item_index = {}
+        self.location_index = {}
+        self.alerts = []
+
+        item_idx = []
+        location_idx = []
+        min_prices = []
+        max_prices = []
+        require_hq = []
+        hq_by_item = {}
+        for item_id, item_alerts in alerts.items():
+            item_id = str(item_id)
+            for alert in item_alerts:
+                if not alert.get("active", True):
+                    continue
+                if item_id not in self.item_index:
+                    self.item_index[item_id] = len(self.item_ids)
+                    self.item_ids.append(item_id)
+                    hq_by_item[item_id] = require_hq_lookup(item_id)
+                source = get_alert_source(alert)
+                if source not in self.location_index:
+                    self.location_index[source] = len(self.locations)
+                    self.locations.append(source)
+
+                self.alerts.append(alert)
+                item_idx.append(self.item_index[item_id])
+                location_idx.append(self.location_index[source])
+                min_prices.append(alert.get("min_price", 0))
+                max_prices.append(alert.get("max_price", np.inf))
+                require_hq.append(hq_by_item[item_id])
+
+        self.item_idx = np.array(item_idx, dtype=np.int32)
+        self.location_idx = np.array(location_idx, dtype=np.int32)
+        self.min_price = np.array(min_prices, dtype=np.float64)
+        self.max_price = np.array(max_prices, dtype=np.float64)
+        self.require_hq = np.array(require_hq, dtype=bool)
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def empty_price_matrix(self):
+        """
+        Create price matrices for this book, with NaN meaning no listing.
+
+        Returns:
+            tuple: (nq_prices, hq_prices) arrays of shape (items, locations)
+        """
+        shape = (len(self.item_ids), len(self.locations))
+        return np.full(shape, np.nan), np.full(shape, np.nan)
+
+    def location_items(self):
+        """
+        Get the items watched in each location.
+
+        Returns:
+            dict: Dictionary mapping location names to lists of item IDs
+        """
+        pairs = np.unique(np.stack([self.location_idx, self.item_idx], axis=1), axis=0) if len(self) else []
+        location_items = {}
+        for location, item in pairs:
+            location_items.setdefault(self.locations[location], []).append(self.item_ids[item])
+        return location_items
+
+    def prices(self, nq_prices, hq_prices):
+        """
+        Get the price each alert compares against.
+
+        HQ-only items use the lowest HQ price, other items the lowest price of either quality.
+
+        Args:
+            nq_prices (numpy.ndarray): Lowest NQ price per (item, location), NaN if none
+            hq_prices (numpy.ndarray): Lowest HQ price per (item, location), NaN if none
+
+        Returns:
+            numpy.ndarray: Price per alert, NaN if there are no matching listings
+        """
+        nq = nq_prices[self.item_idx, self.location_idx]
+        hq = hq_prices[self.item_idx, self.location_idx]
+        return np.where(self.require_hq, hq, np.fmin(nq, hq))
+
+    def evaluate(self, nq_prices, hq_prices):
+        """
+        Evaluate every alert in one pass.
+
+        Args:
+            nq_prices (numpy.ndarray): Lowest NQ price per (item, location), NaN if none
+            hq_prices (numpy.ndarray): Lowest HQ price per (item, location), NaN if none
+
+        Returns:
+            numpy.ndarray: Indices of the triggered alerts
+        """
+        prices = self.prices(nq_prices, hq_prices)
+        # Comparisons with NaN are False, so alerts without listings never trigger
+        with np.errstate(invalid="ignore"):
+            triggered = (prices < self.min_price) | (prices > self.max_price)
+        return np.flatnonzero(triggered)
+
+    def triggered_alert(self, index, price):
+        """
+        Build the triggered alert dictionary for a row, in the format of evaluate_alert.
+
+        Args:
+            index (int): The alert index
+            price (float): The price the alert was evaluated against
+
+        Returns:
+            dict: The triggered alert
+        """
+        alert = self.alerts[index]
+        price = int(price)
+        over = price > self.max_price[index]
+        return {
+            "uuid": alert.get("uuid"),
+            "item_name": alert["item_name"],
+            "pricePerUnit": price,
+            "source": self.locations[self.location_idx[index]],
+            "direction": "over" if over else "under",
+            "targetPrice": alert["max_price"] if over else alert.get("min_price", 0)
+        }
+
+def get_min_listing_prices(aggregated_result):
+    """
+    Get the lowest NQ and HQ prices from an aggregated result.
+
+    The most specific scope in the result is used: world, then data center, then region.
+
+    Args:
+        aggregated_result (dict): An item's entry from get_aggregated_data
+
+    Returns:
+        tuple: (nq_price, hq_price), NaN where there is no listing
+    """
+    prices = []
+    for quality in ("nq", "hq"):
+        min_listing = (aggregated_result.get(quality) or {}).get("minListing") or {}
+        price = np.nan
+        for scope in ("world", "dc", "region"):
+            if min_listing.get(scope):
+                price = min_listing[scope].get("price", np.nan)
+                break
+        prices.append(price)
+    return tuple(prices)
@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.alerts import (ALERTS_FILE, DEFAULT_SWEEP_INTERVAL, load_alerts, group_alerts_by_target, check_target,
+                          check_all_alerts, format_alert_message)
+from utils.alert_state import ALERT_STATE_FILE, AlertTriggerState
+from utils.alert_watermarks import WATERMARKS_FILE, UploadWatermarks
+from utils.alert_scheduler import AlertScheduler, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL
+from utils.discord_webhook import DiscordDeliveryQueue
+from utils.notifiers import create_dispatcher_from_settings
+from utils.settings import SETTINGS_FILE, load_settings
+
+# Default number of worker threads checking alert targets
+DEFAULT_WORKERS = 8
+
+# Default number of seconds between health file updates
+DEFAULT_HEALTH_INTERVAL = 30
+
+# Default health file path
+HEALTH_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'alert_daemon_health.json')
+
+# Custom print function
+def daemon_print(text):
+    print(f"[Alert Daemon] {text}", flush=True)
+
+class AlertDaemon:
+    """
+    Headless alert monitor that runs without Tk or desktop notifications.
+
+    Targets are picked by an AlertScheduler and checked by a bounded pool of
+    worker threads. The alerts and settings files are watched for changes and
+    reloaded without restarting, and a health file with metrics is written
+    periodically. Every alert_sweep_interval seconds all alerts are also
+    checked at once over the aggregated endpoint, 100 items per request.
+    """
+    def __init__(self, alerts_file=ALERTS_FILE, settings_file=SETTINGS_FILE, workers=DEFAULT_WORKERS,
+                 health_file=HEALTH_FILE, health_interval=DEFAULT_HEALTH_INTERVAL, state_file=ALERT_STATE_FILE,
+                 watermarks_file=WATERMARKS_FILE):
+        self.alerts_file = alerts_file
+        self.settings_file = settings_file
+        self.trigger_state = AlertTriggerState(state_file)
+        self.watermarks = UploadWatermarks(watermarks_file)
+        self.discord_queue = DiscordDeliveryQueue()
+        self.notifier = None
+        self._sink_settings = None
+        self.workers = workers
+        self.health_file = health_file
+        self.health_interval = health_interval
+        self.running = False
+        self.settings = {}
+        self.alerts = {}
+        self.targets = {}
+        self.scheduler = None
+        self._reload_requested = threading.Event()
+        self._file_mtimes = {}
+        self._sweep = None
+        # At most one queued check per worker on top of the running ones
+        self._slots = threading.BoundedSemaphore(workers * 2)
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            "checks": 0,
+            "skipped": 0,
+            "errors": 0,
+            "triggered": 0,
+            "sweeps": 0,
+            "in_flight": 0,
+            "reloads": 0,
+            "last_check_duration": 0.0
+        }
+        self.started_at = None
+        self.last_reload = None
+
+    def run(self):
+        """
+        Run the daemon until stop() is called.
+        """
+        self.running = True
+        self.started_at = time.time()
+        self.reload()
+        daemon_print(f"Started with {len(self.targets)} targets and {self.workers} workers")
+
+        self.discord_queue.start()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="alert-worker")
+        last_health = 0
+        last_sweep = time.time()
+        try:
+            while self.running:
+                if self._reload_requested.is_set() or self._config_changed():
+                    self._reload_requested.clear()
+                    self.reload()
+
+                now = time.time()
+                if now - last_health >= self.health_interval:
+                    self.write_health()
+                    last_health = now
+
+                # Sweeps run next to the per-target checks, never more than one at a time
+                sweep_interval = self.settings.get("alert_sweep_interval", DEFAULT_SWEEP_INTERVAL)
+                if sweep_interval and now - last_sweep >= sweep_interval and (self._sweep is None or self._sweep.done()):
+                    self._sweep = executor.submit(self._sweep_alerts)
+                    last_sweep = now
+
+                # Wait for a free worker slot before taking a target from the scheduler
+                if not self._slots.acquire(timeout=1):
+                    continue
+                target = self.scheduler.next_due(timeout=1)
+                if target is None:
+                    self._slots.release()
+                    continue
+                with self._metrics_lock:
+                    self.metrics["in_flight"] += 1
+                executor.submit(self._check_target, target)
+        finally:
+            daemon_print("Stopping, waiting for running checks to finish")
+            executor.shutdown(wait=True)
+            if self.notifier is not None:
+                self.notifier.stop()
+            self.discord_queue.stop()
+            self.write_health()
+            daemon_print("Stopped")
+
+    def stop(self):
+        """
+        Stop the daemon. Safe to call from signal handlers.
+        """
+        self.running = False
+        if self.scheduler is not None:
+            self.scheduler.stop()
+
+    def request_reload(self):
+        """
+        Ask the daemon to reload its configuration on the next loop iteration.
+        """
+        self._reload_requested.set()
+
+    def reload(self):
+        """
+        Reload settings and alerts and update the scheduler.
+        """
+        self.settings = load_settings(self.settings_file)
+        # A failed read is not "no alerts", keep the last targets and their state until the file can be read
+        try:
+            alerts = load_alerts(self.alerts_file, raise_errors=True)
+            self.alerts = alerts
+            self.targets = group_alerts_by_target(alerts)
+        except Exception:
+            alerts = None
+        self.discord_queue.webhook_url = self.settings.get("discord_webhook_url", "")
+        sink_settings = tuple(self.settings.get(key) for key in ("discord_webhook_url", "notification_log_file", "notification_http_callback"))
+        if self.notifier is None or sink_settings != self._sink_settings:
+            old_notifier = self.notifier
+            self.notifier = create_dispatcher_from_settings(self.settings, discord_queue=self.discord_queue)
+            self._sink_settings = sink_settings
+            if old_notifier is not None:
+                old_notifier.stop()
+        self.trigger_state.apply_settings(self.settings)
+        if alerts is not None:
+            self.trigger_state.prune(alerts)
+            self.watermarks.set_targets(self.targets)
+        # After a failed read the file is reloaded again on the next check
+        self._file_mtimes = self._get_file_mtimes() if alerts is not None else {}
+
+        requests_per_minute = self.settings.get("alert_requests_per_minute", DEFAULT_REQUESTS_PER_MINUTE)
+        min_interval = self.settings.get("alert_min_interval", DEFAULT_MIN_INTERVAL)
+        max_interval = self.settings.get("alert_max_interval", DEFAULT_MAX_INTERVAL)
+        if self.scheduler is None:
+            self.scheduler = AlertScheduler(requests_per_minute, min_interval, max_interval)
+        else:
+            self.scheduler.requests_per_minute = requests_per_minute
+            self.scheduler.min_interval = min_interval
+            self.scheduler.max_interval = max_interval
+        self.scheduler.sync_targets(self.targets)
+
+        self.last_reload = time.time()
+        with self._metrics_lock:
+            self.metrics["reloads"] += 1
+        daemon_print(f"Loaded {sum(len(alerts) for alerts in self.targets.values())} alerts on {len(self.targets)} targets")
+
+    def write_health(self):
+        """
+        Write the health and metrics file. The file is replaced atomically so readers never see partial data.
+        """
+        if not self.health_file:
+            return
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        queue_state = self.scheduler.get_queue_state() if self.scheduler else {"targets": [], "tokens": 0}
+        states = [target["state"] for target in queue_state["targets"]]
+        now = time.time()
+        health = {
+            "pid": os.getpid(),
+            "running": self.running,
+            "started_at": self.started_at,
+            "updated_at": now,
+            "uptime": now - self.started_at if self.started_at else 0,
+            "last_reload": self.last_reload,
+            "alerts": sum(len(alerts) for alerts in self.targets.values()),
+            "targets": len(self.targets),
+            "workers": self.workers,
+            "metrics": metrics,
+            "notifications": self.notifier.get_metrics() if self.notifier else {},
+            "discord": self.discord_queue.get_stats(),
+            "queue": {
+                "tokens": queue_state["tokens"],
+                "ready": states.count("ready"),
+                "waiting": states.count("waiting"),
+                "checking": states.count("checking")
+            }
+        }
+        try:
+            temp_file = f"{self.health_file}.tmp"
+            with open(temp_file, "w") as f:
+                json.dump(health, f, indent=4)
+            os.replace(temp_file, self.health_file)
+        except Exception as e:
+            daemon_print(f"Error writing health file: {e}")
+
+    def _check_target(self, target):
+        item_id, source = target
+        market_data = None
+        start = time.time()
+        try:
+            alerts = self.targets.get(target, [])
+            triggered_alerts, market_data = check_target(item_id, source, alerts, self.trigger_state, self.watermarks)
+            self.trigger_state.save()
+            self.watermarks.save()
+            with self._metrics_lock:
+                self.metrics["checks" if market_data is not None else "skipped"] += 1
+                self.metrics["triggered"] += len(triggered_alerts)
+            self._notify(triggered_alerts)
+        except Exception as e:
+            daemon_print(f"Error checking alerts for item {item_id} in {source}: {e}")
+            with self._metrics_lock:
+                self.metrics["errors"] += 1
+        finally:
+            self.scheduler.reschedule(target, market_data)
+            with self._metrics_lock:
+                self.metrics["in_flight"] -= 1
+                self.metrics["last_check_duration"] = time.time() - start
+            self._slots.release()
+
+    def _sweep_alerts(self):
+        try:
+            # Targets evaluated here have their watermarks recorded, so their next scheduled check is skipped
+            # unless new listings were uploaded in between
+            triggered_alerts = check_all_alerts(self.trigger_state, self.watermarks, self.alerts)
+            with self._metrics_lock:
+                self.metrics["sweeps"] += 1
+                self.metrics["triggered"] += len(triggered_alerts)
+            self._notify(triggered_alerts)
+        except Exception as e:
+            daemon_print(f"Error sweeping alerts: {e}")
+            with self._metrics_lock:
+                self.metrics["errors"] += 1
+
+    def _notify(self, triggered_alerts):
+        for alert in triggered_alerts:
+            daemon_print(format_alert_message(alert))
+        # Sinks deliver on their own threads, so this never blocks evaluation
+        self.notifier.notify_alerts(triggered_alerts)
+
+    def _get_file_mtimes(self):
+        mtimes = {}
+        for path in (self.alerts_file, self.settings_file):
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _config_changed(self):
+        return self._get_file_mtimes() != self._file_mtimes
@@ -0,0 +1,283 @@
+import heapq
+import math
+import threading
+import time
+from utils.alerts import find_lowest_listing, item_requires_hq
+
+# Default limits for the adaptive alert scheduler
+DEFAULT_REQUESTS_PER_MINUTE = 30
+DEFAULT_MIN_INTERVAL = 60
+DEFAULT_MAX_INTERVAL = 3600
+
+# Relative distance to a threshold at which proximity counts for half
+PROXIMITY_HALF_DISTANCE = 0.05
+
+# Sales per day at which activity counts for half
+ACTIVITY_HALF_VELOCITY = 5.0
+
+def get_threshold_distance(price, alerts):
+    """
+    Get how far a price is from the nearest alert threshold, relative to that threshold.
+
+    Args:
+        price (int): The current lowest price, or None if unknown
+        alerts (list): The alerts watching the target
+
+    Returns:
+        float: 0.0 when an alert is already triggered, larger values the further away the price is
+    """
+    if price is None:
+        return None
+
+    distance = math.inf
+    for alert in alerts:
+        min_price = alert.get("min_price")
+        max_price = alert.get("max_price")
+        if min_price:
+            distance = min(distance, max(0.0, (price - min_price) / min_price))
+        if max_price:
+            distance = min(distance, max(0.0, (max_price - price) / max_price))
+    return distance
+
+def compute_check_score(market_data, alerts, price, now=None):
+    """
+    Score how likely a target is to fire on its next check.
+
+    The score combines the sale velocity and the age of the last upload (how
+    quickly the market is moving) with how close the price is to a threshold.
+
+    Args:
+        market_data (dict): The market data from the last check
+        alerts (list): The alerts watching the target
+        price (int): The current lowest price, or None if unknown
+        now (float, optional): The current time in seconds
+
+    Returns:
+        float: A score between 0.0 (unlikely to fire) and 1.0 (likely to fire)
+    """
+    if now is None:
+        now = time.time()
+    market_data = market_data or {}
+
+    # Sale velocity is in sales per day
+    velocity = market_data.get("regularSaleVelocity", 0) or 0
+    activity = velocity / (velocity + ACTIVITY_HALF_VELOCITY)
+
+    # lastUploadTime is in milliseconds
+    last_upload = market_data.get("lastUploadTime", 0) or 0
+    if last_upload:
+        age_hours = max(0.0, now - last_upload / 1000) / 3600
+        recency = 1 / (1 + age_hours)
+    else:
+        recency = 0.0
+
+    distance = get_threshold_distance(price, alerts)
+    if distance is None:
+        # No listings to compare against, assume a middling distance
+        proximity = 0.5
+    else:
+        proximity = PROXIMITY_HALF_DISTANCE / (PROXIMITY_HALF_DISTANCE + distance)
+
+    return proximity * (0.5 + 0.25 * activity + 0.25 * recency)
+
+class AlertScheduler:
+    """
+    Priority-queue scheduler that decides when each alert target is checked next.
+
+    Targets are (item_id, source) pairs as returned by group_alerts_by_target. Each
+    target's next check is set from its score, between min_interval and max_interval
+    seconds. When several targets are due at once, a global request budget is spent
+    on the ones with the highest score first.
+    """
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL):
+        self.requests_per_minute = requests_per_minute
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.running = True
+        self._condition = threading.Condition()
+        self._entries = {}
+        self._waiting = []  # (due time, sequence, key)
+        self._ready = []    # (-score, sequence, key)
+        self._sequence = 0
+        self._tokens = float(requests_per_minute)
+        self._last_refill = time.monotonic()
+
+    def sync_targets(self, targets):
+        """
+        Add new targets (due immediately) and drop targets that no longer have alerts.
+
+        Args:
+            targets (dict): Dictionary mapping (item_id, source) tuples to lists of alerts
+        """
+        with self._condition:
+            for key in list(self._entries):
+                if key not in targets:
+                    del self._entries[key]
+
+            for key, alerts in targets.items():
+                if key in self._entries:
+                    self._entries[key]["alerts"] = alerts
+                else:
+                    self._entries[key] = {
+                        "alerts": alerts,
+                        "score": 1.0,
+                        "interval": 0,
+                        "checks": 0,
+                        "last_checked": None
+                    }
+                    self._push(key, time.monotonic())
+            self._condition.notify_all()
+
+    def next_due(self, timeout=None):
+        """
+        Wait for the next target to check.
+
+        Args:
+            timeout (float, optional): The maximum number of seconds to wait
+
+        Returns:
+            tuple: The (item_id, source) key of the target, or None on timeout or shutdown
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self.running:
+                now = time.monotonic()
+                self._refill(now)
+                self._promote_due(now)
+
+                if self._ready and self._tokens >= 1:
+                    key = self._pop_ready()
+                    if key is not None:
+                        self._tokens -= 1
+                        return key
+                    continue
+
+                # Sleep until the budget refills, the next target is due or the timeout
+                if self._ready:
+                    wait = (1 - self._tokens) * 60 / self.requests_per_minute
+                elif self._waiting:
+                    wait = self._waiting[0][0] - now
+                else:
+                    wait = None
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+            return None
+
+    def reschedule(self, key, market_data=None):
+        """
+        Schedule a target's next check from the data of the check that just ran.
+
+        Args:
+            key (tuple): The (item_id, source) key of the target
+            market_data (dict, optional): The market data returned by the check, or None
+                if the check was skipped or failed
+        """
+        # The HQ flag may need an XIVAPI request, so the lowest price is found before taking the lock
+        price = None
+        if market_data:
+            listing = find_lowest_listing(market_data.get("listings"), item_requires_hq(key[0]))
+            if listing is not None:
+                price = listing["pricePerUnit"]
+
+        with self._condition:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+
+            if not market_data:
+                # The check was skipped because nothing changed or it failed, keep the previous score
+                score = entry["score"]
+            else:
+                score = compute_check_score(market_data, entry["alerts"], price)
+            # Interpolate on a log scale so that high scores shorten the interval quickly
+            interval = self.max_interval * (self.min_interval / self.max_interval) ** score
+
+            entry["score"] = score
+            entry["interval"] = interval
+            entry["checks"] += 1
+            entry["last_checked"] = time.time()
+            self._push(key, time.monotonic() + interval)
+            self._condition.notify_all()
+
+    def stop(self):
+        """
+        Stop the scheduler and wake up any thread waiting in next_due.
+        """
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+
+    def get_queue_state(self):
+        """
+        Get a snapshot of the scheduler queue.
+
+        Returns:
+            dict: The remaining request budget and a list of targets ordered by next check
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            ready = {key for _, sequence, key in self._ready if self._is_current(key, sequence)}
+            due_times = {key: due for due, sequence, key in self._waiting if self._is_current(key, sequence)}
+
+            targets = []
+            for key, entry in self._entries.items():
+                if key in ready:
+                    state, next_check = "ready", 0
+                elif key in due_times:
+                    state, next_check = "waiting", max(0, due_times[key] - now)
+                else:
+                    state, next_check = "checking", 0
+                targets.append({
+                    "item_id": key[0],
+                    "source": key[1],
+                    "state": state,
+                    "next_check": next_check,
+                    "interval": entry["interval"],
+                    "score": entry["score"],
+                    "checks": entry["checks"],
+                    "last_checked": entry["last_checked"],
+                    "alerts": len(entry["alerts"])
+                })
+            targets.sort(key=lambda target: (target["next_check"], -target["score"]))
+
+            return {
+                "running": self.running,
+                "tokens": self._tokens,
+                "requests_per_minute": self.requests_per_minute,
+                "targets": targets
+            }
+
+    def _push(self, key, due):
+        self._sequence += 1
+        self._entries[key]["sequence"] = self._sequence
+        heapq.heappush(self._waiting, (due, self._sequence, key))
+
+    def _is_current(self, key, sequence):
+        # Heap items are removed lazily, so skip items from an older schedule
+        entry = self._entries.get(key)
+        return entry is not None and entry.get("sequence") == sequence
+
+    def _promote_due(self, now):
+        while self._waiting and self._waiting[0][0] <= now:
+            _, sequence, key = heapq.heappop(self._waiting)
+            if self._is_current(key, sequence):
+                heapq.heappush(self._ready, (-self._entries[key]["score"], sequence, key))
+
+    def _pop_ready(self):
+        while self._ready:
+            _, sequence, key = heapq.heappop(self._ready)
+            if self._is_current(key, sequence):
+                self._entries[key]["sequence"] = None
+                return key
+        return None
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(float(self.requests_per_minute), self._tokens + elapsed * self.requests_per_minute / 60)
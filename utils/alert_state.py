@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+import time
+
+# Path to the alert trigger state file
+ALERT_STATE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'alert_state.json')
+
+# Default trigger settings
+DEFAULT_HYSTERESIS_PCT = 2.0
+DEFAULT_COOLDOWN_SECONDS = 3600
+DEFAULT_REFIRE_MOVE_PCT = 5.0
+
+class AlertTriggerState:
+    """
+    Per-alert trigger state so alerts fire on transitions instead of every check.
+
+    An armed alert fires when its price crosses a threshold and is then disarmed.
+    While disarmed it only fires again when the price moves a further
+    refire_move_pct past the last fired price and the cooldown has passed. It is
+    re-armed once the price moves back inside the threshold by hysteresis_pct.
+    """
+    def __init__(self, path=ALERT_STATE_FILE, hysteresis_pct=DEFAULT_HYSTERESIS_PCT,
+                 cooldown_seconds=DEFAULT_COOLDOWN_SECONDS, refire_move_pct=DEFAULT_REFIRE_MOVE_PCT):
+        self.path = path
+        self.hysteresis_pct = hysteresis_pct
+        self.cooldown_seconds = cooldown_seconds
+        self.refire_move_pct = refire_move_pct
+        self.states = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    @classmethod
+    def from_settings(cls, settings, path=ALERT_STATE_FILE):
+        """
+        Create the trigger state using the trigger settings from settings.json.
+
+        Args:
+            settings (dict): The user settings
+            path (str, optional): Path to the alert state file
+
+        Returns:
+            AlertTriggerState: The trigger state
+        """
+        trigger_state = cls(path)
+        trigger_state.apply_settings(settings)
+        return trigger_state
+
+    def apply_settings(self, settings):
+        """
+        Update the hysteresis, cooldown and re-fire settings.
+
+        Args:
+            settings (dict): The user settings
+        """
+        self.hysteresis_pct = settings.get("alert_hysteresis_pct", DEFAULT_HYSTERESIS_PCT)
+        self.cooldown_seconds = settings.get("alert_cooldown_seconds", DEFAULT_COOLDOWN_SECONDS)
+        self.refire_move_pct = settings.get("alert_refire_move_pct", DEFAULT_REFIRE_MOVE_PCT)
+
+    def load(self):
+        """
+        Load the trigger state from disk.
+        """
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    self.states = json.load(f)
+        except Exception as e:
+            print(f"Error loading alert state: {e}")
+            self.states = {}
+
+    def save(self):
+        """
+        Save the trigger state to disk if it changed since the last save.
+        """
+        # Saves from several workers are written one at a time, in the order their state was taken
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                states = json.dumps(self.states, indent=4)
+                self._dirty = False
+            try:
+                # Replace the file in one step, so a daemon killed mid-write keeps the last complete state
+                temp_file = f"{self.path}.tmp"
+                with open(temp_file, 'w') as f:
+                    f.write(states)
+                os.replace(temp_file, self.path)
+            except Exception as e:
+                print(f"Error saving alert state: {e}")
+
+    def prune(self, alerts):
+        """
+        Forget the state of alerts that no longer exist.
+
+        Args:
+            alerts (dict): Dictionary of alerts by item ID
+        """
+        uuids = {alert.get("uuid") for item_alerts in alerts.values() for alert in item_alerts}
+        with self._lock:
+            for uuid in list(self.states):
+                if uuid not in uuids:
+                    del self.states[uuid]
+                    self._dirty = True
+
+    def disarmed_uuids(self):
+        """
+        Get the IDs of alerts that fired and have not been re-armed yet.
+
+        Returns:
+            set: The disarmed alert UUIDs
+        """
+        with self._lock:
+            return {uuid for uuid, state in self.states.items() if not state.get("armed", True)}
+
+    def update(self, alert, price, triggered, now=None):
+        """
+        Update an alert's state with the latest price and decide whether to notify.
+
+        Args:
+            alert (dict): The alert data
+            price (int): The current lowest price
+            triggered (dict): The triggered alert from evaluate_alert, or None
+            now (float, optional): The current time in seconds
+
+        Returns:
+            bool: True if a notification should be sent
+        """
+        uuid = alert.get("uuid")
+        if uuid is None:
+            # Alerts without an ID cannot be tracked, keep the old behaviour
+            return triggered is not None
+        if now is None:
+            now = time.time()
+
+        with self._lock:
+            state = self.states.get(uuid, {"armed": True})
+
+            if triggered is None:
+                if not state["armed"] and self._is_rearmed(alert, state, price):
+                    self.states[uuid] = {"armed": True, "last_fired_price": state.get("last_fired_price"),
+                                         "last_fired_at": state.get("last_fired_at")}
+                    self._dirty = True
+                return False
+
+            if state["armed"]:
+                fire = True
+            else:
+                fire = (now - state.get("last_fired_at", 0) >= self.cooldown_seconds and
+                        self._moved_further(state, price, triggered["direction"]))
+
+            if fire:
+                self.states[uuid] = {
+                    "armed": False,
+                    "direction": triggered["direction"],
+                    "last_fired_price": price,
+                    "last_fired_at": now
+                }
+                self._dirty = True
+            return fire
+
+    def _moved_further(self, state, price, direction):
+        last_price = state.get("last_fired_price")
+        if not last_price or state.get("direction") != direction:
+            return True
+        move = self.refire_move_pct / 100
+        if direction == "under":
+            return price <= last_price * (1 - move)
+        return price >= last_price * (1 + move)
+
+    def _is_rearmed(self, alert, state, price):
+        hysteresis = self.hysteresis_pct / 100
+        if state.get("direction") == "under":
+            return price >= alert.get("min_price", 0) * (1 + hysteresis)
+        if state.get("direction") == "over" and "max_price" in alert:
+            return price <= alert["max_price"] * (1 - hysteresis)
+        return True
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from api.universalis import get_aggregated_data, get_last_upload_time
+from utils.alerts import AGGREGATED_BATCH_SIZE
+
+# Path to the upload watermarks file
+WATERMARKS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'alert_watermarks.json')
+
+# Number of seconds an upload signal from the aggregated endpoint is reused
+DEFAULT_SIGNAL_TTL = 60
+
+def get_alert_set_signature(alerts):
+    """
+    Get a signature of the alerts watching a target, it changes when any of them is added, removed or edited.
+
+    Args:
+        alerts (list): The alerts watching the target
+
+    Returns:
+        str: The signature
+    """
+    fields = sorted(f"{alert.get('uuid')}:{alert.get('min_price')}:{alert.get('max_price')}" for alert in alerts)
+    return hashlib.sha1("|".join(fields).encode("utf-8")).hexdigest()
+
+class UploadWatermarks:
+    """
+    Tracks the lastUploadTime each (item, location) target was last evaluated at.
+
+    Before a full listings fetch, the latest upload time for the target is taken
+    from the aggregated endpoint, which answers up to 100 items of a location in
+    one request. If nobody uploaded since the stored watermark the full fetch and
+    re-evaluation are skipped. A watermark only holds for the alerts it was
+    evaluated with, so it is dropped when the alerts on its target change.
+    """
+    def __init__(self, path=WATERMARKS_FILE, signal_ttl=DEFAULT_SIGNAL_TTL):
+        self.path = path
+        self.signal_ttl = signal_ttl
+        self.watermarks = {}
+        self.alert_sets = {}
+        self._signals = {}
+        self._location_items = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._location_locks = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """
+        Load the watermarks from disk.
+        """
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                # Older files only held the watermarks, not the alerts they were evaluated with, so they are dropped
+                self.watermarks = data.get("watermarks", {})
+                self.alert_sets = data.get("alert_sets", {})
+        except Exception as e:
+            print(f"Error loading upload watermarks: {e}")
+            self.watermarks = {}
+            self.alert_sets = {}
+
+    def save(self):
+        """
+        Save the watermarks to disk if they changed since the last save.
+        """
+        # Saves from several workers are written one at a time, in the order their watermarks were taken
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                watermarks = json.dumps({"watermarks": self.watermarks, "alert_sets": self.alert_sets}, indent=4)
+                self._dirty = False
+            try:
+                # Replace the file in one step, so a daemon killed mid-write keeps the last complete watermarks
+                temp_file = f"{self.path}.tmp"
+                with open(temp_file, 'w') as f:
+                    f.write(watermarks)
+                os.replace(temp_file, self.path)
+            except Exception as e:
+                print(f"Error saving upload watermarks: {e}")
+
+    def set_targets(self, targets):
+        """
+        Set the targets being watched so change signals can be fetched per location in bulk.
+
+        Watermarks of targets that are no longer watched are dropped, and so are
+        those of targets whose alerts were added, removed or edited, so new
+        alerts are evaluated without waiting for the next upload.
+
+        Args:
+            targets (dict): Dictionary mapping (item_id, source) tuples to lists of alerts
+        """
+        location_items = {}
+        alert_sets = {}
+        for (item_id, source), alerts in targets.items():
+            location_items.setdefault(source, []).append(str(item_id))
+            alert_sets[self._key(item_id, source)] = get_alert_set_signature(alerts)
+        with self._lock:
+            self._location_items = location_items
+            for key in list(self.watermarks):
+                if self.alert_sets.get(key) != alert_sets.get(key):
+                    del self.watermarks[key]
+                    self._dirty = True
+            if alert_sets != self.alert_sets:
+                self.alert_sets = alert_sets
+                self._dirty = True
+
+    def has_changed(self, item_id, location):
+        """
+        Check whether a target received an upload since it was last evaluated.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world or data center name
+
+        Returns:
+            bool: True if the target should be fetched and evaluated
+        """
+        with self._lock:
+            if self._key(item_id, location) not in self.watermarks:
+                return True
+        return self.is_newer(item_id, location, self.get_upload_signal(item_id, location))
+
+    def is_newer(self, item_id, location, upload_time):
+        """
+        Check whether an upload time is newer than a target's watermark.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world or data center name
+            upload_time (int): The upload time in milliseconds, 0 if unknown
+
+        Returns:
+            bool: True if the target should be evaluated
+        """
+        with self._lock:
+            watermark = self.watermarks.get(self._key(item_id, location))
+        # Without a watermark or an upload time we cannot tell, so fall back to a full check
+        return watermark is None or not upload_time or upload_time > watermark
+
+    def get_upload_signal(self, item_id, location):
+        """
+        Get the latest upload time for a target from the aggregated endpoint.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world or data center name
+
+        Returns:
+            int: The latest upload time in milliseconds, or 0 if unknown
+        """
+        key = self._key(item_id, location)
+        with self._lock:
+            location_lock = self._location_locks.setdefault(location, threading.Lock())
+
+        # Only one thread refreshes a location, the others reuse its result
+        with location_lock:
+            signal, fetched_at = self._signals.get(key, (0, 0))
+            if time.time() - fetched_at < self.signal_ttl:
+                return signal
+            self._refresh_signals(location, str(item_id))
+            return self._signals.get(key, (0, 0))[0]
+
+    def record(self, item_id, location, market_data):
+        """
+        Store the lastUploadTime of the market data a target was just evaluated with.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world or data center name
+            market_data (dict): The market data returned by the full fetch
+        """
+        last_upload = (market_data or {}).get("lastUploadTime")
+        if not last_upload:
+            return
+        with self._lock:
+            self.watermarks[self._key(item_id, location)] = last_upload
+            self._dirty = True
+
+    def _refresh_signals(self, location, item_id):
+        with self._lock:
+            item_ids = list(self._location_items.get(location, []))
+        if item_id not in item_ids:
+            item_ids.append(item_id)
+
+        now = time.time()
+        for start in range(0, len(item_ids), AGGREGATED_BATCH_SIZE):
+            batch = item_ids[start:start + AGGREGATED_BATCH_SIZE]
+            results = get_aggregated_data(batch, location)
+            for batch_item_id in batch:
+                result = results.get(batch_item_id)
+                signal = get_last_upload_time(result) if result else 0
+                self._signals[self._key(batch_item_id, location)] = (signal, now)
+
+    def _key(self, item_id, location):
+        return f"{item_id}|{location}"
@@ -2,28 +2,43 @@ import json
 import os
 import datetime
 import sys
+import time
 import uuid
-from api.universalis import get_market_data
-from api.xivapi import get_item_details
+from api.universalis import get_market_data, get_aggregated_data, get_last_upload_time
+from api.xivapi import get_item_details, get_items_can_be_hq, XIVAPI_PAGE_SIZE
 
 # Path to the alerts file
 ALERTS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'alerts.json')
 
-def load_alerts():
+# Maximum number of items per aggregated request
+AGGREGATED_BATCH_SIZE = 100
+
+# Default number of seconds between full sweeps of every alert over the aggregated endpoint
+DEFAULT_SWEEP_INTERVAL = 300
+
+def load_alerts(path=None, raise_errors=False):
     """
     Load alerts from the alerts.json file.
     
+    Args:
+        path (str, optional): Path to an alerts file to load instead of alerts.json
+        raise_errors (bool, optional): Raise if the file can't be read instead of returning no alerts,
+            for callers that would otherwise overwrite or forget the alerts
+    
     Returns:
         dict: Dictionary of alerts by item ID
     """
+    path = path or ALERTS_FILE
     try:
-        if os.path.exists(ALERTS_FILE):
-            with open(ALERTS_FILE, 'r') as f:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
                 return json.load(f)
         else:
             return {}
     except Exception as e:
         print(f"Error loading alerts: {e}")
+        if raise_errors:
+            raise
         return {}
 
 def save_alerts(alerts):
@@ -34,8 +49,11 @@ def save_alerts(alerts):
         alerts (dict): Dictionary of alerts by item ID
     """
     try:
-        with open(ALERTS_FILE, 'w') as f:
+        # Write a temporary file and swap it in, so readers never see a half written file
+        temp_path = f"{ALERTS_FILE}.tmp"
+        with open(temp_path, 'w') as f:
             json.dump(alerts, f, indent=4)
+        os.replace(temp_path, ALERTS_FILE)
     except Exception as e:
         print(f"Error saving alerts: {e}")
 
@@ -55,8 +73,8 @@ def set_alert(item_id, item_name, min_price=None, max_price=None, world=None, da
         bool: True if the alert was set successfully, False otherwise
     """
     try:
-        # Load existing alerts
-        alerts = load_alerts()
+        # Load existing alerts, a file that can't be read must not be overwritten
+        alerts = load_alerts(raise_errors=True)
         
         # Convert item_id to string for JSON compatibility
         item_id_str = str(item_id)
@@ -133,7 +151,7 @@ def delete_alert(item_id, alert_index, uuid=None):
         bool: True if the alert was deleted successfully, False otherwise
     """
     try:
-        alerts = load_alerts()
+        alerts = load_alerts(raise_errors=True)
         if uuid:
             for i, item in enumerate(alerts):
                 print(i, item)
@@ -192,61 +210,278 @@ def check_alerts(item_id, current_price):
         print(f"Error checking alerts: {e}")
         return []
 
-def check_all_alerts():
+def get_alert_source(alert):
+    """
+    Get the market location an alert is watching.
+    
+    Args:
+        alert (dict): The alert data
+        
+    Returns:
+        str: The world or data center name, or "all data centers and servers"
+    """
+    source = "All"
+    if alert.get("world"):
+        source = alert.get("world")
+    elif alert.get("data_center"):
+        source = alert.get("data_center")
+    if source == "All":
+        source = "all data centers and servers"
+    return source
+
+def group_alerts_by_target(alerts=None):
+    """
+    Group active alerts by the (item, location) pair they watch.
+    
+    Every alert on the same target is answered by the same market data request,
+    so targets are the unit the alert monitor schedules and fetches.
+    
+    Args:
+        alerts (dict, optional): Dictionary of alerts by item ID. Loaded from disk if not provided.
+        
+    Returns:
+        dict: Dictionary mapping (item_id, source) tuples to lists of alerts
+    """
+    if alerts is None:
+        alerts = load_alerts()
+    
+    targets = {}
+    for item_id, item_alerts in alerts.items():
+        for alert in item_alerts:
+            if not alert.get("active", True):
+                continue
+            key = (str(item_id), get_alert_source(alert))
+            targets.setdefault(key, []).append(alert)
+    return targets
+
+# Item details never change while the app is running, so remember the HQ flag per item
+_require_hq_cache = {}
+
+# Number of seconds a failed item details lookup is remembered before it is tried again
+REQUIRE_HQ_RETRY_SECONDS = 600
+
+# Time of the last failed item details lookup per item
+_require_hq_failures = {}
+
+def item_requires_hq(item_id):
+    """
+    Check whether alerts for an item should only consider HQ listings.
+    
+    Args:
+        item_id (int): The ID of the item
+        
+    Returns:
+        bool: True if the item can be HQ
+    """
+    item_id_str = str(item_id)
+    if item_id_str not in _require_hq_cache:
+        # Don't ask XIVAPI again for every check while it is failing
+        if time.time() - _require_hq_failures.get(item_id_str, 0) < REQUIRE_HQ_RETRY_SECONDS:
+            return False
+        item_details = get_item_details(item_id)
+        if item_details is None:
+            _require_hq_failures[item_id_str] = time.time()
+            return False
+        _require_hq_cache[item_id_str] = item_details.get("CanBeHq") == 1
+    return _require_hq_cache[item_id_str]
+
+def prefetch_require_hq(item_ids):
+    """
+    Look up the HQ flag of every item not cached yet, 100 items per request.
+    
+    Args:
+        item_ids (list): The item IDs
+    """
+    item_ids = [str(item_id) for item_id in item_ids if str(item_id) not in _require_hq_cache]
+    for start in range(0, len(item_ids), XIVAPI_PAGE_SIZE):
+        _require_hq_cache.update(get_items_can_be_hq(item_ids[start:start + XIVAPI_PAGE_SIZE]))
+
+def find_lowest_listing(listings, require_HQ=False):
+    """
+    Find the cheapest listing, optionally considering only HQ listings.
+    
+    Args:
+        listings (list): List of listings from the market data
+        require_HQ (bool, optional): Only consider HQ listings
+        
+    Returns:
+        dict: The cheapest listing, or None if there are no matching listings
+    """
+    listing_to_alert = None
+    l_price = sys.maxsize
+    for listing in listings or []:
+        if listing["pricePerUnit"] < l_price and (listing["hq"] or not require_HQ):
+            l_price = listing["pricePerUnit"]
+            listing_to_alert = listing
+    return listing_to_alert
+
+def evaluate_alert(alert, price, source):
+    """
+    Compare a price against an alert's thresholds.
+    
+    Args:
+        alert (dict): The alert data
+        price (int): The current lowest price
+        source (str): The location the price was taken from
+        
+    Returns:
+        dict: The triggered alert, or None if the price is within the thresholds
+    """
+    min_price = alert.get("min_price", 0)
+    max_price = alert.get("max_price", sys.maxsize)
+    if price >= min_price and price <= max_price:
+        return None
+    
+    return {
+        "uuid": alert.get("uuid"),
+        "item_name": alert["item_name"],
+        "pricePerUnit": price,
+        "source": source,
+        "direction": "over" if price > max_price else "under",
+        "targetPrice": max_price if price > max_price else min_price
+    }
+
+def format_alert_message(alert):
+    """
+    Format a triggered alert as a notification message.
+    
+    Args:
+        alert (dict): The triggered alert
+        
+    Returns:
+        str: The notification message
+    """
+    return f"{alert['item_name']} is now {alert['pricePerUnit']} gil in {alert['source']} which is {alert['direction']} your set threshold of {alert['targetPrice']} gil."
+
+def check_target(item_id, source, alerts, trigger_state=None, watermarks=None):
+    """
+    Check every alert watching one (item, location) target with a single request.
+    
+    Args:
+        item_id (int): The ID of the item
+        source (str): The world or data center name
+        alerts (list): The alerts watching this target
+        trigger_state (AlertTriggerState, optional): Trigger state used to only return
+            alerts that crossed their threshold or moved further past it
+        watermarks (UploadWatermarks, optional): Upload watermarks used to skip the
+            target when nothing was uploaded since it was last evaluated
+        
+    Returns:
+        tuple: (triggered_alerts, market_data) where market_data is the raw market response,
+            or None if the target was skipped
+    """
+    if watermarks is not None and not watermarks.has_changed(item_id, source):
+        return [], None
+    
+    market_data = get_market_data(item_id, source)
+    from utils.price_matrix import record_market_data
+    from utils.order_book import get_order_book
+    record_market_data(item_id, source, market_data)
+    
+    # The order book answers from its index, scanning the listings is only needed
+    # when it has no view of the location, e.g. when the topology could not be loaded
+    listing = None
+    if market_data.get("listings"):
+        require_HQ = item_requires_hq(item_id)
+        listing = (get_order_book().cheapest(item_id, source, require_HQ) or
+                   find_lowest_listing(market_data["listings"], require_HQ))
+    
+    triggered_alerts = []
+    if listing is not None:
+        for alert in alerts:
+            triggered = evaluate_alert(alert, listing["pricePerUnit"], source)
+            if trigger_state is not None:
+                if trigger_state.update(alert, listing["pricePerUnit"], triggered):
+                    triggered_alerts.append(triggered)
+            elif triggered is not None:
+                triggered_alerts.append(triggered)
+    
+    if watermarks is not None:
+        watermarks.record(item_id, source, market_data)
+    return triggered_alerts, market_data
+
+def check_all_alerts(trigger_state=None, watermarks=None, alerts=None):
     """
     Check all active alerts and return triggered alerts.
     
+    The lowest prices for every watched (item, location) pair are fetched from the
+    aggregated endpoint, 100 items per request, into the shared price matrix. All
+    alerts are then evaluated against it at once by an AlertBook.
+    
+    Args:
+        trigger_state (AlertTriggerState, optional): Trigger state used to only return
+            alerts that crossed their threshold or moved further past it
+        watermarks (UploadWatermarks, optional): Upload watermarks used to skip targets
+            that received no uploads since they were last evaluated
+        alerts (dict, optional): Dictionary of alerts by item ID. Loaded from disk if not provided.
+    
     Returns:
         list: List of triggered alerts
     """
     try:
-        alerts = load_alerts()
+        # numpy is only needed for full cycles, so don't load it with the rest of this module
+        from utils.alert_book import AlertBook, get_min_listing_prices
+        from utils.price_matrix import get_price_matrix
+        
+        if alerts is None:
+            alerts = load_alerts()
+        # Look the HQ flags up in bulk instead of one request per item while building the book
+        prefetch_require_hq(alerts.keys())
+        book = AlertBook(alerts)
+        if not len(book):
+            return []
+        
+        # Fetched prices go into the shared price matrix, the book is evaluated against
+        # the matrix cells that were refreshed in this cycle
+        price_matrix = get_price_matrix()
+        evaluated = []
+        for location, item_ids in book.location_items().items():
+            column = book.location_index[location]
+            for start in range(0, len(item_ids), AGGREGATED_BATCH_SIZE):
+                batch = item_ids[start:start + AGGREGATED_BATCH_SIZE]
+                results = get_aggregated_data(batch, location)
+                for item_id in batch:
+                    result = results.get(item_id)
+                    if result is None:
+                        continue
+                    nq_price, hq_price = get_min_listing_prices(result)
+                    price_matrix.update_prices(item_id, location, nq_price, hq_price)
+                    if watermarks is not None:
+                        last_upload = get_last_upload_time(result)
+                        if not watermarks.is_newer(item_id, location, last_upload):
+                            continue
+                        watermarks.record(item_id, location, {"lastUploadTime": last_upload})
+                    evaluated.append((book.item_index[item_id], column))
+        
+        nq_prices, hq_prices = book.empty_price_matrix()
+        if evaluated:
+            rows, columns = zip(*evaluated)
+            matrix_nq, matrix_hq = price_matrix.get_prices(book.item_ids, book.locations)
+            nq_prices[rows, columns] = matrix_nq[rows, columns]
+            hq_prices[rows, columns] = matrix_hq[rows, columns]
+        
+        prices = book.prices(nq_prices, hq_prices)
+        triggered_indices = book.evaluate(nq_prices, hq_prices)
+        
+        if trigger_state is None:
+            return [book.triggered_alert(index, prices[index]) for index in triggered_indices]
+        
+        # Only triggered alerts and disarmed alerts that may re-arm need their state updated
+        triggered_set = set(triggered_indices.tolist())
+        disarmed = trigger_state.disarmed_uuids()
+        candidates = triggered_set | {index for index, alert in enumerate(book.alerts) if alert.get("uuid") in disarmed}
+        
         triggered_alerts = []
+        for index in sorted(candidates):
+            if prices[index] != prices[index]:  # NaN, no listings
+                continue
+            triggered = book.triggered_alert(index, prices[index]) if index in triggered_set else None
+            if trigger_state.update(book.alerts[index], int(prices[index]), triggered):
+                triggered_alerts.append(triggered)
         
-        for item_id, alerts in alerts.items():
-            for alert in alerts:
-                if not alert.get("active", True):
-                    continue
-                
-                min_price = alert.get("min_price",0)
-                max_price = alert.get("max_price",sys.maxsize)
-                source = "All"
-                if alert.get("world"):
-                    source = alert.get("world")
-                elif alert.get("data_center"):
-                    source = alert.get("data_center")
-                if source == "All":
-                    source = "all data centers and servers"
-
-                #get prices from market data
-                market_data = get_market_data(item_id, source)
-                item_details = get_item_details(item_id)
-                
-                require_HQ = False
-                if item_details and "CanBeHq" in item_details:
-                    require_HQ = item_details["CanBeHq"] == 1 # require HQ if it can be HQ and is craftable
-                listings = market_data["listings"]
-                listing_to_alert = None
-                l_price = sys.maxsize
-                if listings is not None:
-                    for listing in listings:
-                        # find listing with lowest price.
-                        if listing["pricePerUnit"] < l_price:
-                            if require_HQ:
-                                if listing["hq"]:
-                                    l_price = listing["pricePerUnit"]
-                                    listing_to_alert = listing
-                            else:
-                                l_price = listing["pricePerUnit"]
-                                listing_to_alert = listing
-                if listing_to_alert is not None and (listing_to_alert["pricePerUnit"] < min_price or listing_to_alert["pricePerUnit"] > max_price):
-                    new_alert = {}
-                    new_alert["item_name"] = alert["item_name"]
-                    new_alert["pricePerUnit"] = listing_to_alert["pricePerUnit"]
-                    new_alert["source"] = source
-                    new_alert["direction"] = "over" if listing_to_alert["pricePerUnit"] > max_price else "under" if listing_to_alert["pricePerUnit"] < min_price else "the same as"
-                    new_alert["targetPrice"] = max_price if listing_to_alert["pricePerUnit"] > max_price else min_price if listing_to_alert["pricePerUnit"] < min_price else listing_to_alert["pricePerUnit"]
-                    triggered_alerts.append(new_alert)
+        trigger_state.save()
+        if watermarks is not None:
+            watermarks.save()
                     
         return triggered_alerts
     except Exception as e:
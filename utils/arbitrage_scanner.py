@@ -0,0 +1,192 @@
+import heapq
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from api.universalis import get_marketable_items, get_market_data_bulk, get_data_center_topology, MAX_ITEMS_PER_REQUEST
+from utils.market_analysis import custom_print
+from utils.price_matrix import get_price_matrix, get_location_worlds
+
+# Path to the arbitrage scan checkpoint file
+ARBITRAGE_CHECKPOINT_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'arbitrage_scan.json')
+
+# Number of opportunities kept by a scan
+DEFAULT_TOP_K = 100
+
+# Number of bulk requests in flight at once, Universalis allows 8 connections
+DEFAULT_SCAN_WORKERS = 4
+
+# Minimum price difference to the home world, the same 10% as find_arbitrage_opportunities
+MIN_PRICE_SPREAD = 0.1
+
+# Only the fields the scanner needs are requested to keep region responses small
+SCAN_FIELDS = ("items.listings.pricePerUnit,items.listings.worldName,items.listings.hq,"
+               "items.regularSaleVelocity,items.hqSaleVelocity")
+
+def load_checkpoint(path=ARBITRAGE_CHECKPOINT_FILE):
+    """
+    Load the last arbitrage scan checkpoint.
+
+    Args:
+        path (str, optional): Path to the checkpoint file
+
+    Returns:
+        dict: The checkpoint, or an empty dictionary if there is none
+    """
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Error loading arbitrage checkpoint: {e}")
+    return {}
+
+class ArbitrageScanner:
+    """
+    Scans every marketable item in a region for worlds that sell cheaper than the home world.
+
+    Items are requested 100 at a time from the region under the shared rate
+    limiter and recorded in a price matrix, which finds the items with a spread
+    to the home world for a whole round of requests at once. Only the top_k
+    opportunities by profit times sale velocity are kept, in a min-heap. Progress
+    is checkpointed after every round, so a stopped scan picks up where it left off.
+    """
+    def __init__(self, region, home_world, top_k=DEFAULT_TOP_K, workers=DEFAULT_SCAN_WORKERS,
+                 checkpoint_file=ARBITRAGE_CHECKPOINT_FILE, price_matrix=None):
+        self.region = region
+        self.home_world = home_world
+        self.top_k = top_k
+        self.workers = workers
+        self.checkpoint_file = checkpoint_file
+        self.price_matrix = price_matrix or get_price_matrix()
+        self._heap = []
+        self._world_to_dc = {}
+        self._region_worlds = None
+
+    def run(self, item_ids=None, progress_callback=None, stop_event=None, resume=True):
+        """
+        Run the scan until every item is checked or stop_event is set.
+
+        Args:
+            item_ids (list, optional): The item IDs to scan, all marketable items if None
+            progress_callback (callable, optional): Called after every round with the number
+                of items scanned, the total and the ranked opportunities so far
+            stop_event (threading.Event, optional): Set to stop the scan after the current round
+            resume (bool, optional): Continue from a matching unfinished checkpoint
+
+        Returns:
+            list: The opportunities found, best first
+        """
+        if item_ids is None:
+            item_ids = get_marketable_items()
+        item_ids = sorted(int(item_id) for item_id in item_ids)
+        batches = [item_ids[start:start + MAX_ITEMS_PER_REQUEST] for start in range(0, len(item_ids), MAX_ITEMS_PER_REQUEST)]
+        topology = get_data_center_topology()
+        self._world_to_dc = topology["world_to_dc"]
+        self._region_worlds = get_location_worlds(self.region, topology) or None
+
+        next_batch = self._restore(len(item_ids)) if resume else 0
+        if next_batch:
+            custom_print(f"Resuming arbitrage scan of {self.region} at item {min(next_batch * MAX_ITEMS_PER_REQUEST, len(item_ids))}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while next_batch < len(batches):
+                if stop_event is not None and stop_event.is_set():
+                    break
+
+                round_batches = batches[next_batch:next_batch + self.workers]
+                round_data = {}
+                for results in executor.map(self._fetch_batch, round_batches):
+                    round_data.update(results)
+                self._collect_opportunities(round_data)
+                next_batch += len(round_batches)
+
+                self._save_checkpoint(len(item_ids), next_batch, next_batch >= len(batches))
+                if progress_callback is not None:
+                    scanned = min(next_batch * MAX_ITEMS_PER_REQUEST, len(item_ids))
+                    progress_callback(scanned, len(item_ids), self.get_results())
+
+        return self.get_results()
+
+    def get_results(self):
+        """
+        Get the opportunities found so far.
+
+        Returns:
+            list: The opportunities, best first
+        """
+        return [opportunity for _, _, opportunity in sorted(self._heap, reverse=True)]
+
+    def _fetch_batch(self, batch):
+        return get_market_data_bulk(batch, self.region, fields=SCAN_FIELDS)
+
+    def _collect_opportunities(self, round_data):
+        for item_id, item_data in round_data.items():
+            self.price_matrix.update_market_data(item_id, self.region, item_data, self._region_worlds)
+
+        # Listings of either quality, then HQ listings only, keeping the better score per item
+        best = {}
+        for require_hq, velocity_key in ((False, "regularSaleVelocity"), (True, "hqSaleVelocity")):
+            spreads = self.price_matrix.find_spreads(self.home_world, MIN_PRICE_SPREAD, list(round_data),
+                                                     require_hq, self._region_worlds)
+            for spread in spreads:
+                item_id = spread["item_id"]
+                current_price = int(spread["current_price"])
+                lowest_price = int(spread["lowest_price"])
+                potential_profit = current_price - lowest_price
+                sale_velocity = round_data[item_id].get(velocity_key) or 0
+                score = potential_profit * sale_velocity
+                if item_id in best and best[item_id]["score"] >= score:
+                    continue
+                best[item_id] = {
+                    "item_id": int(item_id),
+                    "hq": require_hq,
+                    "current_world": self.home_world,
+                    "current_price": current_price,
+                    "lowest_price_world": spread["lowest_price_world"],
+                    "lowest_price_dc": self._world_to_dc.get(spread["lowest_price_world"]),
+                    "lowest_price": lowest_price,
+                    "potential_profit": potential_profit,
+                    "profit_percentage": (potential_profit / lowest_price) * 100,
+                    "sale_velocity": sale_velocity,
+                    "score": score
+                }
+
+        for opportunity in best.values():
+            self._push(opportunity)
+
+    def _push(self, opportunity):
+        entry = (opportunity["score"], opportunity["item_id"], opportunity)
+        if len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def _restore(self, item_count):
+        checkpoint = load_checkpoint(self.checkpoint_file)
+        if (checkpoint.get("complete", True) or checkpoint.get("region") != self.region or
+                checkpoint.get("home_world") != self.home_world or checkpoint.get("item_count") != item_count):
+            return 0
+        self._heap = []
+        for opportunity in checkpoint.get("results", []):
+            self._push(opportunity)
+        return checkpoint.get("next_batch", 0)
+
+    def _save_checkpoint(self, item_count, next_batch, complete):
+        checkpoint = {
+            "region": self.region,
+            "home_world": self.home_world,
+            "item_count": item_count,
+            "next_batch": next_batch,
+            "complete": complete,
+            "updated_at": time.time(),
+            "results": self.get_results()
+        }
+        try:
+            # Replace the checkpoint in one step, so a crash mid-write still leaves the previous one to resume from
+            temp_file = f"{self.checkpoint_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(checkpoint, f, indent=4)
+            os.replace(temp_file, self.checkpoint_file)
+        except Exception as e:
+            print(f"Error saving arbitrage checkpoint: {e}")
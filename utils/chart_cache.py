@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+# Memory the cached charts may use in bytes, most of it the rendered pixels
+DEFAULT_CHART_CACHE_BYTES = 64 * 1024 * 1024
+
+# Number of seconds a cached chart is shown before it is rendered again, time ranges are relative to now
+DEFAULT_CHART_MAX_AGE = 900
+
+# Bytes per rendered pixel, Agg renders RGBA
+BYTES_PER_PIXEL = 4
+
+def estimate_chart_size(fig, chart_data, canvas=None):
+    """
+    Estimate the memory used by a rendered chart.
+
+    Args:
+        fig: The Matplotlib figure
+        chart_data (dict): The chart data returned with the figure
+        canvas (FigureCanvasTkAgg, optional): The Tk canvas the chart is shown on, it holds another copy of the pixels
+
+    Returns:
+        int: The estimated size in bytes
+    """
+    size = int(fig.bbox.width * fig.bbox.height) * BYTES_PER_PIXEL * (2 if canvas is not None else 1)
+    for key in ("history", "candles"):
+        columns = chart_data.get(key) or {}
+        size += sum(values.nbytes for values in columns.values() if isinstance(values, np.ndarray))
+    return size
+
+class ChartCache:
+    """
+    Least recently used cache of rendered price history charts.
+
+    Charts are keyed by item, location, time range, chart options and the
+    upload time of the history they were drawn from. The latest upload time
+    seen for every item and location is remembered, so a chart can be looked
+    up before fetching anything, and a newer upload makes the cached charts
+    of that item miss. The least recently used charts are closed and dropped
+    once their estimated size exceeds max_bytes.
+
+    A chart can be cached with the Tk canvas it was drawn on, so showing it
+    again only packs the canvas. Charts with a canvas must only be put, looked
+    up and dropped on the Tk thread.
+    """
+    def __init__(self, max_bytes=DEFAULT_CHART_CACHE_BYTES, max_age=DEFAULT_CHART_MAX_AGE):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.total_bytes = 0
+        self._entries = OrderedDict()   # key -> (figure, chart_data, price_history, canvas, size, created)
+        self._watermarks = {}           # (item_id, location) -> lastUploadTime
+        self._lock = threading.Lock()
+
+    def get_watermark(self, item_id, location):
+        """
+        Get the latest upload time seen for an item.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world or data center name
+
+        Returns:
+            int: The lastUploadTime in milliseconds, or 0 if none was seen
+        """
+        with self._lock:
+            return self._watermarks.get((str(item_id), location), 0)
+
+    def record_upload(self, item_id, location, last_upload):
+        """
+        Remember the upload time of market or history data for an item.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world or data center name
+            last_upload (int): The lastUploadTime in milliseconds
+
+        Returns:
+            bool: True if it is newer than the upload time seen before
+        """
+        if not last_upload:
+            return False
+        key = (str(item_id), location)
+        with self._lock:
+            if last_upload <= self._watermarks.get(key, 0):
+                return False
+            self._watermarks[key] = last_upload
+            return True
+
+    def make_key(self, item_id, location, *options):
+        """
+        Build the cache key of a chart at the latest upload time seen.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world or data center name
+            *options: The time range, chart type and overlay flags the chart is drawn with
+
+        Returns:
+            tuple: The cache key
+        """
+        return (str(item_id), location) + tuple(options) + (self.get_watermark(item_id, location),)
+
+    def get(self, key):
+        """
+        Get a cached chart.
+
+        Args:
+            key (tuple): The key from make_key
+
+        Returns:
+            tuple: (figure, chart_data, price_history, canvas), or None if the chart is not cached or too old
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[5] > self.max_age:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1], entry[2], entry[3]
+
+    def put(self, key, fig, chart_data, price_history=None, canvas=None):
+        """
+        Cache a chart, evicting the least recently used ones over the size limit.
+
+        Args:
+            key (tuple): The key from make_key
+            fig: The Matplotlib figure
+            chart_data (dict): The chart data returned with the figure
+            price_history (dict, optional): The price history response the chart was drawn from
+            canvas (FigureCanvasTkAgg, optional): The Tk canvas the chart was drawn on
+        """
+        size = estimate_chart_size(fig, chart_data, canvas)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (fig, chart_data, price_history, canvas, size, time.time())
+            self.total_bytes += size
+            # The chart just added is the one on screen, it is never evicted
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self):
+        """
+        Close and drop every cached chart.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def _drop(self, key):
+        # Cached figures were drawn with pyplot, so it is loaded by the time one is dropped
+        import matplotlib.pyplot as plt
+        fig, _, _, canvas, size, _ = self._entries.pop(key)
+        self.total_bytes -= size
+        if canvas is not None:
+            canvas.get_tk_widget().destroy()
+        plt.close(fig)
+
+# Shared chart cache of the application
+_chart_cache = None
+_chart_cache_lock = threading.Lock()
+
+def get_chart_cache():
+    """
+    Get the shared chart cache.
+
+    Returns:
+        ChartCache: The shared chart cache
+    """
+    global _chart_cache
+    with _chart_cache_lock:
+        if _chart_cache is None:
+            _chart_cache = ChartCache()
+        return _chart_cache
@@ -0,0 +1,162 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from api.universalis import get_price_history_bulk, MAX_ITEMS_PER_REQUEST
+from utils.trend import PriceTrend, fit_peak_valley_trends, SECONDS_PER_DAY
+
+# Default folder the exported charts and summary are written to
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'chart_exports')
+
+# Name of the summary file written next to the charts
+SUMMARY_FILE = 'summary.json'
+
+# Image formats the charts can be saved in
+EXPORT_FORMATS = ("png", "svg")
+
+# Default number of processes rendering charts
+DEFAULT_EXPORT_WORKERS = max(1, min(8, (os.cpu_count() or 1)))
+
+# Resolution of the exported PNG charts
+EXPORT_DPI = 100
+
+def _init_export_worker(language):
+    # Every rendering process draws off screen, so Tk is never loaded
+    import matplotlib
+    matplotlib.use("Agg")
+    from utils.translations import set_language
+    set_language(language)
+
+def summarize_history(history):
+    """
+    Summarize the trend of parsed price history.
+
+    Args:
+        history (dict): The columns from graph_utils.parse_price_history, already limited to the time range
+
+    Returns:
+        dict: Dictionary with sales, last_price, last_sale (epoch seconds), the PriceTrend summary
+            and peak_tomorrow and valley_tomorrow, the peak and valley trend lines one day after the last sale
+    """
+    timestamps = history["timestamp"]
+    prices = history["price"].astype(float)
+    summary = {"sales": int(len(timestamps)), "last_price": None, "last_sale": None,
+               "peak_tomorrow": None, "valley_tomorrow": None}
+    summary.update(PriceTrend.from_history(history).get_summary())
+    if len(timestamps) == 0:
+        return summary
+
+    summary["last_price"] = float(prices[-1])
+    summary["last_sale"] = int(timestamps[-1])
+    days = timestamps / SECONDS_PER_DAY
+    tomorrow = days[-1] + 1
+    peak_line, valley_line = fit_peak_valley_trends(days, prices)
+    if peak_line is not None:
+        summary["peak_tomorrow"] = peak_line[0] * tomorrow + peak_line[1]
+    if valley_line is not None:
+        summary["valley_tomorrow"] = valley_line[0] * tomorrow + valley_line[1]
+    # NumPy scalars are not JSON serializable
+    return {key: float(value) if hasattr(value, "dtype") else value for key, value in summary.items()}
+
+def render_chart(item_id, item_name, location, history_data, days, formats, output_dir,
+                 show_peaks=True, show_trend=True, show_avg=True):
+    """
+    Render the price history chart of an item to files and summarize its trend.
+
+    Runs in an export process, see export_charts.
+
+    Args:
+        item_id (str): The ID of the item
+        item_name (str): The name shown in the chart title, the item ID if None
+        location (str): The world, data center or region name
+        history_data (dict): The price history data from Universalis API
+        days (int): Number of days shown, 0 for all time
+        formats (tuple): Image formats to save, see EXPORT_FORMATS
+        output_dir (str): The folder to write the charts to
+        show_peaks (bool, optional): Whether to show price peaks
+        show_trend (bool, optional): Whether to show price trend lines
+        show_avg (bool, optional): Whether to show the average price
+
+    Returns:
+        dict: The trend summary with item_id, item_name, location and the written files
+    """
+    import matplotlib.pyplot as plt
+    from utils.graph_utils import create_price_history_graph, parse_price_history, get_time_range_text
+    from utils.translations import get_text
+
+    history = parse_price_history(history_data)
+    fig, chart_data = create_price_history_graph(history, get_time_range_text(days), show_peaks, show_trend, show_avg)
+    try:
+        fig.axes[0].set_title(f"{get_text('market.price_history', 'Price History')} - {item_name or item_id} ({location})")
+        files = []
+        for image_format in formats:
+            path = os.path.join(output_dir, f"{item_id}_{location}.{image_format}")
+            fig.savefig(path, format=image_format, dpi=EXPORT_DPI)
+            files.append(os.path.basename(path))
+    finally:
+        plt.close(fig)
+
+    summary = {"item_id": int(item_id), "item_name": item_name, "location": location, "files": files}
+    summary.update(summarize_history(chart_data["history"]))
+    return summary
+
+def export_charts(targets, output_dir=EXPORT_DIR, days=7, formats=("png",), workers=DEFAULT_EXPORT_WORKERS,
+                  language="en", item_names=None):
+    """
+    Export the price history charts of items, with a JSON summary of their trends.
+
+    History is fetched 100 items per request. Every batch is handed to a pool
+    of processes rendering with the Agg backend as soon as it arrives, so
+    rendering runs on all cores while the next batch is fetched.
+
+    Args:
+        targets (dict): Item IDs to export by world, data center or region name
+        output_dir (str, optional): The folder to write the charts and summary to
+        days (int, optional): Number of days of history, 1, 7, 30, 90, or 0 for all time
+        formats (tuple, optional): Image formats to save, see EXPORT_FORMATS
+        workers (int, optional): Number of rendering processes
+        language (str, optional): Language code of the chart texts
+        item_names (dict, optional): Item names by item ID (as string) for the chart titles
+
+    Returns:
+        dict: The summary written to summary.json, with charts (one summary per chart) and missing
+            (item and location pairs without history)
+    """
+    item_names = {str(item_id): name for item_id, name in (item_names or {}).items()}
+    os.makedirs(output_dir, exist_ok=True)
+
+    futures = []
+    missing = []
+    with ProcessPoolExecutor(max_workers=max(1, workers), initializer=_init_export_worker,
+                             initargs=(language,)) as pool:
+        for location, items in targets.items():
+            item_ids = list(dict.fromkeys(str(item_id) for item_id in items))
+            for start in range(0, len(item_ids), MAX_ITEMS_PER_REQUEST):
+                batch = item_ids[start:start + MAX_ITEMS_PER_REQUEST]
+                histories = get_price_history_bulk(batch, location, days)
+                for item_id in batch:
+                    if item_id not in histories:
+                        missing.append({"item_id": int(item_id), "location": location})
+                        continue
+                    futures.append(pool.submit(render_chart, item_id, item_names.get(item_id), location,
+                                               histories[item_id], days, tuple(formats), output_dir))
+
+        charts = []
+        for future in futures:
+            try:
+                charts.append(future.result())
+            except Exception as e:
+                print(f"Error exporting chart: {e}")
+
+    summary = {
+        "generated_at": time.time(),
+        "days": days,
+        "charts": charts,
+        "missing": missing
+    }
+    try:
+        with open(os.path.join(output_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+    except Exception as e:
+        print(f"Error saving chart export summary: {e}")
+    return summary
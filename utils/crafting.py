@@ -0,0 +1,290 @@
+import json
+import os
+import threading
+import requests
+from api.universalis import get_aggregated_data, MAX_ITEMS_PER_REQUEST
+
+# Teamcraft recipe data, the same repository the item names come from
+RECIPES_URL = "https://raw.githubusercontent.com/ffxiv-teamcraft/ffxiv-teamcraft/master/libs/data/src/lib/json/recipes.json"
+
+# Path to the local recipe snapshot
+RECIPES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'recipes.json')
+
+def load_recipes(path=RECIPES_FILE, refresh=False):
+    """
+    Load the recipe data, downloading a local snapshot the first time.
+
+    Args:
+        path (str, optional): Path to the local recipe snapshot
+        refresh (bool, optional): Download the snapshot again even if it exists
+
+    Returns:
+        list: The recipes, each with result, yields and a list of ingredients
+    """
+    try:
+        if refresh or not os.path.exists(path):
+            response = requests.get(RECIPES_URL, timeout=60)
+            if response.status_code != 200:
+                raise Exception(f"Failed to fetch recipes: HTTP Status {response.status_code}")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(response.text)
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading recipes: {e}")
+        return []
+
+class CraftingTree:
+    """
+    Ingredient graph of every recipe with memoized buy-vs-craft costs.
+
+    The cost of an item is the lower of its market price and the cost of
+    crafting it, where crafting costs the cheapest way to get each ingredient.
+    Costs are memoized, so sub-components shared by many recipes are evaluated
+    once for the whole catalog. When a price changes only the item and the items
+    that use it, directly or further up, are evaluated again.
+    """
+    def __init__(self, recipes):
+        """
+        Build the ingredient graph.
+
+        Args:
+            recipes (list): Recipes as returned by load_recipes
+        """
+        self.recipes = {}   # item ID -> list of (yields, [(ingredient ID, amount)])
+        self.parents = {}   # ingredient ID -> set of item IDs crafted from it
+        self.prices = {}
+        self._costs = {}
+        self._lock = threading.RLock()
+
+        for recipe in recipes:
+            result = str(recipe.get("result"))
+            ingredients = [(str(ingredient["id"]), ingredient.get("amount", 1))
+                           for ingredient in recipe.get("ingredients", []) if ingredient.get("amount", 1) > 0]
+            if not ingredients:
+                continue
+            self.recipes.setdefault(result, []).append((recipe.get("yields", 1) or 1, ingredients))
+            for ingredient_id, _ in ingredients:
+                self.parents.setdefault(ingredient_id, set()).add(result)
+
+    def get_ingredient_ids(self):
+        """
+        Get every item that appears anywhere in the graph.
+
+        Returns:
+            set: The item IDs of all crafted items and ingredients
+        """
+        return set(self.recipes) | set(self.parents)
+
+    def get_component_ids(self, item_ids):
+        """
+        Get the items and every ingredient that can go into crafting them.
+
+        Args:
+            item_ids (list): The IDs of the items
+
+        Returns:
+            set: The item IDs, their ingredients and the ingredients' ingredients
+        """
+        components = set()
+        pending = [str(item_id) for item_id in item_ids]
+        while pending:
+            current = pending.pop()
+            if current in components:
+                continue
+            components.add(current)
+            for _, ingredients in self.recipes.get(current, []):
+                pending.extend(ingredient_id for ingredient_id, _ in ingredients)
+        return components
+
+    def set_price(self, item_id, price):
+        """
+        Set the market price of an item and invalidate the costs that depend on it.
+
+        Args:
+            item_id (int): The ID of the item
+            price (float): The lowest price per unit, or None if it cannot be bought
+
+        Returns:
+            set: The item IDs whose cost has to be evaluated again
+        """
+        item_id = str(item_id)
+        with self._lock:
+            if self.prices.get(item_id) == price:
+                return set()
+            self.prices[item_id] = price
+
+            # Only the item and its ancestors change, everything else stays memoized
+            invalidated = set()
+            pending = [item_id]
+            while pending:
+                current = pending.pop()
+                if current in invalidated:
+                    continue
+                invalidated.add(current)
+                self._costs.pop(current, None)
+                pending.extend(self.parents.get(current, ()))
+            return invalidated
+
+    def set_prices(self, prices):
+        """
+        Set the market prices of several items.
+
+        Args:
+            prices (dict): Prices by item ID
+
+        Returns:
+            set: The item IDs whose cost has to be evaluated again
+        """
+        invalidated = set()
+        for item_id, price in prices.items():
+            invalidated |= self.set_price(item_id, price)
+        return invalidated
+
+    def get_cost(self, item_id):
+        """
+        Get the cheapest way to get one unit of an item.
+
+        Args:
+            item_id (int): The ID of the item
+
+        Returns:
+            dict: Dictionary with buy_price, craft_cost, cost and action ("buy", "craft"
+                or None if the item can neither be bought nor crafted)
+        """
+        with self._lock:
+            return self._evaluate(str(item_id), set())
+
+    def evaluate_all(self):
+        """
+        Evaluate every craftable item, reusing the costs of shared sub-components.
+
+        Returns:
+            dict: Costs by item ID, as returned by get_cost
+        """
+        with self._lock:
+            return {item_id: self._evaluate(item_id, set()) for item_id in self.recipes}
+
+    def get_breakdown(self, item_id, amount=1):
+        """
+        Get the full buy-or-craft plan for an item.
+
+        Args:
+            item_id (int): The ID of the item
+            amount (float, optional): The number of units needed
+
+        Returns:
+            dict: The item's cost for the amount, with the plans of its ingredients
+                under "ingredients" when crafting is cheaper
+        """
+        with self._lock:
+            return self._breakdown(str(item_id), amount, set())
+
+    def find_craft_profits(self, limit=50):
+        """
+        Find the items that cost the least to craft compared to their market price.
+
+        Args:
+            limit (int, optional): The maximum number of items to return
+
+        Returns:
+            list: Dictionaries with item_id, buy_price, craft_cost and profit, highest profit first
+        """
+        profits = []
+        for item_id, cost in self.evaluate_all().items():
+            if cost["buy_price"] is not None and cost["craft_cost"] is not None:
+                profit = cost["buy_price"] - cost["craft_cost"]
+                if profit > 0:
+                    profits.append({"item_id": int(item_id), "buy_price": cost["buy_price"],
+                                    "craft_cost": cost["craft_cost"], "profit": profit})
+        profits.sort(key=lambda entry: entry["profit"], reverse=True)
+        return profits[:limit]
+
+    def _evaluate(self, item_id, visiting):
+        cost = self._costs.get(item_id)
+        if cost is not None:
+            return cost
+        if item_id in visiting:
+            # Recipe data has no loops, this only keeps bad data from recursing forever
+            return {"buy_price": None, "craft_cost": None, "cost": None, "action": None}
+
+        visiting.add(item_id)
+        craft_cost = None
+        for yields, ingredients in self.recipes.get(item_id, []):
+            total = 0
+            for ingredient_id, amount in ingredients:
+                ingredient_cost = self._evaluate(ingredient_id, visiting)["cost"]
+                if ingredient_cost is None:
+                    total = None
+                    break
+                total += ingredient_cost * amount
+            if total is not None and (craft_cost is None or total / yields < craft_cost):
+                craft_cost = total / yields
+        visiting.discard(item_id)
+
+        buy_price = self.prices.get(item_id)
+        if craft_cost is not None and (buy_price is None or craft_cost < buy_price):
+            cost = {"buy_price": buy_price, "craft_cost": craft_cost, "cost": craft_cost, "action": "craft"}
+        elif buy_price is not None:
+            cost = {"buy_price": buy_price, "craft_cost": craft_cost, "cost": buy_price, "action": "buy"}
+        else:
+            cost = {"buy_price": None, "craft_cost": None, "cost": None, "action": None}
+
+        self._costs[item_id] = cost
+        return cost
+
+    def _breakdown(self, item_id, amount, visiting):
+        cost = self._evaluate(item_id, set())
+        node = {
+            "item_id": int(item_id),
+            "amount": amount,
+            "action": cost["action"],
+            "unit_cost": cost["cost"],
+            "total_cost": None if cost["cost"] is None else cost["cost"] * amount
+        }
+        if cost["action"] != "craft" or item_id in visiting:
+            return node
+
+        # Use the recipe the craft cost came from
+        visiting = visiting | {item_id}
+        for yields, ingredients in self.recipes[item_id]:
+            costs = [self._evaluate(ingredient_id, set())["cost"] for ingredient_id, _ in ingredients]
+            if None in costs:
+                continue
+            if abs(sum(unit * needed for unit, (_, needed) in zip(costs, ingredients)) / yields - cost["craft_cost"]) < 1e-9:
+                node["ingredients"] = [self._breakdown(ingredient_id, needed * amount / yields, visiting)
+                                       for ingredient_id, needed in ingredients]
+                break
+        return node
+
+def fetch_ingredient_prices(tree, location, item_ids=None):
+    """
+    Update a crafting tree with the lowest listing prices of a world or data center.
+
+    Prices come from the aggregated endpoint, 100 items per request.
+
+    Args:
+        tree (CraftingTree): The crafting tree to update
+        location (str): The world or data center name
+        item_ids (list, optional): The items to price, every item in the tree if None
+
+    Returns:
+        set: The item IDs whose cost has to be evaluated again
+    """
+    # numpy is only needed once prices are fetched, so don't load it with the rest of this module
+    from utils.alert_book import get_min_listing_prices
+    from utils.price_matrix import get_price_matrix
+
+    item_ids = sorted(tree.get_ingredient_ids() if item_ids is None else {str(item_id) for item_id in item_ids}, key=int)
+    price_matrix = get_price_matrix()
+    invalidated = set()
+    for start in range(0, len(item_ids), MAX_ITEMS_PER_REQUEST):
+        batch = item_ids[start:start + MAX_ITEMS_PER_REQUEST]
+        results = get_aggregated_data(batch, location)
+        for item_id, result in results.items():
+            nq_price, hq_price = get_min_listing_prices(result)
+            price_matrix.update_prices(item_id, location, nq_price, hq_price)
+            # Either quality works as an ingredient, NaN means no listing
+            prices = [price for price in (nq_price, hq_price) if price == price]
+            invalidated |= tree.set_price(item_id, min(prices) if prices else None)
+    return invalidated
@@ -1,22 +1,56 @@
 import requests
 import json
 import os
+import threading
+import time
+from collections import deque
 
 # Path to the settings file
 SETTINGS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'settings.json')
 
+# Path to the file undeliverable Discord messages are spooled to
+DISCORD_SPOOL_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'discord_spool.json')
+
+# Path to the file messages rejected by Discord are kept in, they are never replayed
+DISCORD_DEAD_LETTER_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'discord_dead_letter.json')
+
+# Number of rate-limited responses a message may get before it is spooled
+MAX_RATE_LIMITED_RESPONSES = 10
+
+# Only one thread reads and writes a spool file at a time
+_spool_file_lock = threading.Lock()
+
+# Discord allows up to 10 embeds and 6000 characters of embed text per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARACTERS = 6000
+
+# Timeout in seconds for webhook requests
+WEBHOOK_TIMEOUT = 10
+
+# Cached webhook URL and the settings file modification time it was read at
+_settings_cache = {"mtime": None, "webhook_url": ""}
+
+# Shared session so webhook requests reuse pooled connections
+_session = requests.Session()
+
 def load_discord_settings():
     """
     Load Discord webhook settings from the settings file.
     
+    The settings file is only read again when it changed since the last call.
+    
     Returns:
         str: Discord webhook URL or None if not configured
     """
     try:
         if os.path.exists(SETTINGS_FILE):
-            with open(SETTINGS_FILE, 'r') as f:
-                settings = json.load(f)
-                return settings.get('discord_webhook_url', '')
+            mtime = os.stat(SETTINGS_FILE).st_mtime
+            if mtime != _settings_cache["mtime"]:
+                with open(SETTINGS_FILE, 'r') as f:
+                    settings = json.load(f)
+                _settings_cache["webhook_url"] = settings.get('discord_webhook_url', '')
+                _settings_cache["mtime"] = mtime
+            return _settings_cache["webhook_url"]
         return ''
     except Exception as e:
         print(f"Error loading Discord settings: {e}")
@@ -48,7 +82,25 @@ def save_discord_settings(webhook_url):
         print(f"Error saving Discord settings: {e}")
         return False
 
-def send_discord_alert(title, message, color=0xFF5733):
+def create_embed(title, message, color=0xFF5733):
+    """
+    Create a Discord embed.
+    
+    Args:
+        title (str): The embed title
+        message (str): The embed description
+        color (int, optional): The color of the embed. Defaults to orange.
+        
+    Returns:
+        dict: The embed
+    """
+    return {
+        "title": title,
+        "description": message,
+        "color": color
+    }
+
+def send_discord_alert(title, message, color=0xFF5733, webhook_url=None):
     """
     Send an alert to Discord via webhook.
     
@@ -56,35 +108,303 @@ def send_discord_alert(title, message, color=0xFF5733):
         title (str): The alert title
         message (str): The alert message
         color (int, optional): The color of the embed. Defaults to orange.
+        webhook_url (str, optional): The webhook URL to use instead of the one in settings.json
         
     Returns:
         bool: True if the alert was sent successfully, False otherwise
     """
-    webhook_url = load_discord_settings()
+    webhook_url = webhook_url or load_discord_settings()
     if not webhook_url:
         return False
     
     try:
-        # Create Discord embed
-        embed = {
-            "title": title,
-            "description": message,
-            "color": color
-        }
-        
         # Create payload
         payload = {
-            "embeds": [embed]
+            "embeds": [create_embed(title, message, color)]
         }
         
         # Send to Discord
-        response = requests.post(
+        response = _session.post(
             webhook_url,
             json=payload,
-            headers={"Content-Type": "application/json"}
+            headers={"Content-Type": "application/json"},
+            timeout=WEBHOOK_TIMEOUT
         )
         
         return response.status_code == 204
     except Exception as e:
         print(f"Error sending Discord alert: {e}")
         return False
+
+class DiscordDeliveryQueue:
+    """
+    Background delivery queue for Discord webhook alerts.
+    
+    Alerts are queued without blocking and sent by a worker thread that packs up
+    to 10 embeds into each webhook message, waits for Discord's rate-limit bucket
+    to reset and retries failed requests with exponential backoff. Messages that
+    still can't be delivered are spooled to disk and replayed on the next start.
+    Messages Discord rejects (bad webhook URL or payload) are moved to a dead
+    letter file instead, which is never replayed.
+    """
+    def __init__(self, webhook_url=None, spool_file=DISCORD_SPOOL_FILE, max_retries=5, batch_delay=0.5,
+                 dead_letter_file=DISCORD_DEAD_LETTER_FILE, max_rate_limited=MAX_RATE_LIMITED_RESPONSES):
+        self.webhook_url = webhook_url
+        self.spool_file = spool_file
+        self.dead_letter_file = dead_letter_file
+        self.max_retries = max_retries
+        self.max_rate_limited = max_rate_limited
+        self.batch_delay = batch_delay
+        self.running = False
+        self.stats = {
+            "queued": 0,
+            "sent_embeds": 0,
+            "sent_messages": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "spooled": 0,
+            "rejected": 0
+        }
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._rate_limit_until = 0
+        self._thread = None
+
+    def start(self):
+        """
+        Start the worker thread and replay messages spooled by a previous run.
+        """
+        with self._condition:
+            if self.running:
+                return
+            self.running = True
+        self._replay_spool()
+        self._thread = threading.Thread(target=self._worker, name="discord-delivery", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """
+        Stop the worker thread. Messages that are still queued are spooled to disk.
+        
+        Args:
+            timeout (float, optional): Seconds to wait for the worker to finish its current message
+        """
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._condition:
+            pending = list(self._pending)
+            self._pending.clear()
+        if pending:
+            self._spool([{"webhook_url": webhook_url, "embeds": [embed]} for webhook_url, embed in pending])
+
+    def enqueue(self, title, message, color=0xFF5733, webhook_url=None):
+        """
+        Queue an alert for delivery without waiting for Discord.
+        
+        Args:
+            title (str): The alert title
+            message (str): The alert message
+            color (int, optional): The color of the embed. Defaults to orange.
+            webhook_url (str, optional): The webhook URL to use instead of the queue's default
+            
+        Returns:
+            bool: True if the alert was queued, False if no webhook is configured
+        """
+        webhook_url = webhook_url or self.webhook_url or load_discord_settings()
+        if not webhook_url:
+            return False
+        with self._condition:
+            self._pending.append((webhook_url, create_embed(title, message, color)))
+            self.stats["queued"] += 1
+            self._condition.notify_all()
+        return True
+
+    def get_stats(self):
+        """
+        Get delivery counters and the current queue length.
+        
+        Returns:
+            dict: The delivery statistics
+        """
+        with self._condition:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._pending)
+        return stats
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while self.running and not self._pending:
+                    self._condition.wait()
+                if not self.running:
+                    return
+            # Give a burst of alerts a moment to arrive so they can share a message
+            time.sleep(self.batch_delay)
+            webhook_url, embeds = self._take_batch()
+            if embeds:
+                self._deliver(webhook_url, embeds)
+
+    def _take_batch(self):
+        with self._condition:
+            if not self._pending:
+                return None, []
+            webhook_url = self._pending[0][0]
+            embeds = []
+            characters = 0
+            while self._pending and len(embeds) < MAX_EMBEDS_PER_MESSAGE:
+                next_url, embed = self._pending[0]
+                size = len(embed.get("title", "")) + len(embed.get("description", ""))
+                if next_url != webhook_url or (embeds and characters + size > MAX_EMBED_CHARACTERS):
+                    break
+                self._pending.popleft()
+                embeds.append(embed)
+                characters += size
+            return webhook_url, embeds
+
+    def _deliver(self, webhook_url, embeds):
+        attempt = 0
+        rate_limited = 0
+        while True:
+            self._wait_for_rate_limit()
+            try:
+                response = _session.post(webhook_url, json={"embeds": embeds}, timeout=WEBHOOK_TIMEOUT)
+                self._update_rate_limit(response)
+                if response.status_code in (200, 204):
+                    with self._condition:
+                        self.stats["sent_embeds"] += len(embeds)
+                        self.stats["sent_messages"] += 1
+                    return True
+                if response.status_code == 429:
+                    # Rate limited: wait as long as Discord asks, counted against its own budget.
+                    # While stopping the wait is skipped, so spool instead of posting again
+                    rate_limited += 1
+                    with self._condition:
+                        self.stats["rate_limited"] += 1
+                    if rate_limited > self.max_rate_limited or not self.running:
+                        break
+                    continue
+                if 400 <= response.status_code < 500:
+                    # Bad webhook URL or payload, retrying won't help and neither would replaying it
+                    print(f"Discord webhook rejected message: HTTP Status {response.status_code}")
+                    self._write_messages(self.dead_letter_file, [{"webhook_url": webhook_url, "embeds": embeds,
+                                                                  "status": response.status_code}])
+                    with self._condition:
+                        self.stats["rejected"] += len(embeds)
+                    return False
+                print(f"Error sending Discord alerts: HTTP Status {response.status_code}")
+            except Exception as e:
+                print(f"Error sending Discord alerts: {e}")
+
+            attempt += 1
+            if attempt > self.max_retries or not self.running:
+                break
+            with self._condition:
+                self.stats["retries"] += 1
+                # Exponential backoff, woken early on shutdown
+                self._condition.wait(min(60, 2 ** attempt))
+
+        self._spool([{"webhook_url": webhook_url, "embeds": embeds}])
+        return False
+
+    def _wait_for_rate_limit(self):
+        with self._condition:
+            while self.running and time.time() < self._rate_limit_until:
+                self._condition.wait(self._rate_limit_until - time.time())
+
+    def _update_rate_limit(self, response):
+        reset_after = None
+        if response.status_code == 429:
+            try:
+                reset_after = float(response.json().get("retry_after", 1))
+            except Exception:
+                reset_after = float(response.headers.get("Retry-After", 1))
+        elif response.headers.get("X-RateLimit-Remaining") == "0":
+            reset_after = float(response.headers.get("X-RateLimit-Reset-After", 1))
+        if reset_after is not None:
+            with self._condition:
+                self._rate_limit_until = max(self._rate_limit_until, time.time() + reset_after)
+
+    def _spool(self, messages):
+        if self._write_messages(self.spool_file, messages):
+            with self._condition:
+                self.stats["spooled"] += sum(len(message["embeds"]) for message in messages)
+
+    def _write_messages(self, path, messages):
+        # Append to a message file, replacing it atomically so a crash never leaves it half written
+        try:
+            with _spool_file_lock:
+                stored = []
+                if os.path.exists(path):
+                    with open(path, 'r') as f:
+                        stored = json.load(f)
+                stored.extend(messages)
+                temp_path = f"{path}.tmp"
+                with open(temp_path, 'w') as f:
+                    json.dump(stored, f, indent=4)
+                os.replace(temp_path, path)
+            return True
+        except Exception as e:
+            print(f"Error spooling Discord alerts: {e}")
+            return False
+
+    def _replay_spool(self):
+        try:
+            with _spool_file_lock:
+                if not os.path.exists(self.spool_file):
+                    return
+                with open(self.spool_file, 'r') as f:
+                    spooled = json.load(f)
+                os.remove(self.spool_file)
+        except Exception as e:
+            print(f"Error loading spooled Discord alerts: {e}")
+            return
+        with self._condition:
+            for message in spooled:
+                for embed in message["embeds"]:
+                    self._pending.append((message["webhook_url"], embed))
+            self._condition.notify_all()
+
+# Shared delivery queue used by queue_discord_alert
+_delivery_queue = None
+_delivery_queue_lock = threading.Lock()
+
+def get_delivery_queue():
+    """
+    Get the shared Discord delivery queue, starting it on first use.
+    
+    Returns:
+        DiscordDeliveryQueue: The shared delivery queue
+    """
+    global _delivery_queue
+    with _delivery_queue_lock:
+        if _delivery_queue is None:
+            _delivery_queue = DiscordDeliveryQueue()
+            _delivery_queue.start()
+        return _delivery_queue
+
+def queue_discord_alert(title, message, color=0xFF5733):
+    """
+    Queue an alert for delivery to Discord without blocking.
+    
+    Args:
+        title (str): The alert title
+        message (str): The alert message
+        color (int, optional): The color of the embed. Defaults to orange.
+        
+    Returns:
+        bool: True if the alert was queued, False if no webhook is configured
+    """
+    return get_delivery_queue().enqueue(title, message, color)
+
+def stop_delivery_queue():
+    """
+    Stop the shared Discord delivery queue if it was started, spooling undelivered alerts.
+    """
+    global _delivery_queue
+    with _delivery_queue_lock:
+        if _delivery_queue is not None:
+            _delivery_queue.stop()
+            _delivery_queue = None
@@ -0,0 +1,117 @@
+import numpy as np
+
+# Number of points a chart series is reduced to when its width in pixels is unknown
+DEFAULT_MAX_POINTS = 800
+
+# Downsampling methods
+METHOD_LTTB = "lttb"
+METHOD_MIN_MAX = "min_max"
+
+def lttb_indices(x, y, threshold):
+    """
+    Pick the points of a series with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The rest are split into
+    threshold - 2 buckets and from each bucket the point forming the largest
+    triangle with the previously kept point and the average of the next bucket
+    is kept, which preserves the visual shape of the series.
+
+    Args:
+        x (numpy.ndarray): The x values, sorted
+        y (numpy.ndarray): The y values
+        threshold (int): The number of points to keep
+
+    Returns:
+        numpy.ndarray: The indices of the kept points, sorted
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = count - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The average of the next bucket, or the last point for the last bucket
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else count
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+
+        areas = np.abs((x[previous] - average_x) * (y[start:end] - y[previous]) -
+                       (x[previous] - x[start:end]) * (average_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        indices[bucket + 1] = previous
+    return indices
+
+def min_max_indices(y, buckets):
+    """
+    Keep the lowest and highest point of each bucket of a series.
+
+    Args:
+        y (numpy.ndarray): The y values
+        buckets (int): The number of buckets, up to two points are kept per bucket
+
+    Returns:
+        numpy.ndarray: The indices of the kept points, sorted
+    """
+    count = len(y)
+    if buckets * 2 >= count or buckets < 1:
+        return np.arange(count)
+
+    bucket_ids = np.arange(count) * buckets // count
+    # Sorting by bucket, then value, puts each bucket's minimum first and maximum last
+    order = np.lexsort((y, bucket_ids))
+    starts = np.searchsorted(bucket_ids[order], np.arange(buckets))
+    ends = np.append(starts[1:], count) - 1
+    return np.unique(np.concatenate((order[starts], order[ends])))
+
+def downsample(x, y, max_points=DEFAULT_MAX_POINTS, method=METHOD_LTTB):
+    """
+    Reduce a series to about max_points points, keeping its overall lowest and highest point.
+
+    Args:
+        x (numpy.ndarray): The x values, sorted
+        y (numpy.ndarray): The y values
+        max_points (int, optional): The number of points to keep, e.g. the width of the plot in pixels
+        method (str, optional): METHOD_LTTB or METHOD_MIN_MAX
+
+    Returns:
+        numpy.ndarray: The indices of the kept points, sorted
+    """
+    count = len(x)
+    if count <= max_points:
+        return np.arange(count)
+    if method == METHOD_MIN_MAX:
+        indices = min_max_indices(y, max(1, max_points // 2))
+    else:
+        indices = lttb_indices(x, y, max_points)
+    # Neither method may drop the extremes of the whole series, add them back
+    return np.union1d(indices, [int(np.argmin(y)), int(np.argmax(y))])
+
+def visible_indices(x, y, x_min, x_max, max_points=DEFAULT_MAX_POINTS, method=METHOD_LTTB):
+    """
+    Downsample the part of a series between two x values.
+
+    One point on either side of the range is included, so the line still runs
+    to the edges of the plot.
+
+    Args:
+        x (numpy.ndarray): The x values, sorted
+        y (numpy.ndarray): The y values
+        x_min (float): The left edge of the visible range
+        x_max (float): The right edge of the visible range
+        max_points (int, optional): The number of points to keep
+        method (str, optional): METHOD_LTTB or METHOD_MIN_MAX
+
+    Returns:
+        numpy.ndarray: The indices of the kept points, sorted
+    """
+    start = max(0, int(np.searchsorted(x, x_min, side="left")) - 1)
+    end = min(len(x), int(np.searchsorted(x, x_max, side="right")) + 1)
+    return start + downsample(x[start:end], y[start:end], max_points, method)
@@ -1,95 +1,64 @@
-import io
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-from PIL import Image, ImageTk
-from scipy.signal import find_peaks
 import datetime
 from datetime import datetime, timedelta
-# Note: sklearn is installed as scikit-learn, but
-# the import name is still 'sklearn'
-from sklearn.linear_model import LinearRegression
-from utils.translations import get_text
+from utils.trend import fit_peak_valley_trends
+from utils.downsampling import downsample, visible_indices, DEFAULT_MAX_POINTS
+from utils.rollups import slice_rollups, ROLLUP_INTERVALS
+from utils.translations import get_text, get_language
 import matplotlib.gridspec as gridspec
-import matplotlib.ticker as ticker
-import tkinter as tk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import time
+
+# Matplotlib date number of the Unix epoch
+EPOCH_DATE_NUM = mdates.date2num(datetime(1970, 1, 1))
+
+# How far from a sale in pixels the mouse may be to show its tooltip
+HOVER_MAX_DISTANCE = 20
+
+# Minimum time between two tooltip updates in milliseconds, about one frame
+HOVER_THROTTLE_MS = 16
+
+# Time ranges of the charts: days (0 for all time), translation key and English text
+TIME_RANGES = (
+    (1, "market.24_hours", "24 Hours"),
+    (7, "market.7_days", "7 Days"),
+    (30, "market.30_days", "30 Days"),
+    (90, "market.90_days", "90 Days"),
+    (0, "market.all_time", "All Time")
+)
+
+# Days by time range text, per language code
+_time_range_maps = {}
 
 def create_price_history_graph(history_data, time_range, show_peaks=True, show_trend=True, show_avg=True):
     """
     Create a price history graph using matplotlib.
     
     Args:
-        history_data (dict): The price history data from Universalis API
+        history_data (dict): The price history data from Universalis API, or the columns from parse_price_history
         time_range (str): The time range to display (e.g. "1 day", "1 week", etc.)
         show_peaks (bool, optional): Whether to show price peaks. Defaults to True.
         show_trend (bool, optional): Whether to show price trend. Defaults to True.
         show_avg (bool, optional): Whether to show price average. Defaults to True.
         
     Returns:
-        tuple: (figure_canvas, data_dict) where figure_canvas is a matplotlib canvas widget and data_dict contains data points and plot area information
+        tuple: (figure_canvas, data_dict) where figure_canvas is a matplotlib canvas widget and data_dict contains the history columns and plot area information
     """
-    # Extract price history data
-    timestamps = []
-    prices = []
-    quantities = []
-    worlds = []
+    # Convert the history to sorted columns once, the response itself is left untouched
+    history = history_data if "world_names" in history_data else parse_price_history(history_data)
     
-    # Get the time range in days
+    # Get the time range in days and keep only the entries inside it
     days = get_time_range_days(time_range)
+    history = filter_price_history(history, days)
     
-    # Calculate the cutoff date for filtering (if days > 0)
-    cutoff_date = None
-    if days > 0:
-        cutoff_date = datetime.now() - timedelta(days=days)
-    
-    # Check different possible formats from the API
-    if "entries" in history_data:
-        entries = history_data["entries"]
-        for entry in entries:
-            if "pricePerUnit" in entry and "timestamp" in entry:
-                # Convert timestamp to datetime
-                if isinstance(entry["timestamp"], int):
-                    # Convert from milliseconds to seconds if needed
-                    if entry["timestamp"] > 1000000000000:  # If timestamp is in milliseconds
-                        entry["timestamp"] = entry["timestamp"] / 1000
-                    timestamp = datetime.fromtimestamp(entry["timestamp"])
-                else:
-                    # Try to parse as ISO format
-                    try:
-                        timestamp = datetime.fromisoformat(entry["timestamp"].replace('Z', '+00:00'))
-                    except:
-                        continue
-                
-                # Skip entries outside the time range
-                if cutoff_date and timestamp < cutoff_date:
-                    continue
-                        
-                timestamps.append(timestamp)
-                prices.append(entry["pricePerUnit"])
-                quantities.append(entry.get("quantity", 1))
-                worlds.append(entry.get("worldName", ""))
+    timestamps = history["timestamp"]
+    prices = history["price"]
 
     # If no data, return empty graph
-    if not timestamps:
-        fig, ax = plt.subplots(figsize=(8, 5))
-        ax.text(0.5, 0.5, get_text("market.no_listings", "No price history data available"), 
-                horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
-        ax.set_xlabel(get_text("market.date", "Date"))
-        ax.set_ylabel(get_text("market.price", "Price"))
-        ax.set_title(get_text("market.price_history", "Price History"))
-        
-        # Store the plot area for interactive features
-        bbox = ax.get_position()
-        plot_area = {
-            'x0': bbox.x0,
-            'y0': bbox.y0,
-            'x1': bbox.x1,
-            'y1': bbox.y1
-        }
-        
-        # Return the figure and the data point information
-        return fig, {'data_points': [], 'plot_area': plot_area}
+    if len(timestamps) == 0:
+        fig, plot_area = create_empty_graph()
+        return fig, {'history': history, 'plot_area': plot_area}
     
     # Create figure with a special layout for side legend and predictions
     fig = plt.figure(figsize=(10, 6))
@@ -105,173 +74,72 @@ def create_price_history_graph(history_data, time_range, show_peaks=True, show_t
     info_ax = fig.add_subplot(gs[0, 1])
     info_ax.axis('off')  # Turn off axis for the info area
     
-    # Sort data by timestamp
-    sorted_data = sorted(zip(timestamps, prices, quantities, worlds), key=lambda x: x[0])
-    timestamps, prices, quantities, worlds = zip(*sorted_data) if sorted_data else ([], [], [], [])
-    
-    # Create a list to track data points for tooltip functionality
-    data_points = []
-    
-    # Create scatter plot with lines
-    scatter = ax.scatter(timestamps, prices, s=40, alpha=0.7, picker=5, color='blue')
-    ax.plot(timestamps, prices, '-', color='blue', alpha=0.5, linewidth=1.5)
+    # Matplotlib date numbers in local time, as datetime.fromtimestamp would give
+    dates = to_local_date_nums(timestamps)
+    last_date = datetime.fromtimestamp(int(timestamps[-1]))
     
-    # Store the data points for tooltip functionality
-    for i in range(len(timestamps)):
-        data_points.append({
-            'timestamp': timestamps[i],
-            'price': prices[i],
-            'quantity': quantities[i],
-            'world': worlds[i] if i < len(worlds) else ""
-        })
+    # Create scatter plot with lines, downsampled to about one point per pixel
+    shown = downsample(dates, prices, DEFAULT_MAX_POINTS)
+    scatter = ax.scatter(dates[shown], prices[shown], s=40, alpha=0.7, picker=5, color='blue')
+    price_line, = ax.plot(dates[shown], prices[shown], '-', color='blue', alpha=0.5, linewidth=1.5)
+    ax.xaxis_date()
     
     # Show average price if requested
-    if show_avg and len(prices) > 0:
-        avg_price = sum(prices) / len(prices)
+    if show_avg:
+        avg_price = prices.mean()
         ax.axhline(y=avg_price, color='blue', linestyle='--', alpha=0.7, 
                    label=get_text("market.avg_price", "Average Price"))
     
     # Show trend lines for peaks and valleys if requested
+    peak_line = None
+    valley_line = None
     if show_trend and len(timestamps) > 1:
         try:
-            # Calculate average price
-            avg_price = sum(prices) / len(prices)
+            # Fit separate lines to the prices above and below average
+            peak_line, valley_line = fit_peak_valley_trends(dates, prices)
             
-            # Separate data points above and below average
-            above_avg_timestamps = []
-            above_avg_prices = []
-            below_avg_timestamps = []
-            below_avg_prices = []
-            
-            for i, price in enumerate(prices):
-                if price >= avg_price:
-                    above_avg_timestamps.append(timestamps[i])
-                    above_avg_prices.append(price)
-                else:
-                    below_avg_timestamps.append(timestamps[i])
-                    below_avg_prices.append(price)
-            
-            # Convert datetime to numeric for regression
-            x_above = mdates.date2num(above_avg_timestamps)
-            x_below = mdates.date2num(below_avg_timestamps)
-            
-            # Only proceed if we have enough data points
-            if len(x_above) > 1:
-                # Reshape for sklearn
-                X_above = x_above.reshape(-1, 1)
-                y_above = np.array(above_avg_prices)
-                
-                # Fit linear regression for peaks
-                model_above = LinearRegression()
-                model_above.fit(X_above, y_above)
-                
-                # Generate trend line points
-                x_above_trend = np.linspace(min(x_above), max(x_above), 100)
-                y_above_trend = model_above.predict(x_above_trend.reshape(-1, 1))
-                
-                # Convert back to datetime for plotting
-                x_above_trend_dates = mdates.num2date(x_above_trend)
-                
-                # Plot trend line for peaks
-                ax.plot(x_above_trend_dates, y_above_trend, 'r-', linewidth=2, label=get_text("market.peak_trend", "Peak Trend"))
-                
-                # Extend trend line for prediction (1 day into the future)
-                last_date = max(timestamps)
-                future_date = last_date + timedelta(days=1)
-                x_peak_trend = np.linspace(min(x_above), mdates.date2num(future_date), 100)
-                y_peak_trend = model_above.predict(x_peak_trend.reshape(-1, 1))
-                x_peak_trend_dates = mdates.num2date(x_peak_trend)
-            
-            if len(x_below) > 1:
-                # Reshape for sklearn
-                X_below = x_below.reshape(-1, 1)
-                y_below = np.array(below_avg_prices)
-                
-                # Fit linear regression for valleys
-                model_below = LinearRegression()
-                model_below.fit(X_below, y_below)
-                
-                # Generate trend line points
-                x_below_trend = np.linspace(min(x_below), max(x_below), 100)
-                y_below_trend = model_below.predict(x_below_trend.reshape(-1, 1))
-                
-                # Convert back to datetime for plotting
-                x_below_trend_dates = mdates.num2date(x_below_trend)
-                
-                # Plot trend line for valleys
-                ax.plot(x_below_trend_dates, y_below_trend, 'g-', linewidth=2, label=get_text("market.valley_trend", "Valley Trend"))
-                
-                # Extend trend line for prediction (1 day into the future)
-                last_date = max(timestamps)
-                future_date = last_date + timedelta(days=1)
-                x_valley_trend = np.linspace(min(x_below), mdates.date2num(future_date), 100)
-                y_valley_trend = model_below.predict(x_valley_trend.reshape(-1, 1))
-                x_valley_trend_dates = mdates.num2date(x_valley_trend)
+            # The prediction runs until 1 day after the last entry
+            above_avg = prices >= prices.mean()
+            for line, x, color, prediction_color, label, prediction_label in (
+                    (peak_line, dates[above_avg], 'r-', 'magenta', get_text("market.peak_trend", "Peak Trend"),
+                     get_text("market.peak_prediction", "Peak Prediction")),
+                    (valley_line, dates[~above_avg], 'g-', 'cyan', get_text("market.valley_trend", "Valley Trend"),
+                     get_text("market.valley_prediction", "Valley Prediction"))):
+                if line is None:
+                    continue
+                slope, intercept = line
                 
-            # Highlight the prediction part with a different color/style
-            if 'x_peak_trend' in locals() and 'y_peak_trend' in locals():
-                prediction_start_idx = np.argmax(x_peak_trend >= mdates.date2num(last_date))
-                if prediction_start_idx < len(x_peak_trend_dates):
-                    # Use a more distinct color (magenta) for peak predictions
-                    ax.plot(x_peak_trend_dates[prediction_start_idx:], y_peak_trend[prediction_start_idx:], 
-                            color='magenta', linestyle='--', linewidth=2.5, 
-                            label=get_text("market.peak_prediction", "Peak Prediction"))
+                # Plot the trend line over the points it was fitted to
+                ax.plot([x[0], x[-1]], [slope * x[0] + intercept, slope * x[-1] + intercept], color, linewidth=2, label=label)
                 
-            if 'x_valley_trend' in locals() and 'y_valley_trend' in locals():
-                prediction_start_idx = np.argmax(x_valley_trend >= mdates.date2num(last_date))
-                if prediction_start_idx < len(x_valley_trend_dates):
-                    # Use a more distinct color (cyan) for valley predictions
-                    ax.plot(x_valley_trend_dates[prediction_start_idx:], y_valley_trend[prediction_start_idx:], 
-                            color='cyan', linestyle='--', linewidth=2.5, 
-                            label=get_text("market.valley_prediction", "Valley Prediction"))
+                # Highlight the prediction part with a different color/style
+                prediction_x = [dates[-1], dates[-1] + 1]
+                ax.plot(prediction_x, [slope * value + intercept for value in prediction_x],
+                        color=prediction_color, linestyle='--', linewidth=2.5, label=prediction_label)
         except Exception as e:
             print(f"Error calculating trend lines: {e}")
     
     # Add tomorrow's price prediction text to the info area instead of on the main plot
     prediction_text = ""
-    try:
-        if show_trend and 'x_peak_trend' in locals() and 'y_peak_trend' in locals() and 'x_valley_trend' in locals() and 'y_valley_trend' in locals():
-            # Get tomorrow's date
-            last_date = max(timestamps)
-            tomorrow = last_date + timedelta(days=1)
-            tomorrow_str = tomorrow.strftime('%Y-%m-%d')
-            
-            # Create prediction text
-            prediction_text = get_text("market.tomorrow_prediction", "Tomorrow's Price Prediction ({date}):\n").format(date=tomorrow_str)
-            
-            # Get peak prediction if available
-            try:
-                if 'model_above' in locals():
-                    peak_prediction = model_above.predict([[mdates.date2num(tomorrow)]])[0]
-                    peak_prediction_rounded = round(peak_prediction, 2)
-                    prediction_text += get_text("market.peak_price", "Peak Price: {price}\n").format(price=peak_prediction_rounded)
-            except Exception as e:
-                pass
-            
-            # Get valley prediction if available
-            try:
-                if 'model_below' in locals():
-                    valley_prediction = model_below.predict([[mdates.date2num(tomorrow)]])[0]
-                    valley_prediction_rounded = round(valley_prediction, 2)
-                    prediction_text += get_text("market.valley_price", "Valley Price: {price}\n").format(price=valley_prediction_rounded)
-            except Exception as e:
-                pass
-            
-            # Calculate average price prediction if we have both peak and valley
-            try:
-                if 'peak_prediction' in locals() and 'valley_prediction' in locals():
-                    avg_prediction = (peak_prediction + valley_prediction) / 2
-                    avg_prediction_rounded = round(avg_prediction, 2)
-                    prediction_text += get_text("market.average_price", "Average Price: {price}").format(price=avg_prediction_rounded)
-            except Exception as e:
-                pass
-    except Exception as e:
-        print(f"Error calculating tomorrow's price prediction: {e}")
+    if peak_line is not None and valley_line is not None:
+        # Get tomorrow's date
+        tomorrow = last_date + timedelta(days=1)
+        tomorrow_str = tomorrow.strftime('%Y-%m-%d')
+        
+        peak_prediction = peak_line[0] * (dates[-1] + 1) + peak_line[1]
+        valley_prediction = valley_line[0] * (dates[-1] + 1) + valley_line[1]
+        avg_prediction = (peak_prediction + valley_prediction) / 2
+        
+        # Create prediction text
+        prediction_text = get_text("market.tomorrow_prediction", "Tomorrow's Price Prediction ({date}):\n").format(date=tomorrow_str)
+        prediction_text += get_text("market.peak_price", "Peak Price: {price}\n").format(price=round(peak_prediction, 2))
+        prediction_text += get_text("market.valley_price", "Valley Price: {price}\n").format(price=round(valley_prediction, 2))
+        prediction_text += get_text("market.average_price", "Average Price: {price}").format(price=round(avg_prediction, 2))
     
     # Format the x-axis to show dates nicely
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
     ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-    plt.xticks(rotation=45)
+    ax.tick_params(axis='x', labelrotation=45)
     
     # Add labels and title
     ax.set_xlabel(get_text("market.date", "Date"))
@@ -293,7 +161,12 @@ def create_price_history_graph(history_data, time_range, show_peaks=True, show_t
         info_ax.text(0.05, 0.5, prediction_text, fontsize=10, verticalalignment='center')
     
     # Adjust layout to make room for the rotated x-axis labels
-    plt.tight_layout()
+    fig.tight_layout()
+    
+    # Pick the points again whenever the visible range changes, zooming in brings back full resolution
+    connect_downsampling(ax, dates, prices, scatter, price_line)
+    hover = ChartHover(ax, dates, prices, lambda index: describe_sale(history, index))
+    connect_scroll_zoom(ax)
     
     # Store the plot area for interactive features
     bbox = ax.get_position()
@@ -304,13 +177,369 @@ def create_price_history_graph(history_data, time_range, show_peaks=True, show_t
         'y1': bbox.y1
     }
     
-    # Return the figure and the data point information
-    return fig, {'data_points': data_points, 'plot_area': plot_area}
+    # Return the figure and the history columns
+    return fig, {'history': history, 'hover': hover, 'plot_area': plot_area}
+
+def create_empty_graph():
+    """
+    Create the graph shown when there is no price history.
+    
+    Returns:
+        tuple: (figure, plot_area)
+    """
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.text(0.5, 0.5, get_text("market.no_listings", "No price history data available"), 
+            horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
+    ax.set_xlabel(get_text("market.date", "Date"))
+    ax.set_ylabel(get_text("market.price", "Price"))
+    ax.set_title(get_text("market.price_history", "Price History"))
+    
+    # Store the plot area for interactive features
+    bbox = ax.get_position()
+    plot_area = {
+        'x0': bbox.x0,
+        'y0': bbox.y0,
+        'x1': bbox.x1,
+        'y1': bbox.y1
+    }
+    return fig, plot_area
+
+def create_candlestick_graph(rollups, time_range):
+    """
+    Create a candlestick graph with volume bars from history rollups.
+    
+    Hourly candles are used for ranges up to 7 days and daily candles for longer ones.
+    
+    Args:
+        rollups (dict): Rollups by interval name, as returned by rollups.update_rollups
+        time_range (str): The time range to display (e.g. "1 day", "1 week", etc.)
+        
+    Returns:
+        tuple: (figure, data_dict) where data_dict contains the candles and plot area information
+    """
+    days = get_time_range_days(time_range)
+    name = "hourly" if 0 < days <= 7 else "daily"
+    interval = ROLLUP_INTERVALS[name]
+    candles = rollups[name]
+    if days > 0:
+        candles = slice_rollups(candles, time.time() - days * 86400, interval)
+    
+    # If no data, return empty graph
+    if len(candles["start"]) == 0:
+        fig, plot_area = create_empty_graph()
+        return fig, {'history': None, 'candles': candles, 'plot_area': plot_area}
+    
+    # Price candles on top, volume below on the same dates
+    fig = plt.figure(figsize=(10, 6))
+    gs = gridspec.GridSpec(2, 1, height_ratios=[3, 1])
+    ax = fig.add_subplot(gs[0, 0])
+    volume_ax = fig.add_subplot(gs[1, 0], sharex=ax)
+    
+    # Candles are centered on their interval
+    dates = to_local_date_nums(candles["start"] + interval // 2)
+    width = interval / 86400 * 0.8
+    rising = candles["close"] >= candles["open"]
+    colors = np.where(rising, 'green', 'red')
+    
+    # Wicks from low to high, bodies from open to close with a minimum height so flat candles stay visible
+    ax.vlines(dates, candles["low"], candles["high"], colors=colors, linewidth=1)
+    minimum_height = (candles["high"].max() - candles["low"].min()) * 0.002 or 1
+    body_height = np.maximum(np.abs(candles["close"] - candles["open"]), minimum_height)
+    ax.bar(dates, body_height, width, bottom=np.minimum(candles["open"], candles["close"]), color=colors)
+    ax.plot(dates, candles["vwap"], color='orange', linewidth=1.5, label=get_text("market.vwap", "VWAP"))
+    
+    volume_ax.bar(dates, candles["volume"], width, color=colors, alpha=0.6)
+    
+    # Format the x-axis to show dates nicely
+    volume_ax.xaxis_date()
+    volume_ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d' if name == "daily" else '%m-%d %H:%M'))
+    volume_ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    plt.setp(ax.get_xticklabels(), visible=False)
+    plt.setp(volume_ax.get_xticklabels(), rotation=45)
+    
+    # Add labels and title
+    ax.set_ylabel(get_text("market.price", "Price"))
+    ax.set_title(get_text("market.price_history", "Price History"))
+    volume_ax.set_xlabel(get_text("market.date", "Date"))
+    volume_ax.set_ylabel(get_text("market.volume", "Volume"))
+    
+    # Add grid for better readability
+    ax.grid(True, linestyle='--', alpha=0.7)
+    volume_ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend(loc='upper left', fontsize=10)
+    
+    # Leave room for the rotated x-axis labels, tight_layout does not handle the shared axes
+    fig.subplots_adjust(left=0.1, right=0.97, top=0.93, bottom=0.18, hspace=0.05)
+    
+    # Store the plot area for interactive features
+    bbox = ax.get_position()
+    plot_area = {
+        'x0': bbox.x0,
+        'y0': bbox.y0,
+        'x1': bbox.x1,
+        'y1': bbox.y1
+    }
+    hover = ChartHover(ax, dates, candles["close"], lambda index: describe_candle(candles, index, name), x_only=True)
+    return fig, {'history': None, 'candles': candles, 'hover': hover, 'plot_area': plot_area}
+
+def describe_sale(history, index):
+    """
+    Get the tooltip text of a sale.
+    
+    Args:
+        history (dict): The columns from parse_price_history
+        index (int): The index of the sale
+        
+    Returns:
+        str: The tooltip text
+    """
+    timestamp_str = datetime.fromtimestamp(int(history['timestamp'][index])).strftime('%Y-%m-%d %H:%M')
+    text = f"{timestamp_str}\n{get_text('market.tooltip_price', 'Price')}: {history['price'][index]:,.0f}"
+    text += f"\n{get_text('market.tooltip_quantity', 'Quantity')}: {history['quantity'][index]}"
+    world = history['world_names'][history['world'][index]]
+    if world:
+        text += f"\n{get_text('market.tooltip_world', 'World')}: {world}"
+    return text
+
+def describe_candle(candles, index, interval_name):
+    """
+    Get the tooltip text of a candle.
+    
+    Args:
+        candles (dict): The rollup the candles were drawn from
+        index (int): The index of the candle
+        interval_name (str): "hourly" or "daily"
+        
+    Returns:
+        str: The tooltip text
+    """
+    start = datetime.fromtimestamp(int(candles['start'][index]))
+    timestamp_str = start.strftime('%Y-%m-%d' if interval_name == "daily" else '%Y-%m-%d %H:%M')
+    return timestamp_str + "\n" + get_text("market.candle_tooltip", "Open {open} | High {high}\nLow {low} | Close {close}\nVWAP {vwap} | Volume {volume}").format(
+        open=f"{candles['open'][index]:,.0f}", high=f"{candles['high'][index]:,.0f}",
+        low=f"{candles['low'][index]:,.0f}", close=f"{candles['close'][index]:,.0f}",
+        vwap=f"{candles['vwap'][index]:,.0f}", volume=f"{candles['volume'][index]:,.0f}")
+
+def parse_price_history(history_data):
+    """
+    Convert a price history response into NumPy columns sorted by time.
+    
+    The response is only read, so a cached response can be rendered any number of times.
+    
+    Args:
+        history_data (dict): The price history data from Universalis API
+        
+    Returns:
+        dict: Dictionary with timestamp (int64 epoch seconds), price, quantity, hq and world
+            (index into world_names) arrays, and the world_names list
+    """
+    entries = [entry for entry in (history_data or {}).get("entries", []) if "pricePerUnit" in entry and "timestamp" in entry]
+    count = len(entries)
+    
+    timestamps = np.fromiter((_parse_timestamp(entry["timestamp"]) for entry in entries), dtype=np.float64, count=count)
+    prices = np.fromiter((entry["pricePerUnit"] for entry in entries), dtype=np.float64, count=count)
+    quantities = np.fromiter((entry.get("quantity", 1) for entry in entries), dtype=np.int64, count=count)
+    hq = np.fromiter((bool(entry.get("hq", False)) for entry in entries), dtype=bool, count=count)
+    world_index = {}
+    worlds = np.fromiter((world_index.setdefault(entry.get("worldName", ""), len(world_index)) for entry in entries),
+                         dtype=np.int32, count=count)
+    
+    # Timestamps are in seconds, some responses give milliseconds
+    timestamps = np.where(timestamps > 1000000000000, timestamps / 1000, timestamps)
+    
+    # Drop the timestamps that could not be parsed and sort the rest
+    valid = np.flatnonzero(~np.isnan(timestamps))
+    order = valid[np.argsort(timestamps[valid], kind="stable")]
+    return {
+        "timestamp": timestamps[order].astype(np.int64),
+        "price": prices[order],
+        "quantity": quantities[order],
+        "hq": hq[order],
+        "world": worlds[order],
+        "world_names": list(world_index)
+    }
+
+def _parse_timestamp(timestamp):
+    if isinstance(timestamp, (int, float)):
+        return timestamp
+    # Try to parse as ISO format
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError):
+        return np.nan
+
+def filter_price_history(history, days, now=None):
+    """
+    Keep the entries of the last days of a parsed price history.
+    
+    Args:
+        history (dict): The columns from parse_price_history
+        days (int): Number of days to keep, 0 for all time
+        now (float, optional): The current epoch time in seconds. Defaults to time.time().
+        
+    Returns:
+        dict: The filtered columns
+    """
+    if days <= 0:
+        return history
+    cutoff = (time.time() if now is None else now) - days * 86400
+    # The columns are sorted by time, so the range starts at the first entry after the cutoff
+    start = np.searchsorted(history["timestamp"], cutoff, side="left")
+    return {key: value[start:] if isinstance(value, np.ndarray) else value for key, value in history.items()}
+
+def to_local_date_nums(timestamps):
+    """
+    Convert epoch seconds to Matplotlib date numbers in local time.
+    
+    Args:
+        timestamps (numpy.ndarray): Epoch seconds, sorted
+        
+    Returns:
+        numpy.ndarray: The Matplotlib date numbers
+    """
+    if len(timestamps) == 0:
+        return np.array([], dtype=np.float64)
+    first_offset = time.localtime(int(timestamps[0])).tm_gmtoff
+    last_offset = time.localtime(int(timestamps[-1])).tm_gmtoff
+    if first_offset == last_offset:
+        offsets = first_offset
+    else:
+        # The range crosses a daylight saving change, look up each entry
+        offsets = np.fromiter((time.localtime(int(timestamp)).tm_gmtoff for timestamp in timestamps),
+                              dtype=np.int64, count=len(timestamps))
+    return (timestamps + offsets) / 86400.0 + EPOCH_DATE_NUM
+
+def connect_downsampling(ax, x, y, scatter, line):
+    """
+    Downsample a plotted series to the visible range every time the x limits change.
+    
+    Args:
+        ax: The axes the series is plotted on
+        x (numpy.ndarray): The full x values, sorted
+        y (numpy.ndarray): The full y values
+        scatter: The scatter plot of the series
+        line: The line plot of the series
+    """
+    def on_xlim_changed(ax):
+        x_min, x_max = ax.get_xlim()
+        # About one point per pixel of the plot width
+        max_points = max(int(ax.get_window_extent().width), 2)
+        shown = visible_indices(x, y, x_min, x_max, max_points)
+        scatter.set_offsets(np.column_stack((x[shown], y[shown])))
+        line.set_data(x[shown], y[shown])
+    
+    ax.callbacks.connect('xlim_changed', on_xlim_changed)
+
+def connect_scroll_zoom(ax, factor=1.5):
+    """
+    Zoom the x axis around the mouse with the scroll wheel, never past the initial range.
+    
+    Args:
+        ax: The axes to zoom
+        factor (float, optional): How much one scroll step zooms in or out
+    """
+    full_min, full_max = ax.get_xlim()
+    
+    def on_scroll(event):
+        if event.inaxes is not ax or event.xdata is None:
+            return
+        x_min, x_max = ax.get_xlim()
+        scale = 1 / factor if event.button == 'up' else factor
+        width = min((x_max - x_min) * scale, full_max - full_min)
+        # Keep the date under the mouse in place
+        left = event.xdata - (event.xdata - x_min) * width / (x_max - x_min)
+        left = min(max(left, full_min), full_max - width)
+        ax.set_xlim(left, left + width)
+        ax.figure.canvas.draw_idle()
+    
+    ax.figure.canvas.mpl_connect('scroll_event', on_scroll)
+
+class ChartHover:
+    """
+    Nearest-point lookup for chart tooltips, in display coordinates.
+    
+    The visible points are transformed to display coordinates once per draw.
+    Because they are sorted by x, the points near the mouse are found with a
+    binary search on x, and only those are compared by distance.
+    """
+    def __init__(self, ax, x, y, describe, x_only=False, max_distance=HOVER_MAX_DISTANCE):
+        """
+        Args:
+            ax: The axes the points are plotted on
+            x (numpy.ndarray): The x values, sorted
+            y (numpy.ndarray): The y values
+            describe (callable): Returns the tooltip text for a point index
+            x_only (bool, optional): Find the nearest point by x alone, e.g. for candles
+            max_distance (float, optional): How far from a point in pixels the mouse may be
+        """
+        self.ax = ax
+        self.x = x
+        self.y = y
+        self.describe = describe
+        self.x_only = x_only
+        self.max_distance = max_distance
+        self._start = 0
+        self._pixels = np.empty((0, 2))
+        ax.figure.canvas.mpl_connect('draw_event', lambda event: self.update())
+    
+    def update(self):
+        """
+        Transform the visible points to display coordinates, called after every draw.
+        """
+        x_min, x_max = self.ax.get_xlim()
+        self._start = max(0, int(np.searchsorted(self.x, x_min, side="left")) - 1)
+        end = min(len(self.x), int(np.searchsorted(self.x, x_max, side="right")) + 1)
+        self._pixels = self.ax.transData.transform(np.column_stack((self.x[self._start:end], self.y[self._start:end])))
+    
+    def nearest(self, display_x, display_y):
+        """
+        Find the point nearest to a position.
+        
+        Args:
+            display_x (float): The x position in display coordinates
+            display_y (float): The y position in display coordinates
+            
+        Returns:
+            int: The index of the point, or None if no point is close enough or the position is outside the axes
+        """
+        if len(self._pixels) == 0 or not self.ax.bbox.contains(display_x, display_y):
+            return None
+        pixels_x = self._pixels[:, 0]
+        if self.x_only:
+            position = int(np.searchsorted(pixels_x, display_x))
+            candidates = [index for index in (position - 1, position) if 0 <= index < len(pixels_x)]
+            return self._start + min(candidates, key=lambda index: abs(pixels_x[index] - display_x))
+        
+        # Only points within max_distance on x can be within max_distance at all
+        low = int(np.searchsorted(pixels_x, display_x - self.max_distance, side="left"))
+        high = int(np.searchsorted(pixels_x, display_x + self.max_distance, side="right"))
+        if low == high:
+            return None
+        distances = (pixels_x[low:high] - display_x) ** 2 + (self._pixels[low:high, 1] - display_y) ** 2
+        closest = int(np.argmin(distances))
+        if distances[closest] > self.max_distance ** 2:
+            return None
+        return self._start + low + closest
+    
+    def get_position(self, index):
+        """
+        Get the display coordinates of a point.
+        
+        Args:
+            index (int): The index of the point
+            
+        Returns:
+            tuple: (x, y) in display coordinates
+        """
+        return tuple(self._pixels[index - self._start])
 
 def create_chart_tooltip(chart_placeholder, chart_frame):
     """
     Create a tooltip for a chart.
     
+    Motion events are handled at most once per frame, and the tooltip only
+    changes when the point under the mouse does.
+    
     Args:
         chart_placeholder: The chart placeholder widget
         chart_frame: The frame containing the chart
@@ -318,85 +547,56 @@ def create_chart_tooltip(chart_placeholder, chart_frame):
     Returns:
         tuple: (tooltip widget, event binding function)
     """
+    # Tk is only needed by the GUI, headless chart exports render without it
+    import tkinter as tk
+    
     # Create tooltip widget
-    tooltip = tk.Label(chart_frame, text="", relief="solid", borderwidth=1, bg="lightyellow")
+    tooltip = tk.Label(chart_frame, text="", relief="solid", borderwidth=1, bg="lightyellow", justify=tk.LEFT)
     tooltip.place_forget()  # Hide initially
     
-    # Define the motion handler function
-    def on_chart_motion(event, chart_data, tooltip):
+    # The latest motion event and the point the tooltip shows
+    state = {'event': None, 'chart_data': None, 'scheduled': False, 'hover': None, 'index': None}
+    
+    def show_hovered_point():
+        state['scheduled'] = False
+        event, chart_data = state['event'], state['chart_data']
         try:
-            # Check if we have chart data and tooltip
-            if not chart_data:
-                return
-                
-            # Get the chart placeholder and its dimensions
-            chart_placeholder = event.widget
-            chart_width = chart_placeholder.winfo_width()
-            chart_height = chart_placeholder.winfo_height()
-            
-            # Get data points from chart data
-            data_points = chart_data.get('data_points', [])
-            if not data_points or len(data_points) == 0:
-                return
-            
-            # Get plot area from chart data
-            plot_area = chart_data.get('plot_area', {})
-            if not plot_area:
+            hover = chart_data.get('hover') if chart_data else None
+            if hover is None:
+                tooltip.place_forget()
                 return
             
-            # Check if mouse is in the plot area
-            x_rel = event.x / chart_width
-            y_rel = event.y / chart_height
+            # Tk measures from the top left in screen pixels, Matplotlib from the bottom left in device pixels
+            chart_widget = event.widget
+            chart_width = chart_widget.winfo_width()
+            chart_height = chart_widget.winfo_height()
+            ratio = hover.ax.figure.canvas.device_pixel_ratio
+            index = hover.nearest(event.x * ratio, (chart_height - event.y) * ratio)
             
-            if (x_rel < plot_area['x0'] or x_rel > plot_area['x1'] or 
-                y_rel < plot_area['y0'] or y_rel > plot_area['y1']):
+            if index is None:
                 tooltip.place_forget()
+                state['index'] = None
                 return
+            if index == state['index'] and hover is state['hover'] and tooltip.winfo_ismapped():
+                return
+            state['hover'], state['index'] = hover, index
             
-            # Simple approach: divide the plot area into segments based on the number of data points
-            # and show the tooltip for the segment the mouse is hovering over
-            
-            # Calculate which segment of the plot area the mouse is in
-            plot_width = plot_area['x1'] - plot_area['x0']
-            relative_x = (x_rel - plot_area['x0']) / plot_width
-            
-            # Calculate the index based on the relative position
-            index = int(relative_x * len(data_points))
-            # Ensure index is within bounds
-            index = max(0, min(index, len(data_points) - 1))
-            
-            # Get the data point at this index
-            point = data_points[index]
-            
-            # Format the timestamp
-            timestamp_str = point['timestamp'].strftime('%Y-%m-%d %H:%M')
-            
-            # Format the price with comma as thousand separator
-            price_str = format(point['price'], ',')
-            
-            # Get the world name if available
-            world_str = point.get('world', '')
-            world_text = f" ({world_str})" if world_str else ""
-            
-            # Create tooltip text
-            tooltip_text = f"{timestamp_str}\nPrice: {price_str}{world_text}"
-            
-            # Update tooltip text and position
-            tooltip.config(text=tooltip_text)
-            
-            # Position tooltip near the cursor but ensure it stays within the window
-            tooltip_x = event.x + 10
-            tooltip_y = event.y + 10
+            # Update tooltip text and place it next to the point
+            tooltip.config(text=hover.describe(index))
+            point_x, point_y = hover.get_position(index)
+            point_x, point_y = point_x / ratio, chart_height - point_y / ratio
+            tooltip_x = point_x + 10
+            tooltip_y = point_y + 10
             
             # Adjust position if tooltip would go off-screen
-            tooltip_width = len(tooltip_text) * 7  # Approximate width based on text length
-            tooltip_height = 40  # Approximate height
+            tooltip_width = tooltip.winfo_reqwidth()
+            tooltip_height = tooltip.winfo_reqheight()
             
             if tooltip_x + tooltip_width > chart_width:
-                tooltip_x = event.x - tooltip_width - 10
+                tooltip_x = point_x - tooltip_width - 10
             
             if tooltip_y + tooltip_height > chart_height:
-                tooltip_y = event.y - tooltip_height - 10
+                tooltip_y = point_y - tooltip_height - 10
             
             tooltip.place(x=tooltip_x, y=tooltip_y)
                 
@@ -404,9 +604,26 @@ def create_chart_tooltip(chart_placeholder, chart_frame):
             print(f"Error in chart hover detection: {e}")
             tooltip.place_forget()
     
+    # Define the motion handler function
+    def on_chart_motion(event, chart_data, tooltip):
+        state['event'] = event
+        state['chart_data'] = chart_data
+        if not state['scheduled']:
+            state['scheduled'] = True
+            tooltip.after(HOVER_THROTTLE_MS, show_hovered_point)
+    
     # Return the tooltip widget and the motion handler function
     return tooltip, on_chart_motion
 
+def _get_time_range_map():
+    # Time range texts only change with the language, so the lookup is built once per language
+    language = get_language()
+    time_ranges = _time_range_maps.get(language)
+    if time_ranges is None:
+        time_ranges = {get_text(key, default): days for days, key, default in TIME_RANGES}
+        _time_range_maps[language] = time_ranges
+    return time_ranges
+
 def get_time_range_days(time_range_text):
     """
     Convert a time range text to number of days.
@@ -417,22 +634,19 @@ def get_time_range_days(time_range_text):
     Returns:
         int: Number of days, or 0 for "All Time"
     """
-    # Get the English versions of the time range texts for comparison
-    time_24h = get_text("market.24_hours", "24 Hours")
-    time_7d = get_text("market.7_days", "7 Days")
-    time_30d = get_text("market.30_days", "30 Days")
-    time_90d = get_text("market.90_days", "90 Days")
-    time_all = get_text("market.all_time", "All Time")
-    
-    if time_range_text == time_24h:
-        return 1
-    elif time_range_text == time_7d:
-        return 7
-    elif time_range_text == time_30d:
-        return 30
-    elif time_range_text == time_90d:
-        return 90
-    elif time_range_text == time_all:
-        return 0  # 0 means all time
-    else:
-        return 7  # Default to 7 days
+    return _get_time_range_map().get(time_range_text, 7)  # Default to 7 days
+
+def get_time_range_text(days):
+    """
+    Convert a number of days to the time range text the charts are drawn with.
+    
+    Args:
+        days (int): Number of days, 1, 7, 30 or 90, or 0 for "All Time"
+        
+    Returns:
+        str: The translated time range text, "7 Days" for any other number
+    """
+    for range_days, key, default in TIME_RANGES:
+        if range_days == days:
+            return get_text(key, default)
+    return get_text("market.7_days", "7 Days")
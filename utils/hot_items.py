@@ -0,0 +1,216 @@
+import heapq
+import json
+import os
+import threading
+import time
+from api.universalis import get_aggregated_data, get_marketable_items, MAX_ITEMS_PER_REQUEST
+from utils.alert_book import get_min_listing_prices
+from utils.price_matrix import get_price_matrix
+
+# Path to the hot items cache file
+HOT_ITEMS_CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'hot_items.json')
+
+# Number of items kept on the leaderboard
+DEFAULT_TOP_K = 50
+
+# Number of aggregated requests made per refresh round
+DEFAULT_BATCHES_PER_ROUND = 10
+
+# Number of seconds between refresh rounds
+DEFAULT_REFRESH_INTERVAL = 30
+
+# Leaderboard rankings
+RANK_BY_VELOCITY = "velocity"
+RANK_BY_GIL_VOLUME = "gil_volume"
+
+# The cache file holds every location, so only one leaderboard reads and writes it at a time
+_cache_file_lock = threading.Lock()
+
+def _scoped_value(values, key):
+    # Use the most specific scope in an aggregated result: world, then data center, then region
+    for scope in ("world", "dc", "region"):
+        if (values or {}).get(scope):
+            return values[scope].get(key, 0) or 0
+    return 0
+
+def get_aggregated_stats(aggregated_result):
+    """
+    Get the sale velocity, average sale price and gil volume from an aggregated result.
+
+    Args:
+        aggregated_result (dict): An item's entry from get_aggregated_data
+
+    Returns:
+        dict: Dictionary with velocity (sales per day), average_price and gil_volume (gil per day)
+    """
+    velocity = 0
+    gil_volume = 0
+    for quality in ("nq", "hq"):
+        stats = aggregated_result.get(quality) or {}
+        quality_velocity = _scoped_value(stats.get("dailySaleVelocity"), "quantity")
+        velocity += quality_velocity
+        gil_volume += quality_velocity * _scoped_value(stats.get("averageSalePrice"), "price")
+    return {
+        "velocity": velocity,
+        "average_price": gil_volume / velocity if velocity else 0,
+        "gil_volume": gil_volume
+    }
+
+class HotItemsLeaderboard:
+    """
+    Market-wide leaderboard of the items that sell the most in a world or data center.
+
+    Stats for every marketable item are pulled from the aggregated endpoint, 100
+    items per request, a few batches per round so the whole catalog is refreshed
+    incrementally in the background. The first sweep runs without pauses. The stats are cached on disk, so a
+    leaderboard opens instantly with the results of the last run.
+    """
+    def __init__(self, location, top_k=DEFAULT_TOP_K, batches_per_round=DEFAULT_BATCHES_PER_ROUND,
+                 refresh_interval=DEFAULT_REFRESH_INTERVAL, cache_file=HOT_ITEMS_CACHE_FILE):
+        self.location = location
+        self.top_k = top_k
+        self.batches_per_round = batches_per_round
+        self.refresh_interval = refresh_interval
+        self.cache_file = cache_file
+        self.stats = {}
+        self.cursor = 0
+        self.sweeps = 0
+        self.updated_at = None
+        self.running = False
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.load()
+
+    def load(self):
+        """
+        Load the cached stats for this location.
+        """
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r') as f:
+                    cached = json.load(f).get(self.location, {})
+                self.stats = cached.get("stats", {})
+                self.cursor = cached.get("cursor", 0)
+                self.sweeps = cached.get("sweeps", 0)
+                self.updated_at = cached.get("updated_at")
+        except Exception as e:
+            print(f"Error loading hot items cache: {e}")
+
+    def save(self):
+        """
+        Save the stats for this location, keeping the cache of other locations.
+        """
+        try:
+            with _cache_file_lock:
+                cache = {}
+                if os.path.exists(self.cache_file):
+                    with open(self.cache_file, 'r') as f:
+                        cache = json.load(f)
+                with self._lock:
+                    cache[self.location] = {"stats": self.stats, "cursor": self.cursor, "sweeps": self.sweeps,
+                                              "updated_at": self.updated_at}
+                    data = json.dumps(cache)
+                # Replace the file in one step, so a write cut short never loses the other locations
+                temp_file = f"{self.cache_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    f.write(data)
+                os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            print(f"Error saving hot items cache: {e}")
+
+    def get_leaderboard(self, rank_by=RANK_BY_VELOCITY, k=None):
+        """
+        Get the top items.
+
+        Args:
+            rank_by (str, optional): RANK_BY_VELOCITY or RANK_BY_GIL_VOLUME
+            k (int, optional): The number of items, top_k if None
+
+        Returns:
+            list: Dictionaries with item_id, velocity, average_price and gil_volume, best first
+        """
+        with self._lock:
+            top = heapq.nlargest(k or self.top_k, self.stats.items(), key=lambda entry: entry[1][rank_by])
+        return [dict(stats, item_id=int(item_id)) for item_id, stats in top if stats[rank_by] > 0]
+
+    def refresh_round(self, item_ids):
+        """
+        Refresh the next batches_per_round batches of items, wrapping around at the end.
+
+        Args:
+            item_ids (list): The item IDs on the leaderboard, in a stable order
+
+        Returns:
+            int: The number of items refreshed
+        """
+        if not item_ids:
+            return 0
+        price_matrix = get_price_matrix()
+        refreshed = 0
+        for _ in range(self.batches_per_round):
+            if self._stop_event.is_set():
+                break
+            start = self.cursor
+            if start >= len(item_ids):
+                start = 0
+                self.sweeps += 1
+            batch = item_ids[start:start + MAX_ITEMS_PER_REQUEST]
+            results = get_aggregated_data(batch, self.location)
+            now = time.time()
+            with self._lock:
+                for item_id, result in results.items():
+                    stats = get_aggregated_stats(result)
+                    stats["updated_at"] = now
+                    self.stats[item_id] = stats
+                self.cursor = start + len(batch)
+                self.updated_at = now
+            for item_id, result in results.items():
+                nq_price, hq_price = get_min_listing_prices(result)
+                price_matrix.update_prices(item_id, self.location, nq_price, hq_price)
+            refreshed += len(batch)
+        return refreshed
+
+    def start(self, item_ids=None, on_update=None):
+        """
+        Refresh the leaderboard in the background until stop() is called.
+
+        Args:
+            item_ids (list, optional): The item IDs to rank, all marketable items if None
+            on_update (callable, optional): Called with the leaderboard after every round
+        """
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(item_ids, on_update), daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the background refresh.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the refresh thread to finish, no waiting if None
+        """
+        self.running = False
+        self._stop_event.set()
+        if timeout is not None and self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, item_ids, on_update):
+        if item_ids is None:
+            item_ids = get_marketable_items()
+        item_ids = sorted(int(item_id) for item_id in item_ids)
+        while not self._stop_event.is_set():
+            try:
+                if self.refresh_round(item_ids):
+                    self.save()
+                    # A stopped leaderboard's window may be gone already
+                    if on_update is not None and not self._stop_event.is_set():
+                        on_update(self)
+            except Exception as e:
+                print(f"Error refreshing hot items: {e}")
+            # Until the whole catalog was seen once, only the rate limiter slows the refresh down
+            self._stop_event.wait(self.refresh_interval if self.sweeps else 0)
+        self.running = False
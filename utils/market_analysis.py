@@ -1,127 +1,145 @@
-import requests
-import json
-import statistics
-import os
-import tkinter as tk
-from api.universalis import UNIVERSALIS_BASE_URL
-from api.xivapi import get_item_details
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from api.universalis import get_market_data, get_aggregated_data, get_data_center_topology
+from utils.alerts import item_requires_hq
+from utils.price_matrix import record_market_data
+
+# Number of arbitrage results kept in memory
+ARBITRAGE_CACHE_SIZE = 256
+
+# Above this many changed worlds, one region request is cheaper than a request per world
+MAX_WORLD_REFRESH = 4
+
+# Cached arbitrage results by (item ID, home world, region), least recently used first
+_arbitrage_cache = OrderedDict()
+_arbitrage_cache_lock = threading.Lock()
 
 # Custom print function
 def custom_print(text):
         print(f"[Market Analysis] {text}")
 
-def get_all_dc_data(item_id, data_centers):
+def partition_listings_by_world(listings):
     """
-    Get market data for an item across all data centers.
+    Split listings by world in a single pass, tracking the lowest NQ and HQ price per world.
     
     Args:
-        item_id (int): The ID of the item
-        data_centers (list): List of data center names
+        listings (list): Listings from a data center or region response
         
     Returns:
-        dict: Market data by data center
+        dict: Dictionary mapping world names to {"listings", "nq_min", "hq_min"}
     """
-    dc_data = {}
-    
-    for dc in data_centers:
-        try:
-            url = f"{UNIVERSALIS_BASE_URL}{dc}/{item_id}"
-            response = requests.get(url, timeout=30)
-            
-            if response.status_code == 200:
-                dc_data[dc] = response.json()
-        except Exception as e:
-            print(f"Error fetching data for {dc}: {e}")
+    worlds = {}
+    for listing in listings or []:
+        world = listing.get("worldName")
+        if world is None:
+            continue
+        entry = worlds.get(world)
+        if entry is None:
+            entry = worlds[world] = {"listings": [], "nq_min": float('inf'), "hq_min": float('inf')}
+        entry["listings"].append(listing)
+        price = listing["pricePerUnit"]
+        if listing.get("hq"):
+            if price < entry["hq_min"]:
+                entry["hq_min"] = price
+        elif price < entry["nq_min"]:
+            entry["nq_min"] = price
+    return worlds
+
+def get_world_price(world_entry, require_HQ=False):
+    """
+    Get the lowest price in a world from partition_listings_by_world output.
     
-    return dc_data
+    Args:
+        world_entry (dict): The world's entry
+        require_HQ (bool, optional): Only consider HQ listings
+        
+    Returns:
+        float: The lowest price, or inf if there are no matching listings
+    """
+    if require_HQ:
+        return world_entry["hq_min"]
+    return min(world_entry["nq_min"], world_entry["hq_min"])
 
-def get_world_data_in_dc(item_id, data_center):
+def get_region_world_minima(item_id, region, data_centers):
     """
-    Get market data for an item across all worlds in a data center.
+    Get the lowest NQ and HQ price per world across a region.
+    
+    One region-level request is tried first. If it fails, the data centers are
+    requested in parallel instead.
     
     Args:
         item_id (int): The ID of the item
-        data_center (str): The data center name
+        region (str): The region name
+        data_centers (list): The data centers in the region
         
     Returns:
-        dict: Market data by world
+        tuple: (worlds, sale_velocity) where worlds maps world names to
+            {"listings", "nq_min", "hq_min"} and sale_velocity is the region's regularSaleVelocity
     """
-    try:
-        # First get the data center data to get the list of worlds
-        dc_url = f"{UNIVERSALIS_BASE_URL}{data_center}/{item_id}"
-        dc_response = requests.get(dc_url, timeout=30)
-        
-        if dc_response.status_code != 200:
-            return {}
-            
-        dc_data = dc_response.json()
-        
-        # Extract unique worlds from the listings
-        worlds = set()
-        for listing in dc_data.get("listings", []):
-            if "worldName" in listing:
-                worlds.add(listing["worldName"])
-        
-        # Get data for each world
-        world_data = {}
-        for world in worlds:
-            # Filter the listings for this world
-            world_listings = [listing for listing in dc_data.get("listings", []) if listing.get("worldName") == world]
-            
-            # Create a data structure similar to the API response
-            world_data[world] = {
-                "listings": world_listings,
-                "worldName": world,
-                "dcName": data_center,
-                "averagePrice": dc_data.get("averagePrice", 0),
-                "averagePriceNQ": dc_data.get("averagePriceNQ", 0),
-                "averagePriceHQ": dc_data.get("averagePriceHQ", 0),
-                "regularSaleVelocity": dc_data.get("regularSaleVelocity", 0),
-                "nqSaleVelocity": dc_data.get("nqSaleVelocity", 0),
-                "hqSaleVelocity": dc_data.get("hqSaleVelocity", 0)
-            }
-            
-            # Calculate world-specific average price
-            if world_listings:
-                prices = [listing["pricePerUnit"] for listing in world_listings]
-                world_data[world]["currentAveragePrice"] = sum(prices) / len(prices)
-            else:
-                world_data[world]["currentAveragePrice"] = 0
+    region_data = get_market_data(item_id, region)
+    if region_data.get("listings") is not None:
+        record_market_data(item_id, region, region_data)
+        return partition_listings_by_world(region_data["listings"]), region_data.get("regularSaleVelocity", 0)
+    
+    custom_print(f"Region request for {region} failed, requesting {len(data_centers)} data centers in parallel")
+    worlds = {}
+    sale_velocity = 0
+    with ThreadPoolExecutor(max_workers=max(1, len(data_centers))) as executor:
+        for dc, dc_data in zip(data_centers, executor.map(lambda dc: get_market_data(item_id, dc), data_centers)):
+            record_market_data(item_id, dc, dc_data)
+            worlds.update(partition_listings_by_world(dc_data.get("listings")))
+            sale_velocity += dc_data.get("regularSaleVelocity", 0)
+    return worlds, sale_velocity
+
+def get_world_upload_times(item_id, region, world_names):
+    """
+    Get the last upload time of every world in a region for an item with one aggregated request.
+    
+    Args:
+        item_id (int): The ID of the item
+        region (str): The region name
+        world_names (dict): Mapping of world IDs to world names
         
-        return world_data
-    except Exception as e:
-        print(f"Error fetching world data: {e}")
+    Returns:
+        dict: Upload times in milliseconds by world name, empty if the request failed
+    """
+    result = get_aggregated_data([item_id], region).get(str(item_id))
+    if not result:
         return {}
+    return {world_names[upload["worldId"]]: upload.get("timestamp", 0)
+            for upload in result.get("worldUploadTimes") or [] if upload.get("worldId") in world_names}
 
-def get_lowest_price_in_dc(world_data, current_world=None, require_HQ=False):
-    # Find the world with the lowest price
-    lowest_price = float('inf')
-    lowest_price_world = None
+def refresh_world_prices(item_id, worlds):
+    """
+    Fetch the listings of individual worlds in parallel into the price matrix.
     
-    for world, data in world_data.items():
-        if world == current_world or not data.get("listings"):
-            continue
-            
-        ## if require_HQ is True, only consider HQ listings
-        filter_listings = [];
-        if require_HQ:
-            # print(f"filtering listings to only HQ items for {current_world}")
-            filter_listings = [listing for listing in data.get("listings", []) if listing.get("hq")]
-        else:
-            filter_listings = data.get("listings", [])
-        
-        # find lowest price from filtered listings
-        world_price = min(filter_listings, key=lambda x: x["pricePerUnit"])["pricePerUnit"]
+    Args:
+        item_id (int): The ID of the item
+        worlds (list): The world names
         
-        if world_price < lowest_price:
-            lowest_price = world_price
-            lowest_price_world = world
-            
-    return lowest_price, lowest_price_world
+    Returns:
+        dict: {"nq_min", "hq_min"} by world name for the worlds that were fetched successfully
+    """
+    refreshed = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(worlds))) as executor:
+        for world, world_data in zip(worlds, executor.map(lambda world: get_market_data(item_id, world), worlds)):
+            if world_data.get("listings") is not None:
+                record_market_data(item_id, world, world_data)
+                # World responses do not name the world on each listing
+                listings = [dict(listing, worldName=world) for listing in world_data["listings"]]
+                entry = partition_listings_by_world(listings).get(world, {"nq_min": float('inf'), "hq_min": float('inf')})
+                refreshed[world] = {"nq_min": entry["nq_min"], "hq_min": entry["hq_min"]}
+    return refreshed
 
 def find_arbitrage_opportunities(item_id, current_world, data_center):
     """
-    Find arbitrage opportunities for an item across worlds in a data center.
+    Find arbitrage opportunities for an item across all worlds in the data center's region.
+    
+    Results are cached per (item, home world, region) with the lowest prices and the
+    upload time of each world they were computed from. A cached result is returned as
+    long as no world received a newer upload, otherwise only the worlds that changed
+    are fetched again.
     
     Args:
         item_id (int): The ID of the item
@@ -129,87 +147,102 @@ def find_arbitrage_opportunities(item_id, current_world, data_center):
         data_center (str): The data center name
         
     Returns:
-        dict: Arbitrage opportunities
+        dict: Arbitrage opportunities. Its sale_velocity is the region's, as the
+            listings are fetched with one region request instead of per data center.
     """
     try:
-        # Get market data for all worlds in the data center
-        world_data = get_world_data_in_dc(item_id, data_center)
-        item_details = get_item_details(item_id)
-        require_HQ = False
-        if item_details and "CanBeHq" in item_details:
-            require_HQ = item_details["CanBeHq"] == 1 # require HQ if it can be HQ
-
         # Handle current_world = "All"
-        if current_world == "All":
+        if current_world in (None, "All"):
             return None
         
-        # Get the current world's lowest price
-        current_world_data = world_data[current_world]
-        if not current_world_data.get("listings"):
+        topology = get_data_center_topology()
+        region = topology["dc_to_region"].get(data_center)
+        if region is None:
+            custom_print(f"Unknown data center {data_center}")
             return None
-            
-        current_world_price = current_world_data["listings"][0]["pricePerUnit"]
-        ## if require_HQ is True, only consider HQ listings
-        filter_listings = [];
-        if require_HQ:
-            print("filtering listings to only HQ items")
-            filter_listings = [listing for listing in current_world_data.get("listings", []) if listing.get("hq")]
-        else:
-            filter_listings = current_world_data.get("listings", [])
+        data_centers = topology["regions"][region]
         
-        # find lowest price from filtered listings
-        current_world_price = min(filter_listings, key=lambda x: x["pricePerUnit"])["pricePerUnit"]
-
-        current_dc_lowest_price, current_dc_lowest_price_world = get_lowest_price_in_dc(world_data, current_world, require_HQ)
-        #custom_print(f"Current world: {current_world}, Current price: {current_world_price}, DC lowest price: {current_dc_lowest_price}, DC lowest price world: {current_dc_lowest_price_world}")
-
-        dc_data = {}
-        for dc in ["Aether", "Primal", "Crystal", "Dynamis"]:
-            if dc != data_center:
-                dc_world_data = get_world_data_in_dc(item_id, dc)
-                dc_lowest_price, dc_lowest_price_world = get_lowest_price_in_dc(dc_world_data, current_world)
-                dc_data[dc] = {
-                    "dc_name": dc,
-                    "dc_lowest_price": dc_lowest_price,
-                    "dc_lowest_price_world": dc_lowest_price_world
-                }
-                #custom_print(f"DC: {dc}, DC lowest price: {dc_lowest_price}, DC lowest price world: {dc_lowest_price_world}")
+        key = (str(item_id), current_world, region)
+        upload_times = get_world_upload_times(item_id, region, topology["world_names"])
+        with _arbitrage_cache_lock:
+            cached = _arbitrage_cache.get(key)
         
-        dc_data[data_center] = {
-            "dc_name": data_center,
-            "dc_lowest_price": current_dc_lowest_price,
-            "dc_lowest_price_world": current_dc_lowest_price_world
-        }
-
-        # find lowest price across all DCs
-        lowest_price = current_world_price
-        lowest_price_world = current_world
-        lowest_price_dc = data_center
-        for dc in dc_data:
-            if dc_data[dc]["dc_lowest_price"] < lowest_price:
-                lowest_price = dc_data[dc]["dc_lowest_price"]
-                lowest_price_world = dc_data[dc]["dc_lowest_price_world"]
-                lowest_price_dc = dc_data[dc]["dc_name"]
-                custom_print(f"Lowest price found in {dc}: {lowest_price} gil in {lowest_price_world}")
+        changed = None
+        if cached is not None and upload_times:
+            changed = [world for world, upload_time in upload_times.items()
+                       if upload_time > cached["upload_times"].get(world, 0)]
+            if not changed:
+                custom_print(f"No new uploads for item {item_id} in {region}, reusing the cached arbitrage result")
+                with _arbitrage_cache_lock:
+                    _arbitrage_cache.move_to_end(key)
+                return cached["result"]
         
-        # Check if there's a significant price difference (at least 10%)
-        if lowest_price_world and lowest_price < current_world_price * 0.9:
-            # Calculate potential profit
-            potential_profit = current_world_price - lowest_price
-            profit_percentage = (potential_profit / lowest_price) * 100
+        if changed is not None and len(changed) <= MAX_WORLD_REFRESH:
+            # Only fetch the worlds that received uploads since the cached result
+            custom_print(f"Refreshing {len(changed)} changed worlds for item {item_id}: {', '.join(changed)}")
+            refreshed = refresh_world_prices(item_id, changed)
+            require_HQ = cached["require_HQ"]
+            sale_velocity = cached["sale_velocity"]
+            worlds = dict(cached["worlds"])
+            worlds.update(refreshed)
+            computed_upload_times = dict(cached["upload_times"])
+            computed_upload_times.update({world: upload_times[world] for world in refreshed})
+        else:
+            # Fetch the listings and the item details at the same time
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                worlds_future = executor.submit(get_region_world_minima, item_id, region, data_centers)
+                require_HQ_future = executor.submit(item_requires_hq, item_id)
+                worlds, sale_velocity = worlds_future.result()
+                require_HQ = require_HQ_future.result() # require HQ if it can be HQ
+            if not worlds:
+                return None
+            # Only the lowest prices are kept with the cached result
+            worlds = {world: {"nq_min": entry["nq_min"], "hq_min": entry["hq_min"]} for world, entry in worlds.items()}
+            computed_upload_times = upload_times
+        
+        result = None
+        
+        # Get the current world's lowest price
+        world_prices = {world: get_world_price(entry, require_HQ) for world, entry in worlds.items()}
+        current_world_price = world_prices.get(current_world, float('inf'))
+        if current_world_price != float('inf'):
+            # Find the cheapest other world in the region
+            lowest_price, lowest_price_world = min(((price, world) for world, price in world_prices.items()
+                                                    if world != current_world), default=(float('inf'), None))
             
-            return {
-                "current_world": current_world,
-                "current_price": current_world_price,
-                "lowest_price_world": lowest_price_world,
-                "lowest_price_dc": lowest_price_dc,
-                "lowest_price": lowest_price,
-                "potential_profit": potential_profit,
-                "profit_percentage": profit_percentage,
-                "sale_velocity": current_world_data.get("regularSaleVelocity", 0)
+            # Check if there's a significant price difference (at least 10%)
+            if lowest_price_world is not None and lowest_price < current_world_price * 0.9:
+                lowest_price_dc = topology["world_to_dc"].get(lowest_price_world)
+                custom_print(f"Lowest price found in {lowest_price_dc}: {lowest_price} gil in {lowest_price_world}")
+                
+                # Calculate potential profit
+                potential_profit = current_world_price - lowest_price
+                profit_percentage = (potential_profit / lowest_price) * 100
+                
+                result = {
+                    "current_world": current_world,
+                    "current_price": current_world_price,
+                    "lowest_price_world": lowest_price_world,
+                    "lowest_price_dc": lowest_price_dc,
+                    "lowest_price": lowest_price,
+                    "potential_profit": potential_profit,
+                    "profit_percentage": profit_percentage,
+                    "sale_velocity": sale_velocity
+                }
+        
+        with _arbitrage_cache_lock:
+            _arbitrage_cache[key] = {
+                "worlds": worlds,
+                "upload_times": computed_upload_times,
+                "require_HQ": require_HQ,
+                "sale_velocity": sale_velocity,
+                "result": result
             }
+            _arbitrage_cache.move_to_end(key)
+            while len(_arbitrage_cache) > ARBITRAGE_CACHE_SIZE:
+                _arbitrage_cache.popitem(last=False)
         
-        return None
+        return result
     except Exception as e:
         print(f"Error finding arbitrage opportunities: {e}")
         return None
@@ -231,4 +264,4 @@ def is_hot_item(market_data, threshold=5.0):
         return sale_velocity >= threshold
     except Exception as e:
         print(f"Error determining if item is hot: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,309 @@
+import datetime
+import json
+import queue
+import threading
+import time
+import requests
+from utils.alerts import format_alert_message
+from utils.discord_webhook import get_delivery_queue
+
+# Default number of notifications each sink buffers before overflow is coalesced
+DEFAULT_SINK_QUEUE_SIZE = 50
+
+# Number of coalesced messages quoted in an overflow summary
+SUMMARY_SAMPLE_SIZE = 5
+
+# Seconds an idle worker waits for a notification before checking whether its sink was stopped
+WORKER_POLL_INTERVAL = 0.5
+
+class NotificationSink:
+    """
+    Base class for a notification destination with its own worker and bounded queue.
+
+    submit() never blocks. When the queue is full the notification is coalesced
+    and, once the queue drains, a single summary message is sent in its place.
+    Subclasses implement send().
+    """
+    name = "sink"
+
+    def __init__(self, max_queue=DEFAULT_SINK_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._overflow = []
+        self._overflow_count = 0
+        self.metrics = {
+            "submitted": 0,
+            "delivered": 0,
+            "failed": 0,
+            "coalesced": 0,
+            "summaries": 0,
+            "last_latency": 0.0,
+            "max_latency": 0.0,
+            "total_latency": 0.0
+        }
+        self.running = True
+        self._thread = threading.Thread(target=self._worker, name=f"notifier-{self.name}", daemon=True)
+        self._thread.start()
+
+    def send(self, notification):
+        """
+        Deliver one notification.
+
+        Args:
+            notification (dict): The notification with title, message, created_at and alert
+
+        Returns:
+            bool: True if the notification was delivered
+        """
+        raise NotImplementedError
+
+    def submit(self, notification):
+        """
+        Queue a notification without blocking.
+
+        Args:
+            notification (dict): The notification to queue
+        """
+        with self._lock:
+            self.metrics["submitted"] += 1
+        try:
+            self._queue.put_nowait(notification)
+        except queue.Full:
+            with self._lock:
+                self.metrics["coalesced"] += 1
+                self._overflow_count += 1
+                if len(self._overflow) < SUMMARY_SAMPLE_SIZE:
+                    self._overflow.append(notification["message"])
+
+    def stop(self, timeout=2):
+        """
+        Stop the worker after the notifications already queued are handled.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the worker
+        """
+        self.running = False
+        # A full queue must not block the caller, the worker then exits once it drained the queue
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def get_metrics(self):
+        """
+        Get delivery counters and latency for this sink.
+
+        Returns:
+            dict: The sink metrics, latency in seconds
+        """
+        with self._lock:
+            metrics = dict(self.metrics)
+        handled = metrics["delivered"] + metrics["failed"]
+        metrics["avg_latency"] = metrics.pop("total_latency") / handled if handled else 0.0
+        metrics["queued"] = self._queue.qsize()
+        return metrics
+
+    def _worker(self):
+        while True:
+            try:
+                notification = self._queue.get(timeout=WORKER_POLL_INTERVAL)
+            except queue.Empty:
+                if not self.running:
+                    return
+                continue
+            if notification is None:
+                return
+            self._deliver(notification)
+            if self._queue.empty():
+                summary = self._take_summary()
+                if summary is not None:
+                    self._deliver(summary)
+                    with self._lock:
+                        self.metrics["summaries"] += 1
+
+    def _deliver(self, notification):
+        try:
+            delivered = self.send(notification)
+        except Exception as e:
+            print(f"Error sending {self.name} notification: {e}")
+            delivered = False
+        latency = time.time() - notification["created_at"]
+        with self._lock:
+            self.metrics["delivered" if delivered else "failed"] += 1
+            self.metrics["last_latency"] = latency
+            self.metrics["max_latency"] = max(self.metrics["max_latency"], latency)
+            self.metrics["total_latency"] += latency
+
+    def _take_summary(self):
+        with self._lock:
+            if not self._overflow_count:
+                return None
+            count, samples = self._overflow_count, self._overflow
+            self._overflow_count, self._overflow = 0, []
+        message = "\n".join(samples)
+        if count > len(samples):
+            message += f"\n... and {count - len(samples)} more"
+        return create_notification(f"PyFFUniverse - {count} more price alerts", message)
+
+class DesktopSink(NotificationSink):
+    """
+    Shows notifications with a desktop notification function, e.g. plyer or a toast notifier.
+    """
+    name = "desktop"
+
+    def __init__(self, notify_func, max_queue=DEFAULT_SINK_QUEUE_SIZE):
+        self.notify_func = notify_func
+        super().__init__(max_queue)
+
+    def send(self, notification):
+        self.notify_func(notification["title"], notification["message"])
+        return True
+
+class DiscordSink(NotificationSink):
+    """
+    Hands notifications to a DiscordDeliveryQueue, which batches and rate-limits them.
+    """
+    name = "discord"
+
+    def __init__(self, delivery_queue=None, max_queue=DEFAULT_SINK_QUEUE_SIZE):
+        self.delivery_queue = delivery_queue or get_delivery_queue()
+        super().__init__(max_queue)
+
+    def send(self, notification):
+        return self.delivery_queue.enqueue(notification["title"], notification["message"], color=0xFF5733)
+
+class LogFileSink(NotificationSink):
+    """
+    Appends notifications to a log file, one line per notification.
+    """
+    name = "log"
+
+    def __init__(self, path, max_queue=DEFAULT_SINK_QUEUE_SIZE):
+        self.path = path
+        super().__init__(max_queue)
+
+    def send(self, notification):
+        timestamp = datetime.datetime.fromtimestamp(notification["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+        message = notification["message"].replace("\n", " | ")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"{timestamp} {notification['title']}: {message}\n")
+        return True
+
+class HttpCallbackSink(NotificationSink):
+    """
+    Posts notifications as JSON to a local HTTP callback URL.
+    """
+    name = "http"
+
+    def __init__(self, url, timeout=5, max_queue=DEFAULT_SINK_QUEUE_SIZE):
+        self.url = url
+        self.timeout = timeout
+        self._session = requests.Session()
+        super().__init__(max_queue)
+
+    def send(self, notification):
+        payload = {
+            "title": notification["title"],
+            "message": notification["message"],
+            "created_at": notification["created_at"],
+            "alert": notification.get("alert")
+        }
+        response = self._session.post(self.url, data=json.dumps(payload),
+                                      headers={"Content-Type": "application/json"}, timeout=self.timeout)
+        return 200 <= response.status_code < 300
+
+def create_notification(title, message, alert=None):
+    """
+    Create a notification to dispatch.
+
+    Args:
+        title (str): The notification title
+        message (str): The notification message
+        alert (dict, optional): The triggered alert the notification is about
+
+    Returns:
+        dict: The notification
+    """
+    return {"title": title, "message": message, "alert": alert, "created_at": time.time()}
+
+class NotificationDispatcher:
+    """
+    Fans notifications out to a set of sinks without blocking the caller.
+    """
+    def __init__(self, sinks=None):
+        self.sinks = list(sinks or [])
+
+    def add_sink(self, sink):
+        """
+        Add a sink to the dispatcher.
+
+        Args:
+            sink (NotificationSink): The sink to add
+        """
+        self.sinks.append(sink)
+
+    def dispatch(self, title, message, alert=None):
+        """
+        Queue a notification on every sink.
+
+        Args:
+            title (str): The notification title
+            message (str): The notification message
+            alert (dict, optional): The triggered alert the notification is about
+        """
+        notification = create_notification(title, message, alert)
+        for sink in self.sinks:
+            sink.submit(notification)
+
+    def notify_alerts(self, triggered_alerts):
+        """
+        Queue a price alert notification for each triggered alert.
+
+        Args:
+            triggered_alerts (list): List of triggered alerts
+        """
+        for alert in triggered_alerts:
+            self.dispatch("PyFFUniverse - Price Alert", format_alert_message(alert), alert)
+
+    def get_metrics(self):
+        """
+        Get the metrics of every sink.
+
+        Returns:
+            dict: Sink metrics by sink name
+        """
+        return {sink.name: sink.get_metrics() for sink in self.sinks}
+
+    def stop(self):
+        """
+        Stop every sink.
+        """
+        for sink in self.sinks:
+            sink.stop()
+
+def create_dispatcher_from_settings(settings, desktop_notify=None, discord_queue=None):
+    """
+    Create a dispatcher with the sinks enabled in settings.json.
+
+    Discord is used when a webhook URL is set, the log file when notification_log_file
+    is set and the HTTP callback when notification_http_callback is set.
+
+    Args:
+        settings (dict): The user settings
+        desktop_notify (callable, optional): Function showing a desktop notification, taking a title and message
+        discord_queue (DiscordDeliveryQueue, optional): Delivery queue to use instead of the shared one
+
+    Returns:
+        NotificationDispatcher: The dispatcher
+    """
+    dispatcher = NotificationDispatcher()
+    if desktop_notify is not None:
+        dispatcher.add_sink(DesktopSink(desktop_notify))
+    if settings.get("discord_webhook_url"):
+        dispatcher.add_sink(DiscordSink(discord_queue))
+    if settings.get("notification_log_file"):
+        dispatcher.add_sink(LogFileSink(settings["notification_log_file"]))
+    if settings.get("notification_http_callback"):
+        dispatcher.add_sink(HttpCallbackSink(settings["notification_http_callback"]))
+    return dispatcher
@@ -0,0 +1,350 @@
+import bisect
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from api.universalis import get_data_center_topology
+
+# Number of items the order book keeps listings for, the least recently updated items are dropped first
+DEFAULT_ORDER_BOOK_ITEMS = 2000
+
+# Number of seconds an item's listings are kept after they were last updated
+DEFAULT_ORDER_BOOK_MAX_AGE = 3600
+
+class OrderBook:
+    """
+    Index of market listings per (item, world), kept sorted by price.
+
+    Each world holds separate NQ and HQ lists of (price, listing ID), maintained
+    with bisect so a single listing is added or removed in O(log n) comparisons.
+    For every data center and region a view of the cheapest price per world is
+    kept sorted the same way and updated whenever a world's cheapest listing
+    changes. The cheapest listing in a location, with or without one world
+    excluded, is then read from the front of a view instead of scanning every
+    listing.
+
+    Items whose listings were not updated for max_age seconds are dropped, and
+    so are the least recently updated items beyond max_items.
+    """
+    def __init__(self, topology=None, max_items=DEFAULT_ORDER_BOOK_ITEMS, max_age=DEFAULT_ORDER_BOOK_MAX_AGE):
+        """
+        Create an empty order book.
+
+        Args:
+            topology (dict, optional): The result of get_data_center_topology, fetched on first use if None
+            max_items (int, optional): The number of items to keep listings for
+            max_age (float, optional): Seconds an item's listings are kept after their last update
+        """
+        self._topology = topology
+        self.max_items = max_items
+        self.max_age = max_age
+        self._world_locations = None
+        self._books = {}      # (item_id, world) -> {"nq": [(price, listing_id)], "hq": [...]}
+        self._listings = {}   # (item_id, world) -> {listing_id: listing}
+        self._views = {}      # (item_id, location, quality) -> [(price, world)]
+        self._items = OrderedDict()  # item_id -> (last update time, {world}), least recently updated first
+        self._lock = threading.RLock()
+
+    def replace_world(self, item_id, world, listings):
+        """
+        Replace all listings of an item in one world, e.g. after a fetch.
+
+        Args:
+            item_id (int): The ID of the item
+            world (str): The world name
+            listings (list): The world's current listings
+        """
+        key = (str(item_id), world)
+        with self._lock:
+            old_heads = self._heads(key)
+            book = {"nq": [], "hq": []}
+            by_id = {}
+            for listing in listings:
+                listing_id = _listing_id(listing)
+                by_id[listing_id] = dict(listing, worldName=world)
+                book["hq" if listing.get("hq") else "nq"].append((listing["pricePerUnit"], listing_id))
+            book["nq"].sort()
+            book["hq"].sort()
+            self._books[key] = book
+            self._listings[key] = by_id
+            self._update_views(key, old_heads)
+            self._touch(key)
+
+    def update_market_data(self, item_id, location, market_data, worlds=None):
+        """
+        Replace the listings of every world covered by a market data response.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world, data center or region the data was fetched from
+            market_data (dict): The market data response
+            worlds (list, optional): The worlds the response covers, so worlds without
+                listings are cleared. Only the worlds with listings are replaced if None.
+        """
+        listings = market_data.get("listings")
+        if listings is None:
+            return
+        # World responses do not name the world on each listing
+        if "worldName" in market_data:
+            self.replace_world(item_id, location, listings)
+            return
+
+        by_world = {}
+        for listing in listings:
+            if listing.get("worldName") is not None:
+                by_world.setdefault(listing["worldName"], []).append(listing)
+        with self._lock:
+            for world in set(worlds or []) | set(by_world):
+                self.replace_world(item_id, world, by_world.get(world, []))
+
+    def add_listing(self, item_id, world, listing):
+        """
+        Add or update a single listing.
+
+        Args:
+            item_id (int): The ID of the item
+            world (str): The world name
+            listing (dict): The listing
+        """
+        key = (str(item_id), world)
+        listing_id = _listing_id(listing)
+        with self._lock:
+            old_heads = self._heads(key)
+            self._remove(key, listing_id)
+            book = self._books.setdefault(key, {"nq": [], "hq": []})
+            bisect.insort(book["hq" if listing.get("hq") else "nq"], (listing["pricePerUnit"], listing_id))
+            self._listings.setdefault(key, {})[listing_id] = dict(listing, worldName=world)
+            self._update_views(key, old_heads)
+            self._touch(key)
+
+    def remove_listing(self, item_id, world, listing):
+        """
+        Remove a single listing, e.g. when it sold or was taken down.
+
+        Args:
+            item_id (int): The ID of the item
+            world (str): The world name
+            listing (dict): The listing, or its listing ID
+        """
+        key = (str(item_id), world)
+        listing_id = listing if isinstance(listing, str) else _listing_id(listing)
+        with self._lock:
+            old_heads = self._heads(key)
+            self._remove(key, listing_id)
+            self._update_views(key, old_heads)
+            self._touch(key)
+
+    def apply_event(self, event):
+        """
+        Apply a Universalis websocket event (listings/add or listings/remove).
+
+        Args:
+            event (dict): The event with "event", "item", "world" (world ID) and "listings"
+        """
+        world = self._get_topology()["world_names"].get(event.get("world"))
+        if world is None:
+            return
+        if event.get("event") == "listings/add":
+            for listing in event.get("listings", []):
+                self.add_listing(event["item"], world, listing)
+        elif event.get("event") == "listings/remove":
+            for listing in event.get("listings", []):
+                self.remove_listing(event["item"], world, listing)
+
+    def cheapest(self, item_id, location, require_hq=False, exclude_world=None):
+        """
+        Get the cheapest listing of an item in a world, data center or region.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world, data center or region name
+            require_hq (bool, optional): Only consider HQ listings
+            exclude_world (str, optional): A world to leave out, e.g. the home world
+
+        Returns:
+            dict: The cheapest listing with its worldName, or None if there is none
+        """
+        item_id = str(item_id)
+        qualities = ("hq",) if require_hq else ("nq", "hq")
+        with self._lock:
+            self._evict()
+            best = None
+            for quality in qualities:
+                world = self._cheapest_world(item_id, location, quality, exclude_world)
+                if world is None:
+                    continue
+                price, listing_id = self._books[(item_id, world)][quality][0]
+                if best is None or price < best[0]:
+                    best = (price, (item_id, world), listing_id)
+            if best is None:
+                return None
+            return self._listings[best[1]][best[2]]
+
+    def merged_listings(self, item_id, location, require_hq=False, exclude_world=None):
+        """
+        Get the listings of an item across a location, cheapest first.
+
+        The sorted per-world lists are merged lazily with heapq.merge, so taking
+        the first few listings only compares the front of each list.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world, data center or region name
+            require_hq (bool, optional): Only include HQ listings
+            exclude_world (str, optional): A world to leave out
+
+        Returns:
+            iterator: The listings, cheapest first
+        """
+        item_id = str(item_id)
+        qualities = ("hq",) if require_hq else ("nq", "hq")
+        with self._lock:
+            self._evict()
+            sources = []
+            for world in self._location_worlds(location):
+                key = (item_id, world)
+                if world == exclude_world or key not in self._books:
+                    continue
+                listings = dict(self._listings[key])
+                for quality in qualities:
+                    sources.append([(price, listing_id, listings) for price, listing_id in self._books[key][quality]])
+        return (listings[listing_id] for _, listing_id, listings in heapq.merge(*sources, key=lambda entry: entry[:2]))
+
+    def get_world_listings(self, item_id, location, require_hq=False):
+        """
+        Get the listings of an item in each world of a location, each list cheapest first.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world, data center or region name
+            require_hq (bool, optional): Only include HQ listings
+
+        Returns:
+            dict: Lists of listings by world name, worlds without listings are left out
+        """
+        item_id = str(item_id)
+        world_listings = {}
+        with self._lock:
+            self._evict()
+            for world in self._location_worlds(location):
+                key = (item_id, world)
+                if key not in self._books:
+                    continue
+                listings = self._listings[key]
+                if require_hq:
+                    entries = self._books[key]["hq"]
+                else:
+                    entries = list(heapq.merge(self._books[key]["nq"], self._books[key]["hq"]))
+                if entries:
+                    world_listings[world] = [listings[listing_id] for _, listing_id in entries]
+        return world_listings
+
+    def _touch(self, key):
+        item_id, world = key
+        entry = self._items.pop(item_id, None)
+        worlds = entry[1] if entry else set()
+        worlds.add(world)
+        self._items[item_id] = (time.time(), worlds)
+        self._evict()
+
+    def _evict(self):
+        expired = time.time() - self.max_age
+        while self._items:
+            item_id, (updated, worlds) = next(iter(self._items.items()))
+            if len(self._items) <= self.max_items and updated >= expired:
+                break
+            del self._items[item_id]
+            for world in worlds:
+                self._books.pop((item_id, world), None)
+                self._listings.pop((item_id, world), None)
+                for location in self._get_world_locations().get(world, []):
+                    for quality in ("nq", "hq"):
+                        self._views.pop((item_id, location, quality), None)
+
+    def _cheapest_world(self, item_id, location, quality, exclude_world):
+        if (item_id, location) in self._books:
+            if location == exclude_world or not self._books[(item_id, location)][quality]:
+                return None
+            return location
+        # The world excluded can only be at the front, so at most two entries are read
+        for _, world in self._views.get((item_id, location, quality), [])[:2]:
+            if world != exclude_world:
+                return world
+        return None
+
+    def _heads(self, key):
+        book = self._books.get(key)
+        if book is None:
+            return {"nq": None, "hq": None}
+        return {quality: entries[0][0] if entries else None for quality, entries in book.items()}
+
+    def _update_views(self, key, old_heads):
+        item_id, world = key
+        new_heads = self._heads(key)
+        for quality in ("nq", "hq"):
+            old, new = old_heads[quality], new_heads[quality]
+            if old == new:
+                continue
+            for location in self._get_world_locations().get(world, []):
+                view = self._views.setdefault((item_id, location, quality), [])
+                if old is not None:
+                    index = bisect.bisect_left(view, (old, world))
+                    if index < len(view) and view[index] == (old, world):
+                        view.pop(index)
+                if new is not None:
+                    bisect.insort(view, (new, world))
+
+    def _remove(self, key, listing_id):
+        listing = self._listings.get(key, {}).pop(listing_id, None)
+        if listing is None:
+            return
+        entries = self._books[key]["hq" if listing.get("hq") else "nq"]
+        entry = (listing["pricePerUnit"], listing_id)
+        index = bisect.bisect_left(entries, entry)
+        if index < len(entries) and entries[index] == entry:
+            entries.pop(index)
+
+    def _location_worlds(self, location):
+        topology = self._get_topology()
+        if location in topology["data_centers"]:
+            return topology["data_centers"][location]
+        if location in topology["regions"]:
+            return [world for dc in topology["regions"][location] for world in topology["data_centers"].get(dc, [])]
+        return [location]
+
+    def _get_topology(self):
+        # An empty topology means the request failed, so it is requested again next time
+        if not self._topology or not self._topology["world_to_dc"]:
+            self._topology = get_data_center_topology()
+        return self._topology
+
+    def _get_world_locations(self):
+        if not self._world_locations:
+            topology = self._get_topology()
+            self._world_locations = {world: [location for location in (dc, topology["dc_to_region"].get(dc)) if location]
+                                     for world, dc in topology["world_to_dc"].items()}
+        return self._world_locations
+
+def _listing_id(listing):
+    listing_id = listing.get("listingID")
+    if listing_id:
+        return str(listing_id)
+    # Older cached listings have no ID, identify them by their retainer and price
+    return f"{listing.get('retainerName')}:{listing.get('pricePerUnit')}:{listing.get('quantity')}"
+
+# Shared order book, fed by every fetch in the application
+_order_book = None
+_order_book_lock = threading.Lock()
+
+def get_order_book():
+    """
+    Get the shared order book.
+
+    Returns:
+        OrderBook: The shared order book
+    """
+    global _order_book
+    with _order_book_lock:
+        if _order_book is None:
+            _order_book = OrderBook()
+        return _order_book
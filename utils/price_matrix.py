@@ -0,0 +1,303 @@
+import threading
+import numpy as np
+from api.universalis import get_data_center_topology
+from utils.order_book import get_order_book
+
+# Initial capacity of a price matrix, it doubles as items and locations are added
+DEFAULT_ITEM_CAPACITY = 1024
+DEFAULT_LOCATION_CAPACITY = 16
+
+class PriceMatrix:
+    """
+    In-memory matrix of market state per (item, location), held as NumPy arrays.
+
+    Each cell holds the lowest NQ price, lowest HQ price and listing count last
+    seen for an item in a world, data center or region. Cells are updated
+    incrementally as fetches land, and cross-world questions such as the
+    cheapest world per item or the items with a large price spread are answered
+    with a few array operations over the whole catalog. Queries never add rows,
+    items the matrix has not seen are left out of their results.
+    """
+    def __init__(self, item_capacity=DEFAULT_ITEM_CAPACITY, location_capacity=DEFAULT_LOCATION_CAPACITY):
+        self.item_ids = []
+        self.locations = []
+        self.item_index = {}
+        self.location_index = {}
+        self._lock = threading.RLock()
+
+        shape = (item_capacity, location_capacity)
+        self.nq_min = np.full(shape, np.nan)
+        self.hq_min = np.full(shape, np.nan)
+        self.listing_count = np.zeros(shape, dtype=np.int32)
+        self.is_world = np.zeros(location_capacity, dtype=bool)
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    def update_prices(self, item_id, location, nq_price, hq_price, listing_count=None, is_world=None):
+        """
+        Set the lowest prices of one (item, location) cell.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world, data center or region name
+            nq_price (float): The lowest NQ price, NaN or None if there are no NQ listings
+            hq_price (float): The lowest HQ price, NaN or None if there are no HQ listings
+            listing_count (int, optional): The number of listings, unchanged if None
+            is_world (bool, optional): Whether the location is a world, unchanged if None
+        """
+        with self._lock:
+            row = self._item_row(item_id)
+            column = self._location_column(location)
+            self.nq_min[row, column] = np.nan if nq_price is None else nq_price
+            self.hq_min[row, column] = np.nan if hq_price is None else hq_price
+            if listing_count is not None:
+                self.listing_count[row, column] = listing_count
+            if is_world is not None:
+                self.is_world[column] = is_world
+
+    def update_market_data(self, item_id, location, market_data, worlds=None):
+        """
+        Record a market data response for an item.
+
+        The location's own cell is set from all listings. For data center and region
+        responses the cells of each world are set from that world's listings as well.
+
+        Args:
+            item_id (int): The ID of the item
+            location (str): The world, data center or region the data was fetched from
+            market_data (dict): The market data response
+            worlds (list, optional): The worlds the response covers, so worlds without
+                listings are cleared. Only the worlds with listings are set if None.
+        """
+        listings = market_data.get("listings")
+        if listings is None:
+            return
+
+        world_prices = {}
+        for listing in listings:
+            world = listing.get("worldName")
+            if world is None:
+                continue
+            prices = world_prices.get(world)
+            if prices is None:
+                prices = world_prices[world] = [np.inf, np.inf, 0]
+            quality = 1 if listing.get("hq") else 0
+            prices[quality] = min(prices[quality], listing["pricePerUnit"])
+            prices[2] += 1
+
+        with self._lock:
+            # World responses do not name the world on each listing
+            location_is_world = "worldName" in market_data
+            nq_price, hq_price = _lowest_prices(listings)
+            self.update_prices(item_id, location, nq_price, hq_price, len(listings), is_world=location_is_world)
+            if location_is_world:
+                return
+
+            for world in set(worlds or []) | set(world_prices):
+                nq_price, hq_price, count = world_prices.get(world, (np.inf, np.inf, 0))
+                self.update_prices(item_id, world, _finite_or_nan(nq_price), _finite_or_nan(hq_price), count, is_world=True)
+
+    def get_prices(self, item_ids, locations):
+        """
+        Get the lowest prices for a set of items and locations.
+
+        Args:
+            item_ids (list): The item IDs, one row each
+            locations (list): The location names, one column each
+
+        Returns:
+            tuple: (nq_prices, hq_prices) arrays of shape (items, locations), NaN where unknown
+        """
+        with self._lock:
+            nq_prices = np.full((len(item_ids), len(locations)), np.nan)
+            hq_prices = np.full((len(item_ids), len(locations)), np.nan)
+            rows = np.array([self.item_index.get(str(item_id), -1) for item_id in item_ids], dtype=np.int64)
+            columns = np.array([self.location_index.get(location, -1) for location in locations], dtype=np.int64)
+            known_rows = np.flatnonzero(rows >= 0)
+            known_columns = np.flatnonzero(columns >= 0)
+            selection = np.ix_(rows[known_rows], columns[known_columns])
+            target = np.ix_(known_rows, known_columns)
+            nq_prices[target] = self.nq_min[selection]
+            hq_prices[target] = self.hq_min[selection]
+            return nq_prices, hq_prices
+
+    def cheapest_world(self, item_ids=None, require_hq=False, exclude_world=None, worlds=None):
+        """
+        Find the world with the lowest price for each item.
+
+        Args:
+            item_ids (list, optional): The item IDs, all items if None. Items the matrix has not seen are left out
+            require_hq (bool or numpy.ndarray, optional): Only consider HQ listings, per item if an array
+            exclude_world (str, optional): A world to leave out, e.g. the home world
+            worlds (list, optional): The worlds to consider, all known worlds if None
+
+        Returns:
+            tuple: (item_ids, world_names, prices) where world_names is None and the price
+                NaN for items without any listing
+        """
+        with self._lock:
+            item_ids, rows, require_hq = self._rows(item_ids, require_hq)
+            columns = self._world_columns(worlds, exclude_world)
+            prices = self._quality_prices(rows, columns, require_hq)
+            if not columns.size:
+                return item_ids, [None] * len(item_ids), np.full(len(item_ids), np.nan)
+
+            best = np.argmin(np.where(np.isnan(prices), np.inf, prices), axis=1)
+            best_prices = prices[np.arange(len(rows)), best]
+            names = [self.locations[columns[index]] if not np.isnan(price) else None
+                     for index, price in zip(best, best_prices)]
+            return item_ids, names, best_prices
+
+    def find_spreads(self, home_world, min_spread=0.1, item_ids=None, require_hq=False, worlds=None):
+        """
+        Find items that sell at least min_spread cheaper on another world than on the home world.
+
+        Args:
+            home_world (str): The world the items are sold on
+            min_spread (float, optional): The minimum price difference relative to the home price
+            item_ids (list, optional): The item IDs, all items if None
+            require_hq (bool or numpy.ndarray, optional): Only consider HQ listings, per item if an array
+            worlds (list, optional): The worlds to buy from, all known worlds if None
+
+        Returns:
+            list: Dictionaries with item_id, current_price, lowest_price_world and lowest_price
+        """
+        with self._lock:
+            item_ids, rows, require_hq = self._rows(item_ids, require_hq)
+            home_column = self.location_index.get(home_world)
+            if home_column is None or not len(rows):
+                return []
+            home_prices = self._quality_prices(rows, np.array([home_column]), require_hq)[:, 0]
+            item_ids, names, lowest_prices = self.cheapest_world(item_ids, require_hq, home_world, worlds)
+
+        # Comparisons with NaN are False, so items missing on either side are skipped
+        with np.errstate(invalid="ignore"):
+            matches = np.flatnonzero(lowest_prices < home_prices * (1 - min_spread))
+        return [{
+            "item_id": item_ids[index],
+            "current_price": float(home_prices[index]),
+            "lowest_price_world": names[index],
+            "lowest_price": float(lowest_prices[index])
+        } for index in matches]
+
+    def _rows(self, item_ids, require_hq=False):
+        # Per-item HQ flags are filtered with the items, so they stay aligned with the rows
+        if item_ids is None:
+            return list(self.item_ids), np.arange(len(self.item_ids)), require_hq
+        item_ids = [str(item_id) for item_id in item_ids]
+        known = np.array([item_id in self.item_index for item_id in item_ids], dtype=bool)
+        require_hq = np.asarray(require_hq, dtype=bool)
+        if require_hq.ndim:
+            require_hq = require_hq[known]
+        item_ids = [item_id for item_id, is_known in zip(item_ids, known) if is_known]
+        return item_ids, np.array([self.item_index[item_id] for item_id in item_ids], dtype=np.int64), require_hq
+
+    def _world_columns(self, worlds, exclude_world):
+        if worlds is None:
+            columns = np.flatnonzero(self.is_world[:len(self.locations)])
+        else:
+            columns = np.array([self.location_index[world] for world in worlds if world in self.location_index], dtype=np.int64)
+        if exclude_world in self.location_index:
+            columns = columns[columns != self.location_index[exclude_world]]
+        return columns
+
+    def _quality_prices(self, rows, columns, require_hq):
+        selection = np.ix_(rows, columns)
+        hq = self.hq_min[selection]
+        any_quality = np.fmin(self.nq_min[selection], hq)
+        require_hq = np.asarray(require_hq, dtype=bool)
+        if require_hq.ndim:
+            require_hq = require_hq[:, np.newaxis]
+        return np.where(require_hq, hq, any_quality)
+
+    def _item_row(self, item_id):
+        item_id = str(item_id)
+        row = self.item_index.get(item_id)
+        if row is None:
+            row = len(self.item_ids)
+            if row == self.nq_min.shape[0]:
+                self._grow(rows=row * 2)
+            self.item_index[item_id] = row
+            self.item_ids.append(item_id)
+        return row
+
+    def _location_column(self, location):
+        column = self.location_index.get(location)
+        if column is None:
+            column = len(self.locations)
+            if column == self.nq_min.shape[1]:
+                self._grow(columns=column * 2)
+            self.location_index[location] = column
+            self.locations.append(location)
+        return column
+
+    def _grow(self, rows=None, columns=None):
+        old_rows, old_columns = self.nq_min.shape
+        shape = (rows or old_rows, columns or old_columns)
+        for name, fill in (("nq_min", np.nan), ("hq_min", np.nan), ("listing_count", 0)):
+            old = getattr(self, name)
+            new = np.full(shape, fill, dtype=old.dtype)
+            new[:old_rows, :old_columns] = old
+            setattr(self, name, new)
+        is_world = np.zeros(shape[1], dtype=bool)
+        is_world[:old_columns] = self.is_world
+        self.is_world = is_world
+
+def _lowest_prices(listings):
+    nq_price = min((listing["pricePerUnit"] for listing in listings if not listing.get("hq")), default=None)
+    hq_price = min((listing["pricePerUnit"] for listing in listings if listing.get("hq")), default=None)
+    return nq_price, hq_price
+
+def _finite_or_nan(price):
+    return price if price != np.inf else np.nan
+
+# Shared price matrix, fed by every fetch in the application
+_price_matrix = None
+_price_matrix_lock = threading.Lock()
+
+def get_price_matrix():
+    """
+    Get the shared price matrix.
+
+    Returns:
+        PriceMatrix: The shared price matrix
+    """
+    global _price_matrix
+    with _price_matrix_lock:
+        if _price_matrix is None:
+            _price_matrix = PriceMatrix()
+        return _price_matrix
+
+def get_location_worlds(location, topology=None):
+    """
+    Get the worlds a world, data center or region name covers.
+
+    Args:
+        location (str): The world, data center or region name
+        topology (dict, optional): The result of get_data_center_topology
+
+    Returns:
+        list: The world names, empty if the location is unknown
+    """
+    topology = topology or get_data_center_topology()
+    if location in topology["world_to_dc"]:
+        return [location]
+    if location in topology["data_centers"]:
+        return list(topology["data_centers"][location])
+    return [world for dc in topology["regions"].get(location, []) for world in topology["data_centers"].get(dc, [])]
+
+def record_market_data(item_id, location, market_data):
+    """
+    Record a market data response in the shared price matrix and order book.
+
+    Args:
+        item_id (int): The ID of the item
+        location (str): The world, data center or region the data was fetched from
+        market_data (dict): The market data response
+    """
+    if not market_data or market_data.get("listings") is None:
+        return
+    worlds = None if "worldName" in market_data else get_location_worlds(location)
+    get_price_matrix().update_market_data(item_id, location, market_data, worlds)
+    get_order_book().update_market_data(item_id, location, market_data, worlds)
@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+
+# Folder with one rollups file per item and location, kept next to the other local data
+ROLLUPS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'history_rollups')
+
+# Rollup intervals in seconds
+HOURLY = 3600
+DAILY = 86400
+
+# Intervals stored for every item, by name
+ROLLUP_INTERVALS = {"hourly": HOURLY, "daily": DAILY}
+
+# Seconds of intervals kept by interval name, hourly candles are only drawn for up to 7 days
+ROLLUP_RETENTION = {"hourly": 14 * DAILY, "daily": 3 * 365 * DAILY}
+
+# Columns of a rollup, one value per interval
+ROLLUP_COLUMNS = ("start", "open", "high", "low", "close", "vwap", "volume", "sales", "hq_share")
+
+# Only one thread reads and writes the rollups files at a time
+_rollups_file_lock = threading.Lock()
+
+# Rollups waiting to be written by the background writer, by file path
+_pending_writes = {}
+
+def compute_rollups(history, interval):
+    """
+    Roll sales up into intervals: open, high, low, close, volume-weighted average price, volume and HQ share.
+
+    Args:
+        history (dict): The columns from graph_utils.parse_price_history, sorted by time
+        interval (int): The interval length in seconds, e.g. HOURLY or DAILY
+
+    Returns:
+        dict: NumPy arrays by column name (see ROLLUP_COLUMNS), one entry per interval
+            with sales. start is the interval's start in epoch seconds, volume the
+            quantity sold, sales the number of sales and hq_share the share of the
+            quantity sold that was HQ.
+    """
+    timestamps = history["timestamp"]
+    if len(timestamps) == 0:
+        return empty_rollups()
+
+    prices = history["price"].astype(np.float64)
+    quantities = history["quantity"].astype(np.float64)
+    buckets = timestamps // interval * interval
+
+    # The columns are sorted by time, so every interval is one contiguous run
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+
+    volume = np.add.reduceat(quantities, starts)
+    gil = np.add.reduceat(prices * quantities, starts)
+    hq_volume = np.add.reduceat(np.where(history["hq"], quantities, 0), starts)
+    safe_volume = np.where(volume > 0, volume, 1)
+    return {
+        "start": buckets[starts].astype(np.int64),
+        "open": prices[starts],
+        "high": np.maximum.reduceat(prices, starts),
+        "low": np.minimum.reduceat(prices, starts),
+        "close": prices[ends],
+        "vwap": np.where(volume > 0, gil / safe_volume, prices[starts]),
+        "volume": volume,
+        "sales": (ends - starts + 1).astype(np.int64),
+        "hq_share": hq_volume / safe_volume
+    }
+
+def empty_rollups():
+    """
+    Get a rollup without any intervals.
+
+    Returns:
+        dict: Empty NumPy arrays by column name
+    """
+    return {column: np.array([], dtype=np.int64 if column in ("start", "sales") else np.float64)
+            for column in ROLLUP_COLUMNS}
+
+def merge_rollups(old, new):
+    """
+    Merge two rollups of the same interval length.
+
+    Where both have the same interval, the one with more sales is kept. The API
+    only returns the most recent sales, so the oldest interval of a new rollup is
+    often incomplete while the stored one was not.
+
+    Args:
+        old (dict): The stored rollup
+        new (dict): The rollup computed from the latest history
+
+    Returns:
+        dict: The merged rollup, sorted by start
+    """
+    if len(old["start"]) == 0:
+        return new
+    if len(new["start"]) == 0:
+        return old
+    combined = {column: np.concatenate((old[column], new[column])) for column in ROLLUP_COLUMNS}
+    # Sort by start, then sales, and keep the last row of every start
+    order = np.lexsort((combined["sales"], combined["start"]))
+    starts = combined["start"][order]
+    keep = order[np.r_[starts[1:] != starts[:-1], True]]
+    return {column: values[keep] for column, values in combined.items()}
+
+def slice_rollups(rollups, since, interval):
+    """
+    Keep the intervals that end after a time.
+
+    Args:
+        rollups (dict): The rollup
+        since (float): Epoch seconds
+        interval (int): The interval length in seconds
+
+    Returns:
+        dict: The intervals from the one containing since onwards
+    """
+    start = np.searchsorted(rollups["start"], since - interval, side="right")
+    return {column: values[start:] for column, values in rollups.items()}
+
+def _rollups_path(item_id, location, folder):
+    # Location names are plain words, only path separators would leave the folder
+    safe_location = "".join(char if char.isalnum() or char in "-_" else "_" for char in location)
+    return os.path.join(folder, f"{safe_location}_{item_id}.json")
+
+def _load_file(path):
+    # Rollups not written yet are newer than the file
+    pending = _pending_writes.get(path)
+    if pending is not None:
+        return pending
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _write_pending(path):
+    with _rollups_file_lock:
+        data = _pending_writes.pop(path, None)
+        if data is None:
+            return  # A later update already wrote its rollups
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_file = f"{path}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(temp_file, path)
+        except Exception as e:
+            print(f"Error saving history rollups: {e}")
+
+def _from_json(stored):
+    rollups = empty_rollups()
+    for column in ROLLUP_COLUMNS:
+        if column in stored:
+            rollups[column] = np.array(stored[column], dtype=rollups[column].dtype)
+    return rollups
+
+def load_rollups(item_id, location, folder=ROLLUPS_DIR):
+    """
+    Load the stored rollups of an item.
+
+    Args:
+        item_id (int): The ID of the item
+        location (str): The world or data center name
+        folder (str, optional): Path to the rollups folder
+
+    Returns:
+        dict: Rollups by interval name (see ROLLUP_INTERVALS), empty if nothing is stored
+    """
+    try:
+        with _rollups_file_lock:
+            stored = _load_file(_rollups_path(item_id, location, folder))
+        return {name: _from_json(stored.get(name, {})) for name in ROLLUP_INTERVALS}
+    except Exception as e:
+        print(f"Error loading history rollups: {e}")
+        return {name: empty_rollups() for name in ROLLUP_INTERVALS}
+
+def update_rollups(item_id, location, history, folder=ROLLUPS_DIR):
+    """
+    Roll up the latest history of an item and merge it with the stored rollups.
+
+    Intervals older than ROLLUP_RETENTION are dropped. The merged rollups are
+    written on a background thread, so the caller never waits for the disk.
+
+    Args:
+        item_id (int): The ID of the item
+        location (str): The world or data center name
+        history (dict): The columns from graph_utils.parse_price_history
+        folder (str, optional): Path to the rollups folder
+
+    Returns:
+        dict: The merged rollups by interval name
+    """
+    path = _rollups_path(item_id, location, folder)
+    now = time.time()
+    try:
+        with _rollups_file_lock:
+            stored = _load_file(path)
+            merged = {name: slice_rollups(merge_rollups(_from_json(stored.get(name, {})), compute_rollups(history, interval)),
+                                          now - ROLLUP_RETENTION[name], interval)
+                      for name, interval in ROLLUP_INTERVALS.items()}
+            data = {name: {column: values.tolist() for column, values in rollups.items()}
+                    for name, rollups in merged.items()}
+            data["updated_at"] = now
+            _pending_writes[path] = data
+        threading.Thread(target=_write_pending, args=(path,), name="rollups-writer").start()
+        return merged
+    except Exception as e:
+        print(f"Error updating history rollups: {e}")
+        return {name: compute_rollups(history, interval) for name, interval in ROLLUP_INTERVALS.items()}
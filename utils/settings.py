@@ -13,35 +13,40 @@ DEFAULT_SETTINGS = {
 # Settings file path
 SETTINGS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "settings.json")
 
-def load_settings():
+def load_settings(path=None):
     """
     Load user settings from the settings file.
     If the file doesn't exist, create it with default settings.
     
+    Args:
+        path (str, optional): Path to a settings file to load instead of settings.json
+    
     Returns:
         dict: The user settings
     """
+    path = path or SETTINGS_FILE
     try:
-        if os.path.exists(SETTINGS_FILE):
-            with open(SETTINGS_FILE, "r") as f:
+        if os.path.exists(path):
+            with open(path, "r") as f:
                 return json.load(f)
         else:
             # Create default settings file
-            save_settings(DEFAULT_SETTINGS)
+            save_settings(DEFAULT_SETTINGS, path)
             return DEFAULT_SETTINGS.copy()
     except Exception as e:
         print(f"Error loading settings: {e}")
         return DEFAULT_SETTINGS.copy()
 
-def save_settings(settings):
+def save_settings(settings, path=None):
     """
     Save user settings to the settings file.
     
     Args:
         settings (dict): The settings to save
+        path (str, optional): Path to a settings file to save to instead of settings.json
     """
     try:
-        with open(SETTINGS_FILE, "w") as f:
+        with open(path or SETTINGS_FILE, "w") as f:
             json.dump(settings, f, indent=4)
     except Exception as e:
         print(f"Error saving settings: {e}")
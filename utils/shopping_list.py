@@ -0,0 +1,197 @@
+import heapq
+from itertools import islice
+from api.universalis import get_market_data_bulk, MAX_ITEMS_PER_REQUEST
+from utils.order_book import get_order_book
+from utils.price_matrix import record_market_data
+
+# Only the listing fields the optimizer needs are requested
+SHOPPING_FIELDS = ("items.worldName,items.listings.listingID,items.listings.pricePerUnit,items.listings.quantity,"
+                   "items.listings.worldName,items.listings.hq,items.listings.retainerName")
+
+# Number of listings after the cheapest one considered for the last, partial purchase of an item
+FINAL_PURCHASE_LOOKAHEAD = 50
+
+def fetch_shopping_listings(item_ids, location):
+    """
+    Fetch the listings of a shopping list into the shared order book, 100 items per request.
+
+    Args:
+        item_ids (list): The item IDs
+        location (str): The world, data center or region name
+
+    Returns:
+        list: The item IDs that were fetched
+    """
+    item_ids = [str(item_id) for item_id in item_ids]
+    fetched = []
+    for start in range(0, len(item_ids), MAX_ITEMS_PER_REQUEST):
+        batch = item_ids[start:start + MAX_ITEMS_PER_REQUEST]
+        for item_id, item_data in get_market_data_bulk(batch, location, fields=SHOPPING_FIELDS).items():
+            record_market_data(item_id, location, item_data)
+            fetched.append(item_id)
+    return fetched
+
+def plan_item(world_listings, quantity, allowed_worlds=None):
+    """
+    Pick the cheapest listings that add up to a quantity of one item.
+
+    The sorted listings of every allowed world are merged with a k-way heap
+    merge and taken cheapest first. The last purchase usually needs only part
+    of a stack, so the next few stacks are considered for it: the cheapest stack
+    that covers the rest, or smaller stacks that add up to it.
+
+    Args:
+        world_listings (dict): Listings by world name, each list cheapest first
+        quantity (int): The quantity to buy
+        allowed_worlds (set, optional): The worlds to buy from, all worlds if None
+
+    Returns:
+        dict: Dictionary with purchases (world, listing), cost, purchased and shortfall
+    """
+    sources = [[(listing["pricePerUnit"], world, listing) for listing in listings]
+               for world, listings in world_listings.items() if allowed_worlds is None or world in allowed_worlds]
+    merged = heapq.merge(*sources, key=lambda entry: entry[0])
+
+    purchases = []
+    remaining = quantity
+    cost = 0
+    for price, world, listing in merged:
+        if remaining <= 0:
+            break
+        if listing.get("quantity", 1) > remaining:
+            candidates = [(price, world, listing)] + list(islice(merged, FINAL_PURCHASE_LOOKAHEAD))
+            for price, world, listing in _final_purchases(candidates, remaining):
+                purchases.append((world, listing))
+                cost += price * listing.get("quantity", 1)
+                remaining -= listing.get("quantity", 1)
+            break
+        purchases.append((world, listing))
+        cost += price * listing.get("quantity", 1)
+        remaining -= listing.get("quantity", 1)
+
+    return {
+        "purchases": purchases,
+        "cost": cost,
+        "purchased": quantity - max(0, remaining),
+        "shortfall": max(0, remaining)
+    }
+
+def _final_purchases(candidates, remaining):
+    # Either one stack that covers the rest, or the stacks that fit cheapest first
+    # with one covering stack for whatever they leave, whichever costs less
+    def total(purchases):
+        return sum(price * listing.get("quantity", 1) for price, _, listing in purchases)
+
+    def cheapest_cover(options, needed):
+        covering = [option for option in options if option[2].get("quantity", 1) >= needed]
+        return min(covering, key=lambda option: total([option])) if covering else None
+
+    single = [cheapest_cover(candidates, remaining)]
+
+    fitted = []
+    left = remaining
+    for candidate in candidates:
+        if 0 < candidate[2].get("quantity", 1) <= left:
+            fitted.append(candidate)
+            left -= candidate[2].get("quantity", 1)
+    if left > 0:
+        cover = cheapest_cover([candidate for candidate in candidates if candidate not in fitted], left)
+        if cover is None:
+            return single
+        fitted.append(cover)
+    return fitted if total(fitted) < total(single) else single
+
+def optimize_shopping_list(shopping_list, location, travel_penalty=0, max_worlds=None, home_world=None,
+                           hq_items=None, order_book=None):
+    """
+    Find the cheapest set of listings across worlds for a shopping list.
+
+    Each item is first planned over every world. Worlds are then dropped one at
+    a time, the one that saves the most first, while the cost saved on travel
+    (travel_penalty per world visited besides the home world) is more than the
+    extra cost of the listings, or while more than max_worlds worlds are
+    visited. Only the items bought on a dropped world are planned again. A world
+    is never dropped if that leaves an item short.
+
+    Args:
+        shopping_list (dict): Quantities by item ID
+        location (str): The data center or region to buy in
+        travel_penalty (float, optional): The cost in gil of visiting a world
+        max_worlds (int, optional): The maximum number of worlds to visit besides the home world
+        home_world (str, optional): The world the buyer is on, it is never counted as travel
+        hq_items (set, optional): Item IDs that must be bought HQ
+        order_book (OrderBook, optional): The order book to read listings from, the shared one if None
+
+    Returns:
+        dict: Dictionary with items (plan per item ID), worlds (cost and purchases per world),
+            total_cost, travel_cost and worlds_visited
+    """
+    order_book = order_book or get_order_book()
+    hq_items = {str(item_id) for item_id in hq_items or []}
+    shopping_list = {str(item_id): quantity for item_id, quantity in shopping_list.items() if quantity > 0}
+
+    world_listings = {item_id: order_book.get_world_listings(item_id, location, item_id in hq_items)
+                      for item_id in shopping_list}
+    plans = {item_id: plan_item(world_listings[item_id], quantity) for item_id, quantity in shopping_list.items()}
+    allowed = set()
+    for listings in world_listings.values():
+        allowed.update(listings)
+
+    while True:
+        visited = _visited_worlds(plans, home_world)
+        over_limit = max_worlds is not None and len(visited) > max_worlds
+        if travel_penalty <= 0 and not over_limit:
+            break
+
+        best = None
+        for world in visited:
+            candidate_allowed = allowed - {world}
+            replanned = {}
+            for item_id, plan in plans.items():
+                if any(purchase_world == world for purchase_world, _ in plan["purchases"]):
+                    replanned[item_id] = plan_item(world_listings[item_id], shopping_list[item_id], candidate_allowed)
+                    if replanned[item_id]["shortfall"] > plan["shortfall"]:
+                        break
+            else:
+                extra_cost = sum(replanned[item_id]["cost"] - plans[item_id]["cost"] for item_id in replanned)
+                if best is None or extra_cost < best[0]:
+                    best = (extra_cost, world, replanned)
+
+        if best is None or (best[0] >= travel_penalty and not over_limit):
+            break
+        extra_cost, world, replanned = best
+        allowed.discard(world)
+        plans.update(replanned)
+
+    return _summarize(plans, shopping_list, travel_penalty, home_world)
+
+def _visited_worlds(plans, home_world):
+    return {world for plan in plans.values() for world, _ in plan["purchases"]} - {home_world}
+
+def _summarize(plans, shopping_list, travel_penalty, home_world):
+    worlds = {}
+    for item_id, plan in plans.items():
+        for world, listing in plan["purchases"]:
+            entry = worlds.setdefault(world, {"cost": 0, "purchases": []})
+            total = listing["pricePerUnit"] * listing.get("quantity", 1)
+            entry["cost"] += total
+            entry["purchases"].append({
+                "item_id": int(item_id),
+                "pricePerUnit": listing["pricePerUnit"],
+                "quantity": listing.get("quantity", 1),
+                "hq": listing.get("hq", False),
+                "retainerName": listing.get("retainerName"),
+                "total": total
+            })
+
+    items = {int(item_id): {"quantity": shopping_list[item_id], "purchased": plan["purchased"],
+                            "shortfall": plan["shortfall"], "cost": plan["cost"]} for item_id, plan in plans.items()}
+    visited = _visited_worlds(plans, home_world)
+    total_cost = sum(plan["cost"] for plan in plans.values())
+    return {
+        "items": items,
+        "worlds": dict(sorted(worlds.items(), key=lambda entry: entry[1]["cost"], reverse=True)),
+        "total_cost": total_cost,
+        "travel_cost": travel_penalty * len(visited),
+        "worlds_visited": len(visited)
+    }
@@ -0,0 +1,159 @@
+import importlib
+import os
+import subprocess
+import sys
+import threading
+
+# Root folder of the application, imports are profiled from here
+APP_DIR = os.path.dirname(os.path.dirname(__file__))
+
+# Module whose import is the application's cold start, main.py imports it before the window is created
+STARTUP_MODULE = "ui.app"
+
+# Modules only needed once an item is selected or a notification is shown, they must not be imported at startup
+DEFERRED_MODULES = ("matplotlib", "plyer", "utils.graph_utils")
+
+# Backend-neutral modules imported in the background once the window is shown, so the first chart does not wait for them
+WARM_UP_MODULES = ("numpy", "matplotlib", "matplotlib.figure", "matplotlib.dates", "matplotlib.gridspec", "plyer")
+
+# Modules that select or use the pyplot backend, which is not thread-safe, so they are imported on the Tk thread
+MAIN_THREAD_WARM_UP_MODULES = ("matplotlib.pyplot", "matplotlib.backends.backend_tkagg", "utils.graph_utils")
+
+# Default time in milliseconds importing the startup module may take, checked by tests/test_startup.py
+# and startup_profile.py --budget
+DEFAULT_STARTUP_BUDGET_MS = 500
+
+def _import_modules(modules):
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            print(f"Error warming up {module}: {e}")
+
+def warm_up(root=None, modules=WARM_UP_MODULES, main_thread_modules=MAIN_THREAD_WARM_UP_MODULES):
+    """
+    Import modules on a background thread, then finish with the pyplot modules on the Tk thread.
+
+    Imports are serialized by the import lock, so a module used before its
+    warm-up is done is simply waited for.
+
+    Args:
+        root (tk.Tk, optional): The Tk root the main thread modules are imported on, they are skipped if None
+        modules (tuple, optional): The backend-neutral module names to import in the background
+        main_thread_modules (tuple, optional): The module names to import on the Tk thread afterwards
+
+    Returns:
+        threading.Thread: The warm-up thread
+    """
+    def import_modules():
+        _import_modules(modules)
+        if root is not None:
+            root.after(0, _import_modules, main_thread_modules)
+
+    thread = threading.Thread(target=import_modules, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def profile_imports(module=STARTUP_MODULE):
+    """
+    Import a module in a new interpreter and measure every import it makes.
+
+    Args:
+        module (str, optional): The module to import
+
+    Returns:
+        dict: Dictionary with module, ok (whether the import succeeded), error, total_ms and
+            imports, one dict per imported module with name, depth, self_ms and cumulative_ms
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=APP_DIR, capture_output=True, text=True)
+    imports = []
+    errors = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+        name = fields[2].rstrip()
+        imports.append({
+            "name": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(fields[0]) / 1000,
+            "cumulative_ms": int(fields[1]) / 1000
+        })
+    return {
+        "module": module,
+        "ok": result.returncode == 0,
+        "error": errors[-1] if result.returncode != 0 and errors else None,
+        "total_ms": sum(entry["self_ms"] for entry in imports),
+        "imports": imports
+    }
+
+def get_loaded_deferred_modules(profile, deferred=DEFERRED_MODULES):
+    """
+    Find the deferred modules a profiled import loaded.
+
+    Args:
+        profile (dict): The result of profile_imports
+        deferred (tuple, optional): The module names that must not be imported, submodules included
+
+    Returns:
+        list: The deferred module names that were imported
+    """
+    names = {entry["name"] for entry in profile["imports"]}
+    return [module for module in deferred
+            if module in names or any(name.startswith(module + ".") for name in names)]
+
+def check_startup_budget(profile, budget_ms=DEFAULT_STARTUP_BUDGET_MS, deferred=DEFERRED_MODULES):
+    """
+    Check a profiled startup import against the startup budget.
+
+    Args:
+        profile (dict): The result of profile_imports
+        budget_ms (float, optional): The time in milliseconds the import may take
+        deferred (tuple, optional): The module names that must not be imported at startup
+
+    Returns:
+        list: Descriptions of the problems found, empty if the startup is within budget
+    """
+    problems = []
+    if not profile["ok"]:
+        problems.append(f"Importing {profile['module']} failed: {profile['error']}")
+    if profile["total_ms"] > budget_ms:
+        problems.append(f"Importing {profile['module']} took {profile['total_ms']:.0f} ms, the budget is {budget_ms:.0f} ms")
+    for module in get_loaded_deferred_modules(profile, deferred):
+        problems.append(f"{module} is imported at startup, it should be imported on first use")
+    return problems
+
+def format_profile(profile, top=20):
+    """
+    Format a profiled import as a report of the slowest imports.
+
+    Args:
+        profile (dict): The result of profile_imports
+        top (int, optional): The number of modules to list
+
+    Returns:
+        str: The report
+    """
+    lines = [f"Import of {profile['module']}: {profile['total_ms']:.1f} ms"]
+    if not profile["ok"]:
+        lines.append(f"Import failed: {profile['error']}")
+
+    # Time by top-level package, every module counted once through its own time
+    packages = {}
+    for entry in profile["imports"]:
+        package = entry["name"].split(".")[0]
+        packages[package] = packages.get(package, 0) + entry["self_ms"]
+    lines.append("")
+    lines.append("Slowest packages:")
+    for package, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        lines.append(f"  {ms:8.1f} ms  {package}")
+
+    lines.append("")
+    lines.append("Slowest modules (cumulative):")
+    for entry in sorted(profile["imports"], key=lambda entry: entry["cumulative_ms"], reverse=True)[:top]:
+        lines.append(f"  {entry['cumulative_ms']:8.1f} ms  {entry['name']}")
+    return "\n".join(lines)
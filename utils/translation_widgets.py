@@ -1,7 +1,53 @@
+import weakref
 import tkinter as tk
 from tkinter import ttk
 from utils.translations import get_text
 
+# Translatable widgets by translation key, held weakly so destroyed widgets drop out
+_translated_widgets = {}
+
+def register_widget(widget, key, default):
+    """
+    Register a widget whose text is updated when the language changes
+    
+    Args:
+        widget: The widget to register
+        key: The translation key
+        default: The default text (English)
+    """
+    # Re-registering under another key moves the widget
+    old_key = getattr(widget, '_translation_key', None)
+    if old_key is not None and old_key != key and old_key in _translated_widgets:
+        _translated_widgets[old_key].discard(widget)
+    widget._translation_key = key
+    widget._translation_default = default
+    _translated_widgets.setdefault(key, weakref.WeakSet()).add(widget)
+
+def update_translated_widgets():
+    """
+    Set the text of every registered widget in the current language
+    
+    Each key is translated once and applied to all of its widgets in one pass,
+    so the cost follows the number of translatable widgets, not the size of
+    the widget tree.
+    
+    Returns:
+        int: The number of widgets updated
+    """
+    updated = 0
+    for key, widgets in list(_translated_widgets.items()):
+        text = get_text(key, None)
+        for widget in list(widgets):
+            try:
+                widget.config(text=widget._translation_default if text is None else text)
+                updated += 1
+            except tk.TclError:
+                # The widget was destroyed but is still referenced somewhere
+                widgets.discard(widget)
+        if not widgets:
+            del _translated_widgets[key]
+    return updated
+
 def create_label(parent, key, default, **kwargs):
     """
     Create a label with translation support
@@ -16,8 +62,7 @@ def create_label(parent, key, default, **kwargs):
         ttk.Label: The created label with translation support
     """
     widget = ttk.Label(parent, text=get_text(key, default), **kwargs)
-    widget._translation_key = key
-    widget._translation_default = default
+    register_widget(widget, key, default)
     return widget
 
 def create_button(parent, key, default, **kwargs):
@@ -34,8 +79,7 @@ def create_button(parent, key, default, **kwargs):
         ttk.Button: The created button with translation support
     """
     widget = ttk.Button(parent, text=get_text(key, default), **kwargs)
-    widget._translation_key = key
-    widget._translation_default = default
+    register_widget(widget, key, default)
     return widget
 
 def create_checkbutton(parent, key, default, **kwargs):
@@ -52,8 +96,7 @@ def create_checkbutton(parent, key, default, **kwargs):
         ttk.Checkbutton: The created checkbutton with translation support
     """
     widget = ttk.Checkbutton(parent, text=get_text(key, default), **kwargs)
-    widget._translation_key = key
-    widget._translation_default = default
+    register_widget(widget, key, default)
     return widget
 
 def create_radiobutton(parent, key, default, **kwargs):
@@ -70,8 +113,7 @@ def create_radiobutton(parent, key, default, **kwargs):
         ttk.Radiobutton: The created radiobutton with translation support
     """
     widget = ttk.Radiobutton(parent, text=get_text(key, default), **kwargs)
-    widget._translation_key = key
-    widget._translation_default = default
+    register_widget(widget, key, default)
     return widget
 
 def create_labelframe(parent, key, default, **kwargs):
@@ -88,8 +130,7 @@ def create_labelframe(parent, key, default, **kwargs):
         ttk.LabelFrame: The created labelframe with translation support
     """
     widget = ttk.LabelFrame(parent, text=get_text(key, default), **kwargs)
-    widget._translation_key = key
-    widget._translation_default = default
+    register_widget(widget, key, default)
     return widget
 
 def set_translation_key(widget, key, default):
@@ -101,7 +142,6 @@ def set_translation_key(widget, key, default):
         key: The translation key
         default: The default text (English)
     """
-    widget._translation_key = key
-    widget._translation_default = default
+    register_widget(widget, key, default)
     if hasattr(widget, 'config') and 'text' in widget.config():
         widget.config(text=get_text(key, default))
@@ -1,46 +1,130 @@
 import json
 import os
 
+# Folder with one translation file per language
+TRANSLATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'translations')
+
+# Languages with a translation file, by language code
+LANGUAGES = ("en", "de", "ja", "fr")
+
+# Flattened translation tables cached between runs, rebuilt whenever a translation file changes
+TRANSLATIONS_CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'translations_cache.json')
+
+def flatten_translations(translations, prefix=""):
+    """
+    Flatten nested translations into one dictionary keyed by dotted keys.
+
+    Args:
+        translations (dict): The nested translations, e.g. {"market": {"price": "Price"}}
+        prefix (str, optional): The dotted key of the translations
+
+    Returns:
+        dict: The texts by dotted key, e.g. {"market.price": "Price"}
+    """
+    table = {}
+    for key, value in translations.items():
+        if isinstance(value, dict):
+            table.update(flatten_translations(value, f"{prefix}{key}."))
+        else:
+            table[f"{prefix}{key}"] = value
+    return table
+
+def _source_stamps():
+    stamps = {}
+    for language in LANGUAGES:
+        path = os.path.join(TRANSLATIONS_DIR, f'{language}.json')
+        if os.path.exists(path):
+            stat = os.stat(path)
+            # A list, so stamps read back from the JSON cache compare equal
+            stamps[language] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+def load_translation_tables(cache_file=TRANSLATIONS_CACHE_FILE):
+    """
+    Load the flattened translation tables of every language.
+
+    The tables are read from the cache file if it was built from the current
+    translation files, otherwise the files are parsed and the cache is rebuilt.
+
+    Args:
+        cache_file (str, optional): Path to the cache file, None to always parse the translation files
+
+    Returns:
+        dict: Flattened translation tables by language code
+    """
+    stamps = _source_stamps()
+    if cache_file:
+        try:
+            if os.path.exists(cache_file):
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached.get("stamps") == stamps:
+                    return cached["tables"]
+        except Exception as e:
+            print(f"Error loading translations cache: {e}")
+
+    tables = {}
+    for language in stamps:
+        try:
+            with open(os.path.join(TRANSLATIONS_DIR, f'{language}.json'), 'r', encoding='utf-8') as f:
+                tables[language] = flatten_translations(json.load(f))
+        except Exception as e:
+            print(f"Error loading translations: {e}")
+
+    if cache_file and len(tables) == len(stamps):
+        try:
+            # The cache is plain JSON, so a tampered cache file can't run code when it is loaded
+            temp_file = f"{cache_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({"stamps": stamps, "tables": tables}, f, ensure_ascii=False)
+            os.replace(temp_file, cache_file)
+        except Exception as e:
+            print(f"Error saving translations cache: {e}")
+    return tables
+
 class Translator:
-    def __init__(self, language="en"):
+    """
+    Translations of every language, flattened once so a text is one dictionary lookup.
+
+    Switching languages only swaps the table in use. Format templates of hot
+    strings are bound once per language, see get_formatter.
+    """
+    def __init__(self, language="en", cache_file=TRANSLATIONS_CACHE_FILE):
+        self.cache_file = cache_file
+        self.tables = {}
         self.language = language
         self.translations = {}
+        self._formatters = {}
         self.load_translations()
-    
+
     def load_translations(self):
-        """Load translations for the current language"""
-        try:
-            # Get the base directory of the application
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            translation_file = os.path.join(base_dir, 'translations', f'{self.language}.json')
-            
-            with open(translation_file, 'r', encoding='utf-8') as f:
-                self.translations = json.load(f)
-        except Exception as e:
-            print(f"Error loading translations: {e}")
-            # If loading fails, try to load English as fallback
-            if self.language != "en":
-                self.language = "en"
-                self.load_translations()
-    
+        """Load the translations of every language from disk and select the current language"""
+        self.tables = load_translation_tables(self.cache_file)
+        self._select(self.language)
+
+    def _select(self, language):
+        # Fall back to English if the language could not be loaded
+        if language not in self.tables:
+            language = "en"
+        self.language = language
+        self.translations = self.tables.get(language, {})
+        self._formatters = {}
+
     def set_language(self, language):
         """Change the current language"""
-        if language in ["en", "de", "ja", "fr"]:
-            self.language = language
-            self.load_translations()
-    
+        if language in LANGUAGES:
+            self._select(language)
+
     def get(self, key, default=""):
-        """Get a translation by key"""
-        # Split the key by dots to navigate nested dictionaries
-        parts = key.split('.')
-        result = self.translations
-        
-        try:
-            for part in parts:
-                result = result[part]
-            return result
-        except (KeyError, TypeError):
-            return default
+        """Get a translation by dotted key"""
+        return self.translations.get(key, default)
+
+    def get_formatter(self, key, default=""):
+        """Get the bound format method of a translated template, e.g. get_formatter(key)(price=100)"""
+        formatter = self._formatters.get(key)
+        if formatter is None:
+            formatter = self._formatters[key] = self.translations.get(key, default).format
+        return formatter
 
 # Create a global translator instance
 translator = Translator()
@@ -49,10 +133,18 @@ def get_text(key, default=""):
     """Get translated text for a key"""
     return translator.get(key, default)
 
+def get_formatter(key, default=""):
+    """Get the bound format method of a translated template for a key"""
+    return translator.get_formatter(key, default)
+
 def set_language(language):
     """Set the current language"""
     translator.set_language(language)
 
+def get_language():
+    """Get the current language code"""
+    return translator.language
+
 def get_language_code(language_name):
     """Convert language name to language code"""
     language_map = {
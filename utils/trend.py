@@ -0,0 +1,305 @@
+import bisect
+import math
+from collections import deque
+import numpy as np
+
+# Number of seconds in a day, trends are fitted in days so slopes read as gil per day
+SECONDS_PER_DAY = 86400
+
+# Default half-life of the moving average, in days
+DEFAULT_EWMA_HALFLIFE = 1.0
+
+# Default number of recent sales kept for rolling quantiles
+DEFAULT_QUANTILE_WINDOW = 100
+
+def fit_line(x, y):
+    """
+    Fit a least squares line in closed form.
+
+    Args:
+        x (array-like): The x values
+        y (array-like): The y values
+
+    Returns:
+        tuple: (slope, intercept), or None if there are fewer than two distinct x values
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) < 2:
+        return None
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    variance = np.dot(dx, dx)
+    if variance == 0:
+        return None
+    slope = np.dot(dx, y - y_mean) / variance
+    return slope, y_mean - slope * x_mean
+
+class LinearTrend:
+    """
+    Least squares line kept as running sums, so sales can be added one at a time.
+
+    The x values are stored relative to the first one added to keep the sums
+    accurate for large values such as epoch seconds.
+    """
+    def __init__(self):
+        self.count = 0
+        self._origin = None
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+        self._sum_xx = 0.0
+        self._sum_xy = 0.0
+
+    def add(self, x, y):
+        """
+        Add one point.
+
+        Args:
+            x (float): The x value
+            y (float): The y value
+        """
+        if self._origin is None:
+            self._origin = x
+        x = x - self._origin
+        self.count += 1
+        self._sum_x += x
+        self._sum_y += y
+        self._sum_xx += x * x
+        self._sum_xy += x * y
+
+    def add_many(self, x, y):
+        """
+        Add several points at once.
+
+        Args:
+            x (array-like): The x values
+            y (array-like): The y values
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(x) == 0:
+            return
+        if self._origin is None:
+            self._origin = float(x[0])
+        x = x - self._origin
+        self.count += len(x)
+        self._sum_x += x.sum()
+        self._sum_y += y.sum()
+        self._sum_xx += np.dot(x, x)
+        self._sum_xy += np.dot(x, y)
+
+    def get_line(self):
+        """
+        Get the fitted line.
+
+        Returns:
+            tuple: (slope, intercept), or None if the line is not defined yet
+        """
+        if self.count < 2:
+            return None
+        denominator = self.count * self._sum_xx - self._sum_x * self._sum_x
+        if denominator <= 0:
+            return None
+        slope = (self.count * self._sum_xy - self._sum_x * self._sum_y) / denominator
+        intercept = (self._sum_y - slope * self._sum_x) / self.count
+        return slope, intercept - slope * self._origin
+
+    def predict(self, x):
+        """
+        Evaluate the fitted line.
+
+        Args:
+            x (float or numpy.ndarray): The x values
+
+        Returns:
+            float or numpy.ndarray: The predicted values, or None if the line is not defined yet
+        """
+        line = self.get_line()
+        if line is None:
+            return None
+        slope, intercept = line
+        return slope * np.asarray(x, dtype=np.float64) + intercept
+
+class EWMA:
+    """
+    Exponentially weighted moving average of irregularly spaced values.
+
+    Older values lose half of their weight every halflife, measured in the
+    same unit as the timestamps passed to update.
+    """
+    def __init__(self, halflife=DEFAULT_EWMA_HALFLIFE):
+        self.halflife = halflife
+        self.value = None
+        self.timestamp = None
+
+    def update(self, value, timestamp):
+        """
+        Add a value.
+
+        Args:
+            value (float): The new value
+            timestamp (float): When the value was observed
+
+        Returns:
+            float: The updated average
+        """
+        if self.value is None:
+            self.value = float(value)
+        else:
+            elapsed = max(0.0, timestamp - self.timestamp)
+            alpha = 1 - 0.5 ** (elapsed / self.halflife)
+            self.value += alpha * (value - self.value)
+        self.timestamp = max(timestamp, self.timestamp) if self.timestamp is not None else timestamp
+        return self.value
+
+class RollingQuantile:
+    """
+    Quantiles of the last window values, kept in a sorted list.
+
+    Each update is a bisect insert and remove, so a quantile is read without
+    sorting the window again.
+    """
+    def __init__(self, window=DEFAULT_QUANTILE_WINDOW):
+        self.window = window
+        self._values = deque()
+        self._sorted = []
+
+    def update(self, value):
+        """
+        Add a value, dropping the oldest one once the window is full.
+
+        Args:
+            value (float): The new value
+        """
+        self._values.append(value)
+        bisect.insort(self._sorted, value)
+        if len(self._values) > self.window:
+            oldest = self._values.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+
+    def get(self, quantile):
+        """
+        Get a quantile of the window, interpolating linearly between values.
+
+        Args:
+            quantile (float): The quantile between 0 and 1, e.g. 0.5 for the median
+
+        Returns:
+            float: The quantile, or None if no values were added
+        """
+        if not self._sorted:
+            return None
+        position = quantile * (len(self._sorted) - 1)
+        lower = math.floor(position)
+        upper = min(lower + 1, len(self._sorted) - 1)
+        return self._sorted[lower] + (self._sorted[upper] - self._sorted[lower]) * (position - lower)
+
+class PriceTrend:
+    """
+    Streaming price statistics for one item: a trend line, a moving average and rolling quantiles.
+
+    Sales are added in time order as they arrive, either one at a time or from
+    parsed price history columns, and every statistic is updated in constant or
+    logarithmic time, so alerts and analytics can keep one per item without
+    refitting anything.
+    """
+    def __init__(self, halflife=DEFAULT_EWMA_HALFLIFE, window=DEFAULT_QUANTILE_WINDOW):
+        self.line = LinearTrend()
+        self.average = EWMA(halflife)
+        self.quantiles = RollingQuantile(window)
+        self.last_timestamp = None
+
+    @classmethod
+    def from_history(cls, history, **kwargs):
+        """
+        Build a trend from parsed price history.
+
+        Args:
+            history (dict): The columns from graph_utils.parse_price_history
+            **kwargs: Passed to the constructor
+
+        Returns:
+            PriceTrend: The trend over the history
+        """
+        trend = cls(**kwargs)
+        trend.add_sales(history["timestamp"], history["price"])
+        return trend
+
+    def add_sale(self, timestamp, price):
+        """
+        Add one sale.
+
+        Args:
+            timestamp (float): Epoch seconds of the sale
+            price (float): The price per unit
+        """
+        days = timestamp / SECONDS_PER_DAY
+        self.line.add(days, price)
+        self.average.update(price, days)
+        self.quantiles.update(price)
+        self.last_timestamp = timestamp
+
+    def add_sales(self, timestamps, prices):
+        """
+        Add several sales, oldest first.
+
+        Args:
+            timestamps (array-like): Epoch seconds of the sales
+            prices (array-like): The prices per unit
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(timestamps) == 0:
+            return
+        self.line.add_many(timestamps / SECONDS_PER_DAY, prices)
+        # Only the last window sales can still be in the rolling quantiles
+        for price in prices[-self.quantiles.window:]:
+            self.quantiles.update(float(price))
+        for timestamp, price in zip(timestamps / SECONDS_PER_DAY, prices):
+            self.average.update(price, timestamp)
+        self.last_timestamp = float(timestamps[-1])
+
+    def predict(self, timestamp):
+        """
+        Predict the price at a time from the trend line.
+
+        Args:
+            timestamp (float): Epoch seconds
+
+        Returns:
+            float: The predicted price, or None if there are not enough sales
+        """
+        return self.line.predict(timestamp / SECONDS_PER_DAY)
+
+    def get_summary(self):
+        """
+        Get the current statistics.
+
+        Returns:
+            dict: Dictionary with slope (gil per day), average, median, low (25th percentile),
+                high (75th percentile) and tomorrow (the price predicted one day after the last sale)
+        """
+        line = self.line.get_line()
+        return {
+            "slope": line[0] if line else None,
+            "average": self.average.value,
+            "median": self.quantiles.get(0.5),
+            "low": self.quantiles.get(0.25),
+            "high": self.quantiles.get(0.75),
+            "tomorrow": self.predict(self.last_timestamp + SECONDS_PER_DAY) if self.last_timestamp is not None else None
+        }
+
+def fit_peak_valley_trends(x, prices):
+    """
+    Fit separate trend lines to the prices at or above the average and below it.
+
+    Args:
+        x (numpy.ndarray): The x values, e.g. Matplotlib date numbers
+        prices (numpy.ndarray): The prices
+
+    Returns:
+        tuple: (peak line, valley line), each (slope, intercept) or None
+    """
+    above_avg = prices >= prices.mean()
+    return fit_line(x[above_avg], prices[above_avg]), fit_line(x[~above_avg], prices[~above_avg])